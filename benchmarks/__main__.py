@@ -0,0 +1,63 @@
+""" Health Client benchmarks.
+
+Usage:
+    python -m benchmarks run [--save results.json] [names...]
+    python -m benchmarks compare baseline.json [current.json] [--threshold 0.1]
+
+Compare runs the benchmarks when current results are not given and exits with
+status 1 when any benchmark is slower than baseline by more than the threshold.
+"""
+import argparse
+import sys
+
+from benchmarks import runner
+from benchmarks.cases import BENCHMARKS
+
+
+def _print_results(results):
+    for name, result in sorted(results.items()):
+        print("{:<32} {:>10.2f} us  (median {:.2f} us, {} calls)".format(
+            name, result["best_s"] * 1e6, result["median_s"] * 1e6, result["number"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health Client benchmarks.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument("names", nargs="*", help="Benchmarks to run, all by default")
+    run_parser.add_argument("--save", metavar="results.json", help="Store results as JSON")
+    run_parser.add_argument("--repeat", type=int, default=5)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare results with baseline")
+    compare_parser.add_argument("baseline", help="Baseline results JSON")
+    compare_parser.add_argument("current", nargs="?", help="Current results JSON, benchmarks are run if not given")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Relative slow down reported as regression")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = runner.run(BENCHMARKS, args.names, args.repeat)
+        _print_results(results)
+
+        if args.save:
+            runner.save(results, args.save)
+
+    elif args.command == "compare":
+        baseline = runner.load(args.baseline)
+        current = runner.load(args.current) if args.current else runner.run(BENCHMARKS, sorted(baseline))
+        rows = runner.compare(baseline, current, args.threshold)
+
+        for name, base_s, current_s, ratio, regression in rows:
+            print("{:<32} {:>10.2f} us -> {:>10.2f} us  x{:.2f}{}".format(
+                name, base_s * 1e6, current_s * 1e6, ratio, "  REGRESSION" if regression else ""))
+
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
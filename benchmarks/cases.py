@@ -0,0 +1,116 @@
+""" Benchmarked hot paths of the Health Client.
+
+Every case is a function returning the callable which is timed.
+"""
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_cli import HealthClientCli
+from silvair_health_client.health_client_printer import HealthClientStatusPrinter, HealthClientJsonPrinter
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher, \
+    QueuedOpcodesDispatcher
+
+
+class NullSender:
+
+    def send_message(self, msg):
+        pass
+
+
+class NullAddressingSender(NullSender):
+    """ Sender accepting destination addresses, so that requests to them are encoded and sent """
+
+    supports_dst_addr = True
+
+
+class NullConsoleOut:
+
+    def print_standard_message(self, msg):
+        pass
+
+    def print_informative_message(self, msg):
+        pass
+
+    def print_error_message(self, msg):
+        pass
+
+
+def _generic_status(faults_count):
+    return bytes([0x00, 0x36, 0x01]) + bytes(0x01 + i % 0x32 for i in range(faults_count)) + bytes([0x05, 0x00])
+
+
+def send_fault_get():
+    health_client = HealthClient(NullSender(), 1)
+    return lambda: health_client.send_fault_get("0x0136")
+
+
+def send_fault_test():
+    health_client = HealthClient(NullSender(), 1)
+    return lambda: health_client.send_fault_test("0x0136", 1)
+
+
+def send_attention_set():
+    health_client = HealthClient(NullSender(), 1)
+    return lambda: health_client.send_attention_set(5)
+
+
+def _print_fault_status(faults_count):
+    printer = HealthClientStatusPrinter(NullConsoleOut())
+    command = _generic_status(faults_count)
+    return lambda: printer.print_fault_status(command)
+
+
+def print_fault_status_0_faults():
+    return _print_fault_status(0)
+
+
+def print_fault_status_1_fault():
+    return _print_fault_status(1)
+
+
+def print_fault_status_64_faults():
+    return _print_fault_status(64)
+
+
+def print_jsonl_64_faults():
+    printer = HealthClientJsonPrinter(NullConsoleOut())
+    command = _generic_status(64)
+    return lambda: printer.print_fault_status(command)
+
+
+def dispatch_current_status():
+    dispatcher = HealthClientOpcodesDispatcher({HealthClientOpcodes.CURRENT_STATUS: lambda command: None})
+    command = _generic_status(1)
+    return lambda: dispatcher.dispatch(HealthClientOpcodes.CURRENT_STATUS, command)
+
+
+def dispatch_current_status_queued():
+    # Workers are not started, so it measures the reader side only: lookup, queueing and dropping the oldest
+    dispatcher = QueuedOpcodesDispatcher({HealthClientOpcodes.CURRENT_STATUS: lambda command: None})
+    command = _generic_status(1)
+    return lambda: dispatcher.dispatch(HealthClientOpcodes.CURRENT_STATUS, command)
+
+
+def mapper_getitem_1000_models():
+    mapper = ModelIdToInstanceIndexMapper(NullConsoleOut())
+    mapper.map_models_ids(list(range(0x1000, 0x1000 + 1000)))
+    return lambda: mapper[0x1000 + 999]
+
+
+def cli_process_line():
+    cli = HealthClientCli(NullConsoleOut(), HealthClient(NullAddressingSender(), 1))
+    return lambda: cli.process_line("fault get 0x0136 @0x0005")
+
+
+BENCHMARKS = {
+    "send_fault_get": send_fault_get,
+    "send_fault_test": send_fault_test,
+    "send_attention_set": send_attention_set,
+    "print_fault_status_0_faults": print_fault_status_0_faults,
+    "print_fault_status_1_fault": print_fault_status_1_fault,
+    "print_fault_status_64_faults": print_fault_status_64_faults,
+    "print_jsonl_64_faults": print_jsonl_64_faults,
+    "dispatch_current_status": dispatch_current_status,
+    "dispatch_current_status_queued": dispatch_current_status_queued,
+    "mapper_getitem_1000_models": mapper_getitem_1000_models,
+    "cli_process_line": cli_process_line
+}
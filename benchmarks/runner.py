@@ -0,0 +1,57 @@
+import json
+import timeit
+
+
+def measure(func, repeat=5):
+    """ Measure time of a single call of the function.
+
+    :param func:   Callable, Measured function.
+    :param repeat: int,      Number of measurements, each lasting at least 0.2 s.
+    :return:       dict, best and median time per call in seconds and number of calls per measurement
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = sorted(total / number for total in timer.repeat(repeat, number))
+
+    return {"best_s": times[0], "median_s": times[len(times) // 2], "number": number}
+
+
+def run(benchmarks, names=None, repeat=5):
+    """ Run benchmarks.
+
+    :param benchmarks: dict<str, Callable>, Benchmark name to function creating measured callable.
+    :param names:      Iterable[str],       Names of benchmarks to run, all if None.
+    :param repeat:     int,                 Number of measurements.
+    :return:           dict<str, dict>, results
+    """
+    names = sorted(benchmarks) if not names else names
+    return {name: measure(benchmarks[name](), repeat) for name in names}
+
+
+def compare(baseline, current, threshold=0.1):
+    """ Compare results with baseline.
+
+    :param baseline:  dict<str, dict>, Baseline results.
+    :param current:   dict<str, dict>, Current results.
+    :param threshold: float,           Relative slow down reported as regression.
+    :return:          list[tuple(str, float, float, float, bool)], name, baseline, current, ratio and regression flag
+    """
+    rows = []
+
+    for name in sorted(set(baseline) & set(current)):
+        base_s = baseline[name]["best_s"]
+        current_s = current[name]["best_s"]
+        ratio = current_s / base_s if base_s else float("inf")
+        rows.append((name, base_s, current_s, ratio, ratio > 1.0 + threshold))
+
+    return rows
+
+
+def load(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+def save(results, path):
+    with open(path, "w") as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
@@ -1,5 +1,5 @@
-import time
 import sys
+import time
 import argparse
 
 from silvair_uart_common_libs.message_types import ModelID, ModelDesc
@@ -9,12 +9,24 @@ from silvair_otau_demo.console_out import ConsoleOut
 from silvair_otau_demo.dispatcher import Dispatcher, Sender
 from silvair_otau_demo.uart_logic.uart_fsm_mgr import UART_FSM
 
-from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client import HealthClientLanes
 from silvair_health_client.health_client_cli import HealthClientCli
+from silvair_health_client.health_capture import CaptureWriter, CapturingSender, CaptureReplayer, read_capture
+from silvair_health_client.health_client_gateway import HealthClientGateway, StatusDeduplicator, parse_port_route
+from silvair_health_client.health_client_pacing import PacedSender
 from silvair_health_client.health_opcodes import HealthClientOpcodes
-from silvair_health_client.health_client_printer import HealthClientStatusPrinter
+from silvair_health_client.health_client_printer import HealthClientStatusPrinter, HealthClientJsonPrinter
+from silvair_health_client.health_client_output import BatchedConsoleOut, StreamConsoleOut
 from silvair_health_client.health_client_evt_mgr import HealtClientEventMgr
-from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher
+from silvair_health_client.health_requests import HealthRequestTracker, RetryPolicy
+from silvair_health_client.health_state_store import FaultStateStore
+from silvair_health_client.health_history import FaultHistory
+from silvair_health_client.health_liveness import LivenessTracker
+from silvair_health_client.health_status_bus import HealthStatusBus, StatusFilter
+from silvair_health_client.health_client_sweep import parse_address_range
+from silvair_health_client.health_client_metrics import HealthClientMetrics, MetricsHttpServer
+from silvair_health_client.health_client_simulator import SimulatedHealthMesh, SimulatedHealthServer
+from silvair_health_client.utils import ModelIdToInstanceIndexMapper, QueuedOpcodesDispatcher
 
 
 WELCOME_MSG = """\
@@ -41,11 +53,11 @@ How to use?
 """
 
 
-def create_uart_adapter_and_uart_fsm(com_port, event_mgr):
+def create_uart_adapter_and_uart_fsm(com_port, event_mgr, lanes=1):
     """ Function creates instances required to connect to UART. """
     uart_adapter = UartAdapter(com_port)
     sender = Sender(uart_adapter)
-    uart_fsm = UART_FSM(sender, event_mgr, default_models=(ModelDesc(ModelID.HealthClientID),))
+    uart_fsm = UART_FSM(sender, event_mgr, default_models=tuple(ModelDesc(ModelID.HealthClientID) for _ in range(lanes)))
     dfu_dispatcher = Dispatcher(uart_fsm, None)
     uart_adapter.register_observer(dfu_dispatcher)
 
@@ -55,7 +67,56 @@ def create_uart_adapter_and_uart_fsm(com_port, event_mgr):
 def parse_cli_args():
     """ Function parses passed command line arguments. """
     parser = argparse.ArgumentParser(description="Health Client CLI.")
-    parser.add_argument("--port", metavar="/dev/ttyACM0", type=str, help="Serial port with connected UART Modem", required=True)
+    port_group = parser.add_mutually_exclusive_group(required=True)
+    port_group.add_argument("--port", metavar="/dev/ttyACM0[@0x0001-0x0fff]", type=parse_port_route, action="append",
+                            help="Serial port with connected UART Modem, may be given many times to use many modems, "
+                                 "requests to the address range are sent through the modem")
+    port_group.add_argument("--simulate", metavar="NODES", type=int,
+                            help="Run against simulated mesh of NODES Health Servers instead of UART Modem")
+    port_group.add_argument("--replay", metavar="FILE", type=str,
+                            help="Handle statuses of a capture recorded with --capture instead of UART Modem and exit")
+    parser.add_argument("--replay-speed", metavar="N", type=float, default=1.0,
+                        help="Replay capture N times faster than recorded, as fast as possible if 0")
+    parser.add_argument("--capture", metavar="FILE", type=str, default=None,
+                        help="Record requests sent to and statuses received from the UART Modem in FILE")
+    parser.add_argument("--lanes", metavar="N", type=int, default=1,
+                        help="Number of Health Client model instances used to send requests in parallel")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text",
+                        help="Print statuses as text or as JSON lines for log pipelines")
+    parser.add_argument("--src-range", metavar="0x0001-0x0190", type=parse_address_range, action="append",
+                        help="Print only statuses from this address range, may be given many times")
+    parser.add_argument("--faults-only", action="store_true",
+                        help="Print only Fault and Current Status with registered faults")
+    parser.add_argument("--changes-only", action="store_true",
+                        help="Print fault changes instead of every Current Status")
+    parser.add_argument("--state-db", metavar="health_state.db", type=str, default=None,
+                        help="File the last fault state of the nodes is kept in between runs")
+    parser.add_argument("--silence-timeout", metavar="SECONDS", type=float, default=None,
+                        help="Report nodes which have not sent any status for this time")
+    parser.add_argument("--missed-publications", metavar="N", type=float, default=None,
+                        help="Report nodes which have not published Current Status for N of their learned "
+                             "publication intervals")
+    parser.add_argument("--history", metavar="DIR", type=str, default=None,
+                        help="Directory every Current and Fault Status is appended to for long-term trending")
+    parser.add_argument("--metrics-port", metavar="9100", type=int, default=None,
+                        help="Expose Prometheus metrics on http://localhost:<port>/metrics")
+    parser.add_argument("--retries", metavar="N", type=int, default=2,
+                        help="Number of times an acknowledged request is sent again when its status is not received")
+    parser.add_argument("--tx-rate", metavar="MSG_PER_S", type=float, default=20.0,
+                        help="Average number of requests sent per second through every modem")
+    parser.add_argument("--tx-burst", metavar="N", type=int, default=5,
+                        help="Number of requests which may be sent at once after idle time")
+    parser.add_argument("--handler-workers", metavar="N", type=int, default=2,
+                        help="Number of threads handling received statuses")
+    parser.add_argument("--queue-overflow", choices=(QueuedOpcodesDispatcher.DROP_OLDEST, QueuedOpcodesDispatcher.BLOCK),
+                        default=QueuedOpcodesDispatcher.DROP_OLDEST,
+                        help="What to do with a status when the handler queue is full")
+    parser.add_argument("--startup-timeout", metavar="SECONDS", type=float, default=10.0,
+                        help="Time to wait for the UART Modem to register Health Client model")
+    parser.add_argument("--script", metavar="FILE", type=str, default=None,
+                        help="Run commands from FILE ('-' for stdin) instead of the prompt, "
+                             "exit code tells if faults were reported (1), requests were not "
+                             "replied (2) or a command was invalid (3)")
     return parser.parse_args()
 
 
@@ -63,56 +124,219 @@ if __name__ == "__main__":
     args = parse_cli_args()
 
     console_out = None
-    uart_adapter = None
+    uart_adapters = []
+    paced_senders = []
+    request_tracker = None
+    status_out = None
+    state_store = None
+    fault_history = None
+    liveness_tracker = None
+    metrics_server = None
+    simulated_mesh = None
+    opcodes_disp = None
+    capture_writer = None
+    exit_code = 0
 
     try:
-        console_out = ConsoleOut()
-        console_out.print_standard_message(WELCOME_MSG)
+        if args.format == "jsonl":
+            # stdout carries JSON lines only, messages of the application and the CLI go to stderr
+            console_out = StreamConsoleOut(sys.stderr, sys.stderr)
+            status_console_out = StreamConsoleOut(sys.stdout, sys.stderr)
+        else:
+            console_out = status_console_out = ConsoleOut()
 
-        hc_status_printer = HealthClientStatusPrinter(console_out)
+        if args.script is None and args.format == "text":
+            console_out.print_standard_message(WELCOME_MSG)
 
-        opcodes_disp = HealthClientOpcodesDispatcher({
-            HealthClientOpcodes.CURRENT_STATUS: hc_status_printer.print_current_status,
-            HealthClientOpcodes.FAULT_STATUS: hc_status_printer.print_fault_status,
-            HealthClientOpcodes.ATTENTION_STATUS: hc_status_printer.print_attention_status,
-            HealthClientOpcodes.PERIOD_STATUS: hc_status_printer.print_period_status
-        })
+        # Statuses are printed from the handler threads, so they are written out in batches in the background
+        status_out = BatchedConsoleOut(status_console_out)
+        status_out.start()
 
-        mid_to_ii_mapper = ModelIdToInstanceIndexMapper(console_out)
-        event_mgr = HealtClientEventMgr(console_out, mid_to_ii_mapper, opcodes_disp)
+        if args.format == "jsonl":
+            hc_status_printer = HealthClientJsonPrinter(status_out)
+        else:
+            hc_status_printer = HealthClientStatusPrinter(status_out)
 
-        uart_adapter, uart_fsm, sender = create_uart_adapter_and_uart_fsm(args.port, event_mgr)
-        uart_adapter.start()
-        uart_fsm.start()
+        metrics = HealthClientMetrics()
 
-        console_out.print_informative_message("Please reset device to map models into instance indexes.")
-        console_out.print_standard_message("Waiting for response from device...")
+        if args.metrics_port is not None:
+            metrics_server = MetricsHttpServer(metrics, args.metrics_port)
+            metrics_server.start()
 
-        timeout = 10
-        timeout_time = time.time() + timeout
+        # Every status is decoded once and delivered to the printer and the state store
+        status_bus = HealthStatusBus()
+        printed_opcodes = [HealthClientOpcodes.FAULT_STATUS, HealthClientOpcodes.ATTENTION_STATUS,
+                           HealthClientOpcodes.PERIOD_STATUS]
 
-        while time.time() < timeout_time:
-            if mid_to_ii_mapper.contains_model_id(ModelID.HealthClientID):
-                break
+        # Fault state is kept only when changes are printed or the state is stored between runs
+        if args.changes_only or args.state_db is not None:
+            # Silence of replayed nodes would be measured from their captured timestamps with the wall clock
+            state_store = FaultStateStore(args.state_db or ":memory:",
+                                          args.silence_timeout if args.replay is None else None)
+            state_store.start()
+            status_bus.subscribe(state_store.on_status, (HealthClientOpcodes.CURRENT_STATUS,))
 
-            time.sleep(0.1)
-        else:
-            console_out.print_error_message("Could not get response from device within {}s.".format(timeout))
-            sys.exit(1)
+        if args.missed_publications is not None:
+            liveness_tracker = LivenessTracker(args.missed_publications)
+            liveness_tracker.add_listener(hc_status_printer.print_liveness_change)
+
+            # Replayed statuses carry their captured timestamps, the wall clock would find every node missing
+            if args.replay is None:
+                liveness_tracker.start()
 
-        # Take first registered Health Client model
-        hc_instance_idx = mid_to_ii_mapper[ModelID.HealthClientID][0]
+            status_bus.subscribe(liveness_tracker.on_status,
+                                 (HealthClientOpcodes.CURRENT_STATUS, HealthClientOpcodes.PERIOD_STATUS))
+
+        if args.history is not None:
+            fault_history = FaultHistory(args.history)
+            status_bus.subscribe(fault_history.on_status,
+                                 (HealthClientOpcodes.CURRENT_STATUS, HealthClientOpcodes.FAULT_STATUS))
+
+        if args.changes_only:
+            state_store.add_listener(hc_status_printer.print_fault_state_change)
+        else:
+            printed_opcodes.append(HealthClientOpcodes.CURRENT_STATUS)
+
+        status_bus.subscribe(hc_status_printer.print_record, printed_opcodes,
+                             StatusFilter(args.src_range, faults_only=args.faults_only))
+
+        # Statuses are handled on worker threads, so slow handlers do not stall UART reception. Replay waits for
+        # the handlers instead of dropping statuses, it would report throughput of statuses which were not handled
+        opcodes_disp = QueuedOpcodesDispatcher(
+            status_bus.opcode_to_func_map(), metrics, args.handler_workers,
+            overflow=QueuedOpcodesDispatcher.BLOCK if args.replay is not None else args.queue_overflow,
+            error_handler=lambda opcode, command, err: status_out.print_error_message(
+                "Handling status 0x{:04x} failed: {!r}".format(opcode, err)))
+        opcodes_disp.start()
+
+        # Acknowledged requests lost in the mesh are sent again, unacknowledged ones are not tracked at all
+        request_tracker = HealthRequestTracker(metrics=metrics, retry_policy=RetryPolicy(args.retries + 1))
+        request_tracker.start()
+
+        if args.replay is not None:
+            event_mgr = HealtClientEventMgr(console_out, ModelIdToInstanceIndexMapper(console_out), opcodes_disp,
+                                            request_tracker)
+            start_time = time.monotonic()
+            delivered, _ = CaptureReplayer(read_capture(args.replay), args.replay_speed or None).replay(
+                event_mgr.uart_mesh_request)
+            # Waits until the queued statuses are handled
+            opcodes_disp.stop()
+            duration = time.monotonic() - start_time
+
+            console_out.print_standard_message("Replayed {} statuses in {:.3f} s ({:.0f} statuses/s), {} dropped"
+                                               .format(delivered, duration, delivered / duration if duration > 0 else 0,
+                                                       opcodes_disp.dropped))
+            sys.exit(0)
+
+        if args.capture is not None:
+            capture_writer = CaptureWriter(args.capture)
+
+        # Every modem has its own model mapping, statuses of all of them go to the same tracker and dispatcher
+        modems = []
+
+        if args.simulate is not None:
+            mid_to_ii_mapper = ModelIdToInstanceIndexMapper(console_out)
+            event_mgr = HealtClientEventMgr(console_out, mid_to_ii_mapper, opcodes_disp, request_tracker,
+                                            capture_writer=capture_writer)
+            simulated_mesh = SimulatedHealthMesh(
+                event_mgr,
+                [SimulatedHealthServer(addr, publish_period=10.0) for addr in range(1, args.simulate + 1)],
+                model_ids=[ModelID.HealthClientID] * args.lanes)
+            modems.append((event_mgr, mid_to_ii_mapper, simulated_mesh, None))
+            simulated_mesh.start()
+            simulated_mesh.reset()
+        else:
+            # Modems hear the same publications, every status is handled once
+            status_deduplicator = StatusDeduplicator() if len(args.port) > 1 else None
+
+            for port, address_range in args.port:
+                mid_to_ii_mapper = ModelIdToInstanceIndexMapper(console_out)
+                event_mgr = HealtClientEventMgr(console_out, mid_to_ii_mapper, opcodes_disp, request_tracker,
+                                                capture_writer=capture_writer, deduplicator=status_deduplicator)
+                uart_adapter, uart_fsm, sender = create_uart_adapter_and_uart_fsm(port, event_mgr, args.lanes)
+                uart_adapters.append(uart_adapter)
+                modems.append((event_mgr, mid_to_ii_mapper, sender, address_range))
+                uart_adapter.start()
+                uart_fsm.start()
+
+            console_out.print_informative_message("Please reset device to map models into instance indexes.")
+            console_out.print_standard_message("Waiting for response from device...")
+
+        for event_mgr, _, _, _ in modems:
+            if not event_mgr.wait_for_model(ModelID.HealthClientID, args.startup_timeout):
+                console_out.print_error_message("Could not get response from device within {}s."
+                                                .format(args.startup_timeout))
+                sys.exit(1)
+
+        # Requests are queued and sent at the rate the modem and the mesh can carry, without losing them
+        for _, _, sender, _ in modems:
+            if capture_writer is not None:
+                sender = CapturingSender(sender, capture_writer)
+
+            paced_senders.append(PacedSender(
+                sender, args.tx_rate, args.tx_burst,
+                error_handler=lambda msg, err: status_out.print_error_message("Sending request failed: {!r}".format(err)),
+                metrics=metrics))
+            paced_senders[-1].start()
+
+        # Every registered Health Client model is used as an independent lane
+        health_clients = [HealthClientLanes(paced_sender, mid_to_ii_mapper[ModelID.HealthClientID], request_tracker,
+                                            metrics)
+                          for (_, mid_to_ii_mapper, _, _), paced_sender in zip(modems, paced_senders)]
+
+        if len(health_clients) == 1:
+            health_client = health_clients[0]
+        else:
+            health_client = HealthClientGateway(health_clients, [address_range for _, _, _, address_range in modems])
 
         console_out.print_standard_message("Ready...")
 
-        health_client_cli = HealthClientCli(console_out, HealthClient(sender, hc_instance_idx))
-        health_client_cli.run()
+        health_client_cli = HealthClientCli(console_out, health_client, metrics=metrics)
+
+        if args.script is None:
+            health_client_cli.run()
+        elif args.script == "-":
+            exit_code = health_client_cli.run_script(sys.stdin)
+        else:
+            with open(args.script) as script:
+                exit_code = health_client_cli.run_script(script)
 
     except KeyboardInterrupt:
         if console_out is not None:
             console_out.print_informative_message("KeyboardInterrupt has been caught. Closing application...")
 
-        if uart_adapter is not None:
+    finally:
+        for paced_sender in paced_senders:
+            paced_sender.stop()
+
+        for uart_adapter in uart_adapters:
             uart_adapter.stop()
-        
-        sys.exit(0)
+
+        if simulated_mesh is not None:
+            simulated_mesh.stop()
+
+        if opcodes_disp is not None:
+            opcodes_disp.stop()
+
+        if request_tracker is not None:
+            request_tracker.stop()
+
+        if capture_writer is not None:
+            capture_writer.close()
+
+        if state_store is not None:
+            state_store.close()
+
+        if fault_history is not None:
+            fault_history.close()
+
+        if liveness_tracker is not None:
+            liveness_tracker.stop()
+
+        if metrics_server is not None:
+            metrics_server.stop()
+
+        if status_out is not None:
+            status_out.stop()
+
+    sys.exit(exit_code)
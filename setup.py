@@ -5,7 +5,7 @@ setup(
     version="2.9.0",
     author="Silvair",
     author_email="support@silvair.com",
-    packages=find_packages(exclude=["tests"]),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
     python_requires=">=3.6.0",
     install_requires=[
         "silvair-uart-common-libs==2.9.0",
@@ -0,0 +1,192 @@
+""" Capture of Health Client UART traffic and its replay.
+
+Capture file starts with a magic header followed by records, each of them a fixed
+size little-endian header (direction, timestamp, opcode, instance index, destination
+address, payload length) and the payload. Destination address 0 means the model
+publication address, instance index and destination are 0 in inbound records.
+Opcodes are 32 bit wide since version 2 of the format, so 3-byte vendor opcodes fit,
+captures of version 1 with 16 bit opcodes are still read.
+"""
+import collections
+import struct
+import threading
+import time
+
+
+CAPTURE_MAGIC = b"HCCAP\x02"
+
+OUTBOUND = 0
+INBOUND = 1
+
+CaptureRecord = collections.namedtuple("CaptureRecord",
+                                       ["direction", "timestamp", "opcode", "instance_index", "dst_addr", "payload"])
+
+_RECORD_HEADER = struct.Struct("<BdIHHH")
+
+_RECORD_HEADERS = {
+    b"HCCAP\x01": struct.Struct("<BdHHHH"),
+    CAPTURE_MAGIC: _RECORD_HEADER
+}
+
+
+class CaptureWriter:
+    """ Appends outbound and inbound messages to a capture file, safe to be used from many threads """
+
+    def __init__(self, path, clock=time.time):
+        """ Initialize writer
+
+        :param path:  str,      Capture file path, it is overwritten.
+        :param clock: Callable, Wall clock time source of the record timestamps.
+        :return:      None
+        """
+        self._file = open(path, "wb")
+        self._file.write(CAPTURE_MAGIC)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record_outbound(self, msg):
+        """ Record request sent to the UART Modem.
+
+        :param msg: MeshMessageRequestMessage, Sent message.
+        :return:    None
+        """
+        self._write(OUTBOUND, msg.mesh_opcode, msg.instance_index, getattr(msg, "dst_addr", None) or 0,
+                    bytes(msg.mesh_command))
+
+    def record_inbound(self, opcode, mesh_command):
+        """ Record message received from the UART Modem.
+
+        :param opcode:       int,   Message opcode.
+        :param mesh_command: bytes, Message payload.
+        :return:             None
+        """
+        self._write(INBOUND, opcode, 0, 0, bytes(mesh_command))
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def _write(self, direction, opcode, instance_index, dst_addr, payload):
+        header = _RECORD_HEADER.pack(direction, self._clock(), opcode, instance_index, dst_addr, len(payload))
+
+        with self._lock:
+            if self._file.closed:
+                return
+
+            self._file.write(header)
+            self._file.write(payload)
+            self.records += 1
+
+
+class CapturingSender:
+    """ Sender recording every message before it is passed to the wrapped Sender """
+
+    def __init__(self, sender, writer):
+        """ Initialize capturing sender
+
+        :param sender: Sender,        Sender messages are passed to.
+        :param writer: CaptureWriter, Capture messages are recorded in.
+        :return:       None
+        """
+        self._sender = sender
+        self._writer = writer
+
+    @property
+    def supports_dst_addr(self):
+        return getattr(self._sender, "supports_dst_addr", False)
+
+    def send_message(self, msg):
+        self._writer.record_outbound(msg)
+        return self._sender.send_message(msg)
+
+
+def read_capture(path):
+    """ Read records of a capture file.
+
+    :param path: str, Capture file path.
+    :return:     Iterator[CaptureRecord]
+    """
+    # Records are read one by one, so captures of long sessions are not loaded into memory at once
+    with open(path, "rb") as capture:
+        record_header = _RECORD_HEADERS.get(capture.read(len(CAPTURE_MAGIC)))
+
+        if record_header is None:
+            raise ValueError("Not a Health Client capture: {}".format(path))
+
+        while True:
+            header = capture.read(record_header.size)
+
+            # A record truncated by a crash of the capturing process is skipped
+            if len(header) < record_header.size:
+                return
+
+            direction, timestamp, opcode, instance_index, dst_addr, size = record_header.unpack(header)
+            payload = capture.read(size)
+
+            if len(payload) < size:
+                return
+
+            yield CaptureRecord(direction, timestamp, opcode, instance_index, dst_addr or None, payload)
+
+
+class CaptureReplayer:
+    """ Feeds inbound messages of a capture back with their captured timestamps, keeping their original pace
+    scaled by speed
+    """
+
+    def __init__(self, records, speed=1.0, clock=time.monotonic, sleep=time.sleep):
+        """ Initialize replayer
+
+        :param records: Iterable[CaptureRecord], Captured records, outbound ones are skipped.
+        :param speed:   float,                   Replay speed multiplier, as fast as possible if None.
+        :param clock:   Callable,                Monotonic time source.
+        :param sleep:   Callable,                Sleep function.
+        :return:        None
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("Speed must be positive")
+
+        self._records = records
+        self._speed = speed
+        self._clock = clock
+        self._sleep = sleep
+
+    def replay(self, deliver):
+        """ Deliver inbound messages.
+
+        :param deliver: Callable[[int, bytes, float], object], Called with opcode, payload and captured timestamp,
+                                                               e.g. HealtClientEventMgr.uart_mesh_request or dispatch.
+        :return:        tuple(int, float), number of delivered messages and replay duration in seconds
+        """
+        start_time = self._clock()
+        first_timestamp = None
+        delivered = 0
+
+        for record in self._records:
+            if record.direction != INBOUND:
+                continue
+
+            if self._speed is not None:
+                if first_timestamp is None:
+                    first_timestamp = record.timestamp
+
+                wait_s = (record.timestamp - first_timestamp) / self._speed - (self._clock() - start_time)
+
+                if wait_s > 0:
+                    self._sleep(wait_s)
+
+            deliver(record.opcode, record.payload, record.timestamp)
+            delivered += 1
+
+        return delivered, self._clock() - start_time
@@ -1,39 +1,140 @@
-from silvair_health_client.health_opcodes import HealthClientOpcodes
+import itertools
+import threading
+
+from silvair_health_client.health_client_pacing import current_send_priority, send_priority
+from silvair_health_client.health_opcodes import HealthClientOpcodes, ACKNOWLEDGED_STATUS_OPCODES
+from silvair_health_client.utils import is_unicast_address
 
 from silvair_uart_common_libs import messages
 
 
 class HealthClient:
-    """ Health Client """
+    """ Health Client
+
+    Mesh Message Request of the UART Modem carries no destination, the modem sends requests
+    to the Health Client model publication address. A destination address is accepted only
+    when the sender can deliver it (its supports_dst_addr is True, e.g. SimulatedHealthMesh),
+    it is attached to the message as dst_addr for such senders.
+    """
 
-    def __init__(self, sender, instance_index):
+    def __init__(self, sender, instance_index, request_tracker=None, metrics=None, retry_budget=None):
         """ Initalize Health Client
 
-        :param sender:         Sender, Uart Sender.
-        :param instance_index: int,    Model Instance Index.
-        :return:               None
+        :param sender:          Sender,               Uart Sender.
+        :param instance_index:  int,                  Model Instance Index.
+        :param request_tracker: HealthRequestTracker, Tracker correlating acknowledged requests with statuses.
+        :param metrics:         HealthClientMetrics,  Metrics sent messages are counted in, unless the sender
+                                                      reports sending them, PacedSender counts them itself.
+        :param retry_budget:    RetryBudget,          Retries shared by the requests, limited by the tracker if None.
+        :return:                None
         """
         self._sender = sender
         self._instance_index = instance_index
+        self._request_tracker = request_tracker
+        self._metrics = metrics
+        self._retry_budget = retry_budget
+
+    def with_retry_budget(self, retry_budget):
+        """ Get Health Client sending requests which share the retry budget, e.g. requests of a sweep.
+
+        :param retry_budget: RetryBudget, Retries shared by the requests.
+        :return:             HealthClient
+        """
+        return HealthClient(self._sender, self._instance_index, self._request_tracker, self._metrics, retry_budget)
+
+    @property
+    def supports_dst_addr(self):
+        return getattr(self._sender, "supports_dst_addr", False)
+
+    def _send(self, msg, dst_addr=None):
+        """ Send message, tracking it when it is acknowledged.
+
+        :param msg:      MeshMessageRequestMessage, Message to be sent.
+        :param dst_addr: int,                       Unicast or group destination address,
+                                                    model publication address if None.
+        :return:         Future resolved with the status, None if message is not tracked
+        """
+        if dst_addr is not None:
+            if not 0x0001 <= dst_addr <= 0xFFFF:
+                raise ValueError("Invalid destination address: {}".format(dst_addr))
+
+            if 0x8000 <= dst_addr <= 0xBFFF:
+                raise ValueError("Virtual address 0x{:04x} requires its Label UUID, which is not supported"
+                                 .format(dst_addr))
+
+            if not self.supports_dst_addr:
+                raise ValueError("Sender cannot address requests, they are sent to the model publication address")
+
+            msg.dst_addr = dst_addr
 
-    def send_attention_get(self):
+        # PacedSender counts messages when they leave its queue, merged ones are not sent at all
+        reports_sent = getattr(self._sender, "reports_sent", False)
+
+        if self._metrics is not None and not reports_sent:
+            self._metrics.on_message_sent(msg.mesh_opcode)
+
+        if self._request_tracker is None or msg.mesh_opcode not in ACKNOWLEDGED_STATUS_OPCODES:
+            self._sender.send_message(msg)
+            return None
+
+        # Group destinations are answered by many nodes, the first status completes the request
+        if dst_addr is not None and not is_unicast_address(dst_addr):
+            dst_addr = None
+
+        # Timeout of a request waiting in the sender queue starts when it is sent. Retries are queued with the
+        # priority of the request, e.g. behind the CLI commands for sweep requests
+        priority = current_send_priority()
+        request = self._request_tracker.track(msg.mesh_opcode, dst_addr,
+                                              resend=lambda: self._resend(msg, request, priority),
+                                              budget=self._retry_budget, queued=reports_sent)
+
+        try:
+            if reports_sent:
+                queued = self._sender.send_message(msg, on_sent=lambda: self._request_tracker.sent(request))
+            else:
+                queued = self._sender.send_message(msg)
+        except Exception:
+            self._request_tracker.discard(request)
+            raise
+
+        # PacedSender merges the message with an identical one waiting in its queue, both get the same status
+        if queued is False:
+            self._request_tracker.join(request)
+
+        return request.future
+
+    def _resend(self, msg, request, priority):
+        # Requests are sent again on the tracker thread, which must not wait for room in the sender queue
+        try_send_message = getattr(self._sender, "try_send_message", None)
+
+        with send_priority(priority):
+            if try_send_message is None:
+                self._sender.send_message(msg)
+            elif getattr(self._sender, "reports_sent", False):
+                try_send_message(msg, on_sent=lambda: self._request_tracker.sent(request))
+            else:
+                try_send_message(msg)
+
+    def send_attention_get(self, dst_addr=None):
         """ Send Attention Get message.
 
-        :return: None
+        :param dst_addr: int, Destination address, model publication address if None.
+        :return:         Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
         msg.mesh_opcode = HealthClientOpcodes.ATTENTION_GET
         msg.mesh_command = bytes()
 
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
 
-    def send_attention_set(self, attention_s, unack=False):
+    def send_attention_set(self, attention_s, unack=False, dst_addr=None):
         """ Send Attention Set message.
 
         :param attention_s: int,  Attention time in seconds.
         :param unack:       bool, Unacknowledged message.
-        :return:            None
+        :param dst_addr:    int,  Destination address, model publication address if None.
+        :return:            Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
@@ -44,14 +145,15 @@ class HealthClient:
         else:
             msg.mesh_opcode = HealthClientOpcodes.ATTENTION_SET
 
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
 
-    def send_fault_clear(self, company_id, unack=False):
+    def send_fault_clear(self, company_id, unack=False, dst_addr=None):
         """ Send Fault Clear message
 
         :param company_id: str,  Company Id.
         :param unack:      bool, Unacknowledged message.
-        :return:           None
+        :param dst_addr:   int,  Destination address, model publication address if None.
+        :return:           Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
@@ -62,28 +164,30 @@ class HealthClient:
         else:
             msg.mesh_opcode = HealthClientOpcodes.FAULT_CLEAR
 
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
 
-    def send_fault_get(self, company_id):
+    def send_fault_get(self, company_id, dst_addr=None):
         """ Send Fault Get message
 
         :param company_id: str,  Company Id.
-        :return:           None
+        :param dst_addr:   int,  Destination address, model publication address if None.
+        :return:           Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
         msg.mesh_opcode = HealthClientOpcodes.FAULT_GET
         msg.mesh_command = int(company_id, 16).to_bytes(2, byteorder='little')
         
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
 
-    def send_fault_test(self, company_id, test_id, unack=False):
+    def send_fault_test(self, company_id, test_id, unack=False, dst_addr=None):
         """ Send Fault Test message
 
         :param company_id: str,  Company Id.
         :param test_id:    str,  Test Id.
         :param unack:      bool, Unacknowledged message.
-        :return:           None
+        :param dst_addr:   int,  Destination address, model publication address if None.
+        :return:           Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
@@ -96,26 +200,28 @@ class HealthClient:
         else:
             msg.mesh_opcode = HealthClientOpcodes.FAULT_TEST
 
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
 
-    def send_period_get(self):
+    def send_period_get(self, dst_addr=None):
         """ Send Period Get message
 
-        :return:           None
+        :param dst_addr:   int,  Destination address, model publication address if None.
+        :return:           Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
         msg.mesh_opcode = HealthClientOpcodes.PERIOD_GET
         msg.mesh_command = bytes()
 
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
 
-    def send_period_set(self, fast_period_dividor, unack=False):
+    def send_period_set(self, fast_period_dividor, unack=False, dst_addr=None):
         """ Send Period Set message
 
         :param fast_period_dividor: str,  Fast Period Divider.
         :param unack:               bool, Unacknowledged message.
-        :return:                    None
+        :param dst_addr:            int,  Destination address, model publication address if None.
+        :return:                    Future, resolved with the status if request is tracked, None otherwise
         """
         msg = messages.MeshMessageRequestMessage()
         msg.instance_index = self._instance_index
@@ -126,4 +232,85 @@ class HealthClient:
         else:
             msg.mesh_opcode = HealthClientOpcodes.PERIOD_SET
 
-        self._sender.send_message(msg)
+        return self._send(msg, dst_addr)
+
+
+class HealthClientLanes:
+    """ Health Clients of every registered Health Client model instance used as independent lanes.
+
+    Requests to a unicast destination, which only senders able to address requests
+    accept, always go through the same lane, so they are not reordered. Other requests
+    are spread over the lanes in turn.
+    """
+
+    def __init__(self, sender, instance_indexes, request_tracker=None, metrics=None, retry_budget=None):
+        """ Initialize lanes
+
+        :param sender:           Sender,               Uart Sender.
+        :param instance_indexes: Iterable[int],        Health Client model instance indexes.
+        :param request_tracker:  HealthRequestTracker, Tracker correlating acknowledged requests with statuses.
+        :param metrics:          HealthClientMetrics,  Metrics sent messages are counted in.
+        :param retry_budget:     RetryBudget,          Retries shared by the requests, limited by the tracker if None.
+        :return:                 None
+        """
+        self._instance_indexes = tuple(instance_indexes)
+        self._lanes = tuple(HealthClient(sender, instance_index, request_tracker, metrics, retry_budget)
+                            for instance_index in self._instance_indexes)
+
+        if not self._lanes:
+            raise ValueError("At least one instance index is required")
+
+        self._sender = sender
+        self._request_tracker = request_tracker
+        self._metrics = metrics
+        self._next_lane_idx = itertools.cycle(range(len(self._lanes)))
+        self._lock = threading.Lock()
+
+    def with_retry_budget(self, retry_budget):
+        """ Get lanes sending requests which share the retry budget, e.g. requests of a sweep.
+
+        :param retry_budget: RetryBudget, Retries shared by the requests.
+        :return:             HealthClientLanes
+        """
+        return HealthClientLanes(self._sender, self._instance_indexes, self._request_tracker, self._metrics,
+                                 retry_budget)
+
+    def __len__(self):
+        return len(self._lanes)
+
+    @property
+    def supports_dst_addr(self):
+        return self._lanes[0].supports_dst_addr
+
+    def lane(self, dst_addr=None):
+        """ Get Health Client used for the destination.
+
+        :param dst_addr: int, Destination address, model publication address if None.
+        :return:         HealthClient
+        """
+        if dst_addr is not None and is_unicast_address(dst_addr):
+            return self._lanes[dst_addr % len(self._lanes)]
+
+        with self._lock:
+            return self._lanes[next(self._next_lane_idx)]
+
+    def send_attention_get(self, dst_addr=None):
+        return self.lane(dst_addr).send_attention_get(dst_addr)
+
+    def send_attention_set(self, attention_s, unack=False, dst_addr=None):
+        return self.lane(dst_addr).send_attention_set(attention_s, unack, dst_addr)
+
+    def send_fault_clear(self, company_id, unack=False, dst_addr=None):
+        return self.lane(dst_addr).send_fault_clear(company_id, unack, dst_addr)
+
+    def send_fault_get(self, company_id, dst_addr=None):
+        return self.lane(dst_addr).send_fault_get(company_id, dst_addr)
+
+    def send_fault_test(self, company_id, test_id, unack=False, dst_addr=None):
+        return self.lane(dst_addr).send_fault_test(company_id, test_id, unack, dst_addr)
+
+    def send_period_get(self, dst_addr=None):
+        return self.lane(dst_addr).send_period_get(dst_addr)
+
+    def send_period_set(self, fast_period_dividor, unack=False, dst_addr=None):
+        return self.lane(dst_addr).send_period_set(fast_period_dividor, unack, dst_addr)
@@ -0,0 +1,141 @@
+import asyncio
+import functools
+
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_status import STATUS_DECODERS, decode_status
+
+
+class AsyncHealthClient:
+    """ asyncio facade over Health Client.
+
+    Requests are sent on an executor thread, since senders may block, and awaited on
+    the event loop until the matching status arrives. Statuses received on the UART
+    thread are marshalled into the event loop through `dispatch`, which has the
+    HealthClientOpcodesDispatcher interface and may be passed to HealtClientEventMgr in
+    its place. Statuses are passed on to the next dispatcher as well, so they are still
+    printed and stored.
+    """
+
+    def __init__(self, health_client, loop=None, max_queued_statuses=1024, next_dispatcher=None):
+        """ Initialize asyncio Health Client.
+
+        :param health_client:       HealthClient,      Health Client or HealthClientLanes created with a request tracker.
+        :param loop:                AbstractEventLoop, Event loop, current event loop if None.
+        :param max_queued_statuses: int,               Statuses kept until read, older ones are dropped.
+        :param next_dispatcher:     object,            Dispatcher the statuses are passed on to, e.g. the one replaced
+                                                       in HealtClientEventMgr, None if there is none.
+        :return:                    None
+        """
+        self._health_client = health_client
+        self._loop = loop if loop is not None else asyncio.get_event_loop()
+        self._max_queued_statuses = max_queued_statuses
+        self._next_dispatcher = next_dispatcher
+        # Queue is bound to the loop it is created in, so it is created on the loop when first used
+        self._statuses = None
+        self._dropped_statuses = 0
+
+    @property
+    def dropped_statuses(self):
+        return self._dropped_statuses
+
+    async def attention_get(self, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_attention_get, dst_addr=dst_addr),
+                                   HealthClientOpcodes.ATTENTION_STATUS)
+
+    async def attention_set(self, attention_s, unack=False, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_attention_set, attention_s, unack,
+                                                     dst_addr),
+                                   HealthClientOpcodes.ATTENTION_STATUS, unack)
+
+    async def fault_clear(self, company_id, unack=False, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_fault_clear, company_id, unack,
+                                                     dst_addr),
+                                   HealthClientOpcodes.FAULT_STATUS, unack)
+
+    async def fault_get(self, company_id, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_fault_get, company_id, dst_addr),
+                                   HealthClientOpcodes.FAULT_STATUS)
+
+    async def fault_test(self, company_id, test_id, unack=False, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_fault_test, company_id, test_id,
+                                                     unack, dst_addr),
+                                   HealthClientOpcodes.FAULT_STATUS, unack)
+
+    async def period_get(self, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_period_get, dst_addr=dst_addr),
+                                   HealthClientOpcodes.PERIOD_STATUS)
+
+    async def period_set(self, fast_period_divisor, unack=False, dst_addr=None):
+        return await self._request(functools.partial(self._health_client.send_period_set, fast_period_divisor,
+                                                     unack, dst_addr),
+                                   HealthClientOpcodes.PERIOD_STATUS, unack)
+
+    async def next_status(self):
+        """ Wait for the next received status, including unsolicited Current Status.
+
+        :return: status record
+        """
+        return await self._status_queue().get()
+
+    def dispatch(self, opcode, command):
+        """ Pass status received on the UART thread to the event loop.
+
+        :param opcode:  int,   Status opcode.
+        :param command: bytes, Status message payload.
+        :return:        bool, True if opcode is a Health status or it has been handled by the next dispatcher
+        """
+        handled = self._next_dispatcher is not None and self._next_dispatcher.dispatch(opcode, command)
+
+        if opcode not in STATUS_DECODERS:
+            return handled
+
+        self._loop.call_soon_threadsafe(self._put_status, opcode, command)
+        return True
+
+    def _status_queue(self):
+        if self._statuses is None:
+            self._statuses = asyncio.Queue(self._max_queued_statuses)
+
+        return self._statuses
+
+    def _put_status(self, opcode, command):
+        statuses = self._status_queue()
+
+        if statuses.full():
+            statuses.get_nowait()
+            self._dropped_statuses += 1
+
+        statuses.put_nowait(decode_status(opcode, command))
+
+    async def _request(self, send, status_opcode, unack=False):
+        # PacedSender blocks while its queue is full and the UART sender does serial I/O, so the event loop
+        # does not send the message itself
+        sending = self._loop.run_in_executor(None, send)
+
+        try:
+            future = await asyncio.shield(sending)
+        except asyncio.CancelledError:
+            sending.add_done_callback(_cancel_sent_request)
+            raise
+
+        if unack:
+            return None
+
+        if future is None:
+            raise ValueError("Health Client has no request tracker")
+
+        # Cancellation is not propagated by the wrapper, the request is cancelled explicitly instead, which
+        # drops it from the request tracker unless its status is already being handled
+        try:
+            command = await asyncio.shield(asyncio.wrap_future(future, loop=self._loop))
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+
+        return decode_status(status_opcode, command)
+
+
+def _cancel_sent_request(sending):
+    # Message is sent even when the awaiting task has been cancelled, its request is dropped once it is tracked
+    if not sending.cancelled() and sending.exception() is None and sending.result() is not None:
+        sending.result().cancel()
@@ -1,15 +1,37 @@
+import concurrent.futures
 import re
 import sys
+import threading
+import time
+
+from silvair_health_client.health_client_sweep import AttentionCampaign, FaultSweep, \
+    parse_address_range
+from silvair_health_client.health_faults import FAULT_NAMES, HealthFaults
+from silvair_health_client.health_status import decode_fault_status
+
+
+EXIT_OK = 0
+EXIT_FAULTS = 1
+EXIT_NO_REPLY = 2
+EXIT_SCRIPT_ERROR = 3
+
+
+class _ScriptAborted(Exception):
+
+    def __init__(self, exit_code):
+        super(_ScriptAborted, self).__init__(exit_code)
+        self.exit_code = exit_code
 
 
 class HealthClientCli(object):
     """ Health Client CLI """
 
-    def __init__(self, console_out, health_client, prompt="> "):
+    def __init__(self, console_out, health_client, prompt="> ", metrics=None):
         """ Initialize CLI.
 
         :param  console_out:   ConsoleOut, Console output interface
         :param  health_client: HealthClient, Health Client instance
+        :param  metrics:       HealthClientMetrics, Metrics shown by the stats command
         :return                None
         """
         self._console_out = console_out
@@ -22,12 +44,23 @@ class HealthClientCli(object):
             "fault": self._fault,
             "p": self._period,
             "period": self._period,
+            "s": self._sweep,
+            "sweep": self._sweep,
+            "stats": self._stats,
+            "wait": self._wait,
+            "expect": self._expect,
             "h": self._help,
             "help": self._help
         }
 
         self._health_client = health_client
         self._prompt = prompt
+        self._metrics = metrics
+
+        # Script mode state, replies are collected only while a script is run
+        self._outstanding = None
+        self._faulty_nodes = set()
+        self._no_reply_count = 0
 
     def _quit(self, args):
         """ Exit from application.
@@ -39,156 +72,422 @@ class HealthClientCli(object):
 
     def _help(self, args):
         self._console_out.print_standard_message("Help:")
-        self._console_out.print_standard_message("\t[a]ttention - commands for set and get attention")
+        self._console_out.print_standard_message("\t[a]ttention - set, get and campaign")
         self._console_out.print_standard_message("\t[f]ault - commands for get, clear and run tests")
         self._console_out.print_standard_message("\t[p]eriod - commands for set and get Fast Period Divider")
+        self._console_out.print_standard_message("\t[s]weep - get faults from a range of nodes")
+        self._console_out.print_standard_message("\tstats - show message and latency statistics")
+        self._console_out.print_standard_message("\twait [<seconds>] - wait for replies or sleep")
+        self._console_out.print_standard_message("\texpect [no-faults|replies] - check replies")
         self._console_out.print_standard_message("\t[q]uit - exit from CLI")
         self._console_out.print_standard_message("")
         self._console_out.print_standard_message("Note: parameters that ends with 'u' e.g. 'setu', 'clearu', ...")
         self._console_out.print_standard_message("      are unacknowledged.")
+        self._console_out.print_standard_message("Note: append @0x<dst_addr> to send a request to")
+        self._console_out.print_standard_message("      a unicast or group address instead of the")
+        self._console_out.print_standard_message("      publication address, UART Modem sends them")
+        self._console_out.print_standard_message("      to the publication address (--simulate).")
+
+    def _usage(self, message):
+        self._console_out.print_standard_message(message)
+
+        # Script must not go on when a command has not been run
+        if self._outstanding is not None:
+            raise _ScriptAborted(EXIT_SCRIPT_ERROR)
+
+    def _invalid_value(self):
+        self._console_out.print_error_message("Error: Invalid value!")
+
+        if self._outstanding is not None:
+            raise _ScriptAborted(EXIT_SCRIPT_ERROR)
+
+    def _track(self, future, decode=None):
+        """ Keep request future to collect its reply when a script is run.
+
+        :param  future: Future, resolved with the status, None if request is not tracked
+        :param  decode: Callable, decoder of Fault Status payload, None for other statuses
+        :return         None
+        """
+        if future is not None and self._outstanding is not None:
+            self._outstanding.append((future, decode))
+
+    def _collect_replies(self):
+        """ Wait for replies to the sent requests and record faults and missing replies.
+
+        :return None
+        """
+        if not self._outstanding:
+            return
+
+        outstanding, self._outstanding = self._outstanding, []
+        concurrent.futures.wait([future for future, _ in outstanding])
+
+        for future, decode in outstanding:
+            if future.exception() is not None:
+                self._no_reply_count += 1
+            elif decode is not None:
+                status = decode(future.result())
+                self._record_faults(status.src_addr, status.faults)
+
+    def _record_faults(self, src_addr, faults):
+        if any(fault != HealthFaults.NO_FAULT for fault in faults):
+            self._faulty_nodes.add(src_addr)
+
+    def _format_faulty_nodes(self):
+        return ", ".join("0x{:04x}".format(addr) if addr is not None else "unknown" for addr in
+                         sorted(self._faulty_nodes, key=lambda addr: -1 if addr is None else addr))
+
+    def _wait(self, args):
+        if args:
+            try:
+                time.sleep(float(args[0]))
+            except ValueError:
+                self._invalid_value()
+
+            return
+
+        self._collect_replies()
+
+    def _expect(self, args):
+        if len(args) != 1 or args[0] not in ("no-faults", "replies"):
+            self._usage("Wait for replies and check them, script fails if not met.\n"
+                        "Usage: expect [no-faults|replies]")
+            return
+
+        self._collect_replies()
+
+        if args[0] == "no-faults" and self._faulty_nodes:
+            self._console_out.print_error_message("Expectation failed: faults reported by {}"
+                                                  .format(self._format_faulty_nodes()))
+            exit_code = EXIT_FAULTS
+
+        elif args[0] == "replies" and self._no_reply_count:
+            self._console_out.print_error_message("Expectation failed: {} request(s) without reply"
+                                                  .format(self._no_reply_count))
+            exit_code = EXIT_NO_REPLY
+
+        else:
+            return
+
+        if self._outstanding is not None:
+            raise _ScriptAborted(exit_code)
+
+    def _pop_dst_addr(self, args):
+        """ Split optional trailing destination address '@0x<dst_addr>' from arguments.
+
+        :param  args: list[str], command arguments
+        :return       tuple(list[str], int), arguments and destination address or None
+        """
+        if args and args[-1].startswith("@"):
+            self._require_dst_addr()
+            return args[:-1], int(args[-1][1:], 16)
+
+        return args, None
+
+    def _require_dst_addr(self):
+        """ Check requests can be sent to a destination address, UART Modem sends them to the
+        publication address.
+
+        :return None
+        """
+        if not self._health_client.supports_dst_addr:
+            self._console_out.print_error_message("Error: Requests are sent to the Health Client "
+                                                  "model publication address, destination is not "
+                                                  "supported!")
+            raise ValueError("Destination address is not supported")
+
+    def _run_in_background(self, name, func):
+        """ Run long command on its own thread, so the prompt is not blocked and commands typed in
+        the meantime are sent ahead of its requests. Scripts run it on the calling thread to check
+        its results.
+
+        :param  name: str, thread name
+        :param  func: Callable[[], None], command
+        :return       None
+        """
+        if self._outstanding is not None:
+            func()
+            return
+
+        threading.Thread(target=func, name=name, daemon=True).start()
 
     def _attention_set_usage(self, cmd):
-        self._console_out.print_standard_message("Usage: attention {} <attention_s>".format(cmd))
+        self._usage("Usage: attention {} <attention_s>".format(cmd))
 
     def _attention(self, args):
         if not args:
-            self._console_out.print_standard_message("Draw attention on the devices in network.\nUsage: attention [get|set|setu] <args>")
+            self._usage("Draw attention on the devices in network.\n"
+                        "Usage: attention [get|set|setu|campaign] <args>")
+            return
+
+        if args[0] == "campaign":
+            self._attention_campaign(args[1:])
             return
 
         cmd = args[0]
         args = args[1:]
 
         try:
+            args, dst_addr = self._pop_dst_addr(args)
+
             if cmd == "get":
-                self._health_client.send_attention_get()
+                self._track(self._health_client.send_attention_get(dst_addr=dst_addr))
 
             elif cmd == "set":
                 if len(args) < 1:
                     self._attention_set_usage(cmd)
                     return
                 else:
-                    self._health_client.send_attention_set(args[0])
+                    self._track(self._health_client.send_attention_set(args[0], dst_addr=dst_addr))
 
             elif cmd == "setu":
                 if len(args) < 1:
                     self._attention_set_usage(cmd)
                     return
                 else:
-                    self._health_client.send_attention_set(args[0], unack=True)
+                    self._track(self._health_client.send_attention_set(args[0], unack=True,
+                                                                       dst_addr=dst_addr))
 
             else:
-                self._console_out.print_standard_message("Command {} not supported!".format(cmd))
+                self._usage("Command {} not supported!".format(cmd))
 
         except (OverflowError, ValueError):
-            self._console_out.print_error_message("Error: Invalid value!")
+            self._invalid_value()
+            return
+
+    def _attention_campaign_usage(self):
+        self._usage("Set attention on the nodes wave by wave, e.g. room by room.\n"
+                    "Usage: attention campaign <attention_s> <concurrency> "
+                    "0x<first_addr>[-0x<last_addr>][,...] [...]")
+
+    def _attention_campaign(self, args):
+        if len(args) < 3:
+            self._attention_campaign_usage()
             return
 
+        try:
+            self._require_dst_addr()
+            attention_s = int(args[0])
+
+            if not 0 <= attention_s <= 0xFF:
+                raise ValueError("Invalid attention time: {}".format(attention_s))
+
+            concurrency = int(args[1])
+            waves = [[addr for part in wave.split(",") for addr in parse_address_range(part)]
+                     for wave in args[2:]]
+            campaign = AttentionCampaign(self._health_client, concurrency)
+
+        except (OverflowError, ValueError):
+            self._invalid_value()
+            return
+
+        self._run_in_background("AttentionCampaign",
+                                lambda: self._run_attention_campaign(campaign, attention_s, waves))
+
+    def _run_attention_campaign(self, campaign, attention_s, waves):
+        start_time = time.monotonic()
+        results = campaign.run(attention_s, waves)
+        duration = time.monotonic() - start_time
+
+        for result in results:
+            if result.error is not None:
+                self._console_out.print_standard_message("0x{:04x}: {} after {} attempts".format(
+                    result.src_addr, result.error, result.attempts))
+
+                if self._outstanding is not None:
+                    self._no_reply_count += 1
+
+        confirmed = sum(1 for result in results if result.error is None)
+        self._console_out.print_standard_message(
+            "Attention campaign finished: {} nodes, {} confirmed, {} failed in {:.1f} s".format(
+                len(results), confirmed, len(results) - confirmed, duration))
+
     def _fault_get_usage(self, cmd):
-        self._console_out.print_standard_message("Usage: fault {} 0x<company_id>".format(cmd))
+        self._usage("Usage: fault {} 0x<company_id>".format(cmd))
 
     def _fault_clear_usage(self, cmd):
-        self._console_out.print_standard_message("Usage: fault {} 0x<company_id>".format(cmd))
+        self._usage("Usage: fault {} 0x<company_id>".format(cmd))
 
     def _fault_test_usage(self, cmd):
-        self._console_out.print_standard_message("Usage: fault {} 0x<company_id> <test_id>".format(cmd))
+        self._usage("Usage: fault {} 0x<company_id> <test_id>".format(cmd))
 
     def _fault(self, args):
         if not args:
-            self._console_out.print_standard_message("Clear, get registered faults or perform test.\nUsage: fault [get|clear|clearu|test|testu] <args>")
+            self._usage("Clear, get registered faults or perform test.\n"
+                        "Usage: fault [get|clear|clearu|test|testu] <args>")
             return
 
         cmd = args[0]
         args = args[1:]
 
         try:
+            args, dst_addr = self._pop_dst_addr(args)
+
             if cmd == "get":
                 if len(args) < 1:
                     self._fault_get_usage(cmd)
                     return
                 else:
-                    self._health_client.send_fault_get(args[0])
+                    self._track(self._health_client.send_fault_get(args[0], dst_addr=dst_addr),
+                                decode_fault_status)
 
             elif cmd == "clear":
                 if len(args) < 1:
                     self._fault_clear_usage(cmd)
                     return
                 else:
-                    self._health_client.send_fault_clear(args[0])
+                    self._track(self._health_client.send_fault_clear(args[0], dst_addr=dst_addr),
+                                decode_fault_status)
 
             elif cmd == "clearu":
                 if len(args) < 1:
                     self._fault_clear_usage(cmd)
                     return
                 else:
-                    self._health_client.send_fault_clear(args[0], unack=True)
+                    self._track(self._health_client.send_fault_clear(args[0], unack=True,
+                                                                     dst_addr=dst_addr),
+                                decode_fault_status)
 
             elif cmd == "test":
                 if len(args) < 2:
                     self._fault_test_usage(cmd)
                     return
                 else:
-                    self._health_client.send_fault_test(args[0], args[1])
+                    self._track(self._health_client.send_fault_test(args[0], args[1],
+                                                                    dst_addr=dst_addr),
+                                decode_fault_status)
 
             elif cmd == "testu":
                 if len(args) < 2:
                     self._fault_test_usage(cmd)
                     return
                 else:
-                    self._health_client.send_fault_test(args[0], args[1], unack=True)
+                    self._track(self._health_client.send_fault_test(args[0], args[1], unack=True,
+                                                                    dst_addr=dst_addr),
+                                decode_fault_status)
 
             else:
-                self._console_out.print_standard_message("Command {} not supported!".format(cmd))
+                self._usage("Command {} not supported!".format(cmd))
 
         except (OverflowError, ValueError):
-            self._console_out.print_error_message("Error: Invalid value!")
+            self._invalid_value()
             return
 
     def _period_set_usage(self, cmd):
-        self._console_out.print_standard_message("Usage: period {} <fast_period_divider>".format(cmd))
+        self._usage("Usage: period {} <fast_period_divider>".format(cmd))
 
     def _period(self, args):
         if not args:
-            self._console_out.print_standard_message("Set or get Fast Period Divisor.\nUsage: period [get|set|setu] <args>")
+            self._usage("Set or get Fast Period Divisor.\nUsage: period [get|set|setu] <args>")
             return
 
         cmd = args[0]
         args = args[1:]
 
         try:
+            args, dst_addr = self._pop_dst_addr(args)
+
             if cmd == "get":
-                self._health_client.send_period_get()
+                self._track(self._health_client.send_period_get(dst_addr=dst_addr))
 
             elif cmd == "set":
                 if len(args) < 1:
                     self._period_set_usage(cmd)
                     return
                 else:
-                    self._health_client.send_period_set(args[0])
+                    self._track(self._health_client.send_period_set(args[0], dst_addr=dst_addr))
 
             elif cmd == "setu":
                 if len(args) < 1:
                     self._period_set_usage(cmd)
                     return
                 else:
-                    self._health_client.send_period_set(args[0], unack=True)
+                    self._track(self._health_client.send_period_set(args[0], unack=True,
+                                                                    dst_addr=dst_addr))
                     
             else:
-                self._console_out.print_standard_message("Command {} not supported!".format(cmd))
+                self._usage("Command {} not supported!".format(cmd))
         
         except (OverflowError, ValueError):
-            self._console_out.print_error_message("Error: Invalid value!")
+            self._invalid_value()
             return
 
+    def _sweep_usage(self):
+        self._usage("Get faults from every node in the address range.\n"
+                    "Usage: sweep 0x<company_id> 0x<first_addr>[-0x<last_addr>] "
+                    "[<concurrency>] [<rate_per_s>] [<retries>]")
+
+    def _sweep(self, args):
+        if len(args) < 2:
+            self._sweep_usage()
+            return
+
+        try:
+            self._require_dst_addr()
+            company_id = args[0]
+
+            if not 0 <= int(company_id, 16) <= 0xFFFF:
+                raise ValueError("Invalid company id: {}".format(company_id))
+
+            addresses = parse_address_range(args[1])
+            concurrency = int(args[2]) if len(args) > 2 else 8
+            rate = float(args[3]) if len(args) > 3 else None
+            retries = int(args[4]) if len(args) > 4 else None
+            sweep = FaultSweep(self._health_client, concurrency, rate, retries)
+
+        except (OverflowError, ValueError):
+            self._invalid_value()
+            return
+
+        self._run_in_background("FaultSweep", lambda: self._run_sweep(sweep, company_id, addresses))
+
+    def _run_sweep(self, sweep, company_id, addresses):
+        start_time = time.monotonic()
+        results = sweep.run(company_id, addresses)
+        duration = time.monotonic() - start_time
+
+        for result in results:
+            if self._outstanding is not None:
+                if result.error is None:
+                    self._record_faults(result.src_addr, result.faults)
+                else:
+                    self._no_reply_count += 1
+
+            if result.error is None:
+                self._console_out.print_standard_message(
+                    "0x{:04x}: company_id: 0x{:04x}, test_id: {}, faults: [{}], latency: {:.0f} ms, "
+                    "timeouts: {}"
+                    .format(result.src_addr, result.company_id, result.test_id,
+                            ", ".join(FAULT_NAMES[fault] for fault in result.faults),
+                            result.latency * 1000, result.timeouts))
+            else:
+                self._console_out.print_standard_message("0x{:04x}: {}".format(result.src_addr,
+                                                                                result.error))
+
+        responded = sum(1 for result in results if result.error is None)
+        self._console_out.print_standard_message(
+            "Sweep finished: {} nodes, {} responded, {} failed in {:.1f} s".format(
+                len(results), responded, len(results) - responded, duration))
+
+    def _stats(self, args):
+        if self._metrics is None:
+            self._console_out.print_standard_message("Statistics are not collected.")
+            return
+
+        for line in self._metrics.summary_lines():
+            self._console_out.print_standard_message(line)
+
     def process_line(self, line):
         """ Process single line
 
         :param  line: str, line with command and arguments.
-        :return       None
+        :return       bool, False if command is not supported
         """
+        line = re.sub('\s+', " ", line).strip()
+
         if not line:
-            return
+            return True
 
-        line = re.sub('\s+', " ", line).strip()
         args = line.split()
 
         cmd = args[0]
@@ -198,9 +497,10 @@ class HealthClientCli(object):
             func = self._cmds[cmd]
         except KeyError as err:
             self._console_out.print_standard_message("Command {} not supported!".format(err))
-            return
+            return False
 
         func(args)
+        return True
 
     def run(self):
         """ Run main loop.
@@ -209,3 +509,52 @@ class HealthClientCli(object):
         """
         while True:
             self.process_line(input(self._prompt))
+
+    def run_script(self, lines):
+        """ Run commands read from a script without waiting for the replies in between.
+
+        Requests are sent one after another, 'wait' blocks until the replies to the requests
+        sent so far are received or timed out and 'expect' ends the script if they are not as
+        expected. Unsupported commands and usage errors end the script with EXIT_SCRIPT_ERROR.
+
+        :param  lines: Iterable[str], script lines, text after '#' is a comment
+        :return        int, EXIT_FAULTS if any node reported faults, EXIT_NO_REPLY if any request
+                       has not been replied, EXIT_SCRIPT_ERROR on invalid command, EXIT_OK otherwise
+        """
+        self._outstanding = []
+        self._faulty_nodes = set()
+        self._no_reply_count = 0
+
+        try:
+            for line_no, line in enumerate(lines, 1):
+                if not self.process_line(line.split("#", 1)[0]):
+                    raise _ScriptAborted(EXIT_SCRIPT_ERROR)
+
+            self._collect_replies()
+
+        except SystemExit:
+            self._collect_replies()
+
+        except _ScriptAborted as err:
+            if err.exit_code == EXIT_SCRIPT_ERROR:
+                self._console_out.print_error_message(
+                    "Script error in line {}: {}".format(line_no, line.strip()))
+
+            return err.exit_code
+
+        finally:
+            self._outstanding = None
+
+        self._console_out.print_standard_message(
+            "Script finished: faults reported by {} node(s), {} request(s) without reply".format(
+                len(self._faulty_nodes), self._no_reply_count))
+
+        if self._faulty_nodes:
+            self._console_out.print_standard_message("Nodes with faults: {}".format(
+                self._format_faulty_nodes()))
+            return EXIT_FAULTS
+
+        if self._no_reply_count:
+            return EXIT_NO_REPLY
+
+        return EXIT_OK
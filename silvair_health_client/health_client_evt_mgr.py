@@ -1,6 +1,11 @@
+import threading
+
 from silvair_otau_demo.console_out import ConsoleOut
 from silvair_otau_demo.event_mgr import EventMgr
 
+from silvair_health_client.health_capture import CaptureWriter
+from silvair_health_client.health_client_gateway import StatusDeduplicator
+from silvair_health_client.health_requests import HealthRequestTracker
 from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher
 
 
@@ -9,17 +14,73 @@ class HealtClientEventMgr(EventMgr):
     def __init__(self,
                  console_out: ConsoleOut,
                  mid_to_ii_mapper: ModelIdToInstanceIndexMapper,
-                 opcodes_disp: HealthClientOpcodesDispatcher):
+                 opcodes_disp: HealthClientOpcodesDispatcher,
+                 request_tracker: HealthRequestTracker = None,
+                 capture_writer: CaptureWriter = None,
+                 deduplicator: StatusDeduplicator = None):
         super(HealtClientEventMgr, self).__init__(console_out)
         self._mid_to_ii_mapper = mid_to_ii_mapper
         self._opcodes_disp = opcodes_disp
+        self._request_tracker = request_tracker
+        self._capture_writer = capture_writer
+        self._deduplicator = deduplicator
+        self._models_registered = threading.Condition()
+        self._models_registered_callbacks = []
+
+    def add_models_registered_callback(self, callback):
+        """ Register function called on the UART thread with model ids every time models are registered.
+
+        :param callback: Callable[[list], None], Callback.
+        :return:         None
+        """
+        self._models_registered_callbacks.append(callback)
+
+    def wait_for_model(self, model_id: int, timeout: float = None) -> bool:
+        """ Wait until the model is registered by the UART Modem.
+
+        :param model_id: int,   Model Id.
+        :param timeout:  float, Timeout in seconds, wait forever if None.
+        :return:         bool, False if model has not been registered within timeout
+        """
+        with self._models_registered:
+            return self._models_registered.wait_for(lambda: self._mid_to_ii_mapper.contains_model_id(model_id),
+                                                    timeout)
 
     def uart_registered_models(self, model_ids: list):
-        self._mid_to_ii_mapper.map_models_ids(model_ids)
+        with self._models_registered:
+            self._mid_to_ii_mapper.map_models_ids(model_ids)
+            self._models_registered.notify_all()
+
         super().uart_registered_models(model_ids)
 
-    def uart_mesh_request(self, opcode: int, command: bytes):
-        if self._opcodes_disp.dispatch(opcode, command):
+        for callback in self._models_registered_callbacks:
+            callback(model_ids)
+
+    def uart_mesh_request(self, opcode: int, command: bytes, timestamp: float = None):
+        """ Handle message received from the UART Modem.
+
+        :param opcode:    int,   Message opcode.
+        :param command:   bytes, Message payload.
+        :param timestamp: float, Reception time of a replayed message, handlers take it from their clocks if None.
+        :return:          None
+        """
+        if self._capture_writer is not None:
+            self._capture_writer.record_inbound(opcode, command)
+
+        # The same status received through another modem has been handled already
+        if self._deduplicator is not None and self._deduplicator.is_duplicate(opcode, command, self):
+            return
+
+        # Late statuses of retried requests have been handled already
+        if self._request_tracker is not None and not self._request_tracker.accept_status(opcode, command):
+            return
+
+        if timestamp is None:
+            dispatched = self._opcodes_disp.dispatch(opcode, command)
+        else:
+            dispatched = self._opcodes_disp.dispatch(opcode, command, timestamp)
+
+        if dispatched:
             return
         
         super().uart_mesh_request(opcode, command)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import collections
+import threading
+import time
+
+from silvair_health_client.health_client_sweep import parse_address_range
+from silvair_health_client.utils import is_unicast_address
+
+
+def parse_port_route(text):
+    """ Parse serial port with optional address range served by its modem e.g. '/dev/ttyUSB0@0x0001-0x0fff'.
+
+    :param text: str, Port and address range separated by '@'.
+    :return:     tuple(str, range), port and address range or None
+    """
+    port, _, addresses = text.partition("@")
+
+    if not port:
+        raise ValueError("Missing port: {}".format(text))
+
+    return port, parse_address_range(addresses) if addresses else None
+
+
+class StatusDeduplicator:
+    """ Recognizes a status received through many modems, all of them hear the same publications.
+
+    A status is identified by its opcode and payload, which ends with the source address,
+    so an identical status received through another modem within the window is a copy of
+    the same message. An identical status received again through the same modem is a new
+    message, e.g. a reply to a repeated request.
+    """
+
+    def __init__(self, window=1.0, clock=time.monotonic):
+        """ Initialize deduplicator
+
+        :param window: float,    Time in seconds an identical status is a duplicate within.
+        :param clock:  Callable, Monotonic time source.
+        :return:       None
+        """
+        self._window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Status to its expiry and the modems which have delivered its last message
+        self._entries = {}
+        self._received = collections.deque()
+        self.duplicates = 0
+
+    def is_duplicate(self, opcode, command, modem):
+        """ Register received status.
+
+        :param opcode:  int,    Status opcode.
+        :param command: bytes,  Status message payload.
+        :param modem:   object, Identity of the modem which has received the status, e.g. its event manager.
+        :return:        bool, True if identical status has been received through another modem within the window
+        """
+        key = opcode, bytes(command)
+        now = self._clock()
+
+        with self._lock:
+            while self._received and self._received[0][0] <= now:
+                expiry, expired_key = self._received.popleft()
+                entry = self._entries.get(expired_key)
+
+                if entry is not None and entry[0] == expiry:
+                    del self._entries[expired_key]
+
+            entry = self._entries.get(key)
+
+            if entry is not None and modem not in entry[1]:
+                entry[1].add(modem)
+                self.duplicates += 1
+                return True
+
+            expiry = now + self._window
+            self._entries[key] = [expiry, {modem}]
+            self._received.append((expiry, key))
+
+        return False
+
+
+class HealthClientGateway:
+    """ Health Clients of many UART Modems attached to one host.
+
+    A request to a unicast destination is sent by the modem serving its address range,
+    destinations out of the ranges are spread over the modems without a range.
+    Requests to group or publication address are sent by a single modem, the first one
+    without a range, since they are answered by many nodes anyway. Modems share the
+    request tracker and the status dispatcher, so their statuses form one stream, which
+    should be deduplicated with a StatusDeduplicator shared by their event managers.
+    """
+
+    def __init__(self, clients, address_ranges=None):
+        """ Initialize gateway
+
+        :param clients:        Iterable[HealthClient], Health Client (or lanes) of every modem.
+        :param address_ranges: Iterable[range],        Unicast addresses served by each modem, None for any.
+        :return:               None
+        """
+        self._clients = tuple(clients)
+
+        if not self._clients:
+            raise ValueError("At least one Health Client is required")
+
+        address_ranges = tuple(address_ranges) if address_ranges is not None else (None,) * len(self._clients)
+        self._address_ranges = address_ranges
+
+        if len(address_ranges) != len(self._clients):
+            raise ValueError("Every Health Client requires an address range or None")
+
+        self._routes = tuple((address_range, client) for address_range, client in zip(address_ranges, self._clients)
+                             if address_range is not None)
+        self._default_clients = tuple(client for address_range, client in zip(address_ranges, self._clients)
+                                      if address_range is None)
+        self._publication_client = (self._default_clients or self._clients)[0]
+
+    def __len__(self):
+        return len(self._clients)
+
+    @property
+    def supports_dst_addr(self):
+        return all(client.supports_dst_addr for client in self._clients)
+
+    def with_retry_budget(self, retry_budget):
+        """ Get gateway sending requests which share the retry budget, e.g. requests of a sweep.
+
+        :param retry_budget: RetryBudget, Retries shared by the requests.
+        :return:             HealthClientGateway
+        """
+        return HealthClientGateway([client.with_retry_budget(retry_budget) for client in self._clients],
+                                   self._address_ranges)
+
+    def client(self, dst_addr):
+        """ Get Health Client of the modem serving unicast destination.
+
+        :param dst_addr: int, Unicast destination address.
+        :return:         HealthClient
+        """
+        for address_range, client in self._routes:
+            if dst_addr in address_range:
+                return client
+
+        if not self._default_clients:
+            raise ValueError("No modem serves address 0x{:04x}".format(dst_addr))
+
+        return self._default_clients[dst_addr % len(self._default_clients)]
+
+    def _send(self, send, dst_addr):
+        if dst_addr is not None and is_unicast_address(dst_addr):
+            return send(self.client(dst_addr))
+
+        return send(self._publication_client)
+
+    def send_attention_get(self, dst_addr=None):
+        return self._send(lambda client: client.send_attention_get(dst_addr=dst_addr), dst_addr)
+
+    def send_attention_set(self, attention_s, unack=False, dst_addr=None):
+        return self._send(lambda client: client.send_attention_set(attention_s, unack, dst_addr), dst_addr)
+
+    def send_fault_clear(self, company_id, unack=False, dst_addr=None):
+        return self._send(lambda client: client.send_fault_clear(company_id, unack, dst_addr), dst_addr)
+
+    def send_fault_get(self, company_id, dst_addr=None):
+        return self._send(lambda client: client.send_fault_get(company_id, dst_addr), dst_addr)
+
+    def send_fault_test(self, company_id, test_id, unack=False, dst_addr=None):
+        return self._send(lambda client: client.send_fault_test(company_id, test_id, unack, dst_addr), dst_addr)
+
+    def send_period_get(self, dst_addr=None):
+        return self._send(lambda client: client.send_period_get(dst_addr=dst_addr), dst_addr)
+
+    def send_period_set(self, fast_period_dividor, unack=False, dst_addr=None):
+        return self._send(lambda client: client.send_period_set(fast_period_dividor, unack, dst_addr), dst_addr)
@@ -0,0 +1,260 @@
+import bisect
+import http.server
+import socketserver
+import threading
+
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_status import status_src_addr
+
+
+LATENCY_BUCKETS_S = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HANDLER_BUCKETS_S = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+
+def _opcode_label(opcode):
+    try:
+        return HealthClientOpcodes(opcode).name
+    except ValueError:
+        return "0x{:04x}".format(opcode)
+
+
+def _format_labels(label_names, label_values):
+    if not label_names:
+        return ""
+
+    return "{" + ",".join('{}="{}"'.format(name, value) for name, value in zip(label_names, label_values)) + "}"
+
+
+class MetricCounter:
+    """ Monotonic counter with labels """
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self._help_text = help_text
+        self._label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def __len__(self):
+        with self._lock:
+            return len(self._values)
+
+    def get(self, *label_values):
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def total(self):
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+
+        lines = ["# HELP {} {}".format(self.name, self._help_text), "# TYPE {} counter".format(self.name)]
+        lines += ["{}{} {}".format(self.name, _format_labels(self._label_names, labels), value)
+                  for labels, value in values]
+
+        return lines
+
+
+class MetricHistogram:
+    """ Histogram with fixed buckets and labels """
+
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self._help_text = help_text
+        self._buckets = tuple(buckets)
+        self._label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+
+            if series is None:
+                series = self._values[label_values] = [[0] * (len(self._buckets) + 1), 0.0, 0]
+
+            series[0][bisect.bisect_left(self._buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def mean(self, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+            return series[1] / series[2] if series else None
+
+    def count(self):
+        with self._lock:
+            return sum(series[2] for series in self._values.values())
+
+    def render(self):
+        with self._lock:
+            values = sorted((labels, (list(series[0]), series[1], series[2])) for labels, series in self._values.items())
+
+        lines = ["# HELP {} {}".format(self.name, self._help_text), "# TYPE {} histogram".format(self.name)]
+
+        for labels, (bucket_counts, total, count) in values:
+            cumulative = 0
+
+            for bound, bucket_count in zip(self._buckets + ("+Inf",), bucket_counts):
+                cumulative += bucket_count
+                lines.append("{}_bucket{} {}".format(self.name, _format_labels(self._label_names + ("le",),
+                                                                                labels + (bound,)), cumulative))
+
+            lines.append("{}_sum{} {}".format(self.name, _format_labels(self._label_names, labels), total))
+            lines.append("{}_count{} {}".format(self.name, _format_labels(self._label_names, labels), count))
+
+        return lines
+
+
+class HealthClientMetrics:
+    """ Health Client counters and histograms """
+
+    def __init__(self):
+        self.messages_sent = MetricCounter("health_messages_sent_total", "Messages sent per opcode.", ("opcode",))
+        self.statuses_received = MetricCounter("health_statuses_received_total", "Statuses received per opcode.",
+                                               ("opcode",))
+        self.statuses_by_source = MetricCounter("health_statuses_by_source_total", "Statuses received per source.",
+                                                ("src_addr",))
+        self.unknown_opcodes = MetricCounter("health_unknown_opcodes_total", "Messages without handler per opcode.",
+                                             ("opcode",))
+        self.unmatched_statuses = MetricCounter("health_unmatched_statuses_total",
+                                                "Statuses not matched with a pending request.", ("opcode",))
+        self.request_timeouts = MetricCounter("health_request_timeouts_total", "Requests without status in time.",
+                                              ("opcode",))
+        self.request_retries = MetricCounter("health_request_retries_total", "Requests sent again without status.",
+                                             ("opcode",))
+        self.decode_errors = MetricCounter("health_decode_errors_total", "Statuses which handler failed.",
+                                           ("opcode",))
+        self.dropped_statuses = MetricCounter("health_dropped_statuses_total",
+                                              "Statuses dropped because handler queue was full.", ("opcode",))
+        self.request_latency = MetricHistogram("health_request_latency_seconds", "Request to status latency.",
+                                               LATENCY_BUCKETS_S, ("opcode",))
+        self.handler_time = MetricHistogram("health_handler_seconds", "Status handler execution time.",
+                                            HANDLER_BUCKETS_S, ("opcode",))
+
+        self._metrics = (self.messages_sent, self.statuses_received, self.statuses_by_source, self.unknown_opcodes,
+                         self.unmatched_statuses, self.request_timeouts, self.request_retries, self.decode_errors,
+                         self.dropped_statuses, self.request_latency, self.handler_time)
+
+    def on_message_sent(self, opcode):
+        self.messages_sent.inc(_opcode_label(opcode))
+
+    def on_status_handled(self, opcode, command, handler_s):
+        label = _opcode_label(opcode)
+        self.statuses_received.inc(label)
+        self.handler_time.observe(handler_s, label)
+
+        src_addr = status_src_addr(opcode, command)
+        if src_addr is not None:
+            self.statuses_by_source.inc("0x{:04x}".format(src_addr))
+
+    def on_unknown_opcode(self, opcode):
+        self.unknown_opcodes.inc(_opcode_label(opcode))
+
+    def on_decode_error(self, opcode):
+        self.decode_errors.inc(_opcode_label(opcode))
+
+    def on_status_dropped(self, opcode):
+        self.dropped_statuses.inc(_opcode_label(opcode))
+
+    def on_request_completed(self, opcode, latency_s):
+        self.request_latency.observe(latency_s, _opcode_label(opcode))
+
+    def on_request_timeout(self, opcode):
+        self.request_timeouts.inc(_opcode_label(opcode))
+
+    def on_request_retried(self, opcode):
+        self.request_retries.inc(_opcode_label(opcode))
+
+    def on_unmatched_status(self, opcode):
+        self.unmatched_statuses.inc(_opcode_label(opcode))
+
+    def render(self):
+        """ Render metrics in Prometheus text exposition format.
+
+        :return: str
+        """
+        lines = []
+
+        for metric in self._metrics:
+            lines += metric.render()
+
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        """ Short human readable summary.
+
+        :return: list[str]
+        """
+        return [
+            "messages sent: {}".format(self.messages_sent.total()),
+            "statuses received: {} from {} node(s)".format(self.statuses_received.total(),
+                                                          len(self.statuses_by_source)),
+            "requests completed: {}, retried: {}, timed out: {}, unmatched statuses: {}".format(
+                self.request_latency.count(), self.request_retries.total(), self.request_timeouts.total(),
+                self.unmatched_statuses.total()),
+            "unknown opcodes: {}, decode errors: {}, dropped statuses: {}".format(
+                self.unknown_opcodes.total(), self.decode_errors.total(), self.dropped_statuses.total()),
+            "mean latency: {}".format(", ".join(
+                "{}: {:.0f} ms".format(opcode.name, self.request_latency.mean(opcode.name) * 1000)
+                for opcode in HealthClientOpcodes if self.request_latency.mean(opcode.name) is not None) or "-")
+        ]
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class MetricsHttpServer:
+    """ HTTP server exposing metrics for Prometheus on /metrics """
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        """ Initialize server
+
+        :param metrics: HealthClientMetrics, Exposed metrics.
+        :param port:    int,                 TCP port, 0 to pick a free one.
+        :param host:    str,                 Listening address, localhost by default.
+        :return:        None
+        """
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsHttpServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,170 @@
+import collections
+import sys
+import threading
+
+
+class StreamConsoleOut:
+    """ Console output writing plain standard messages to one stream and the other messages to another one.
+
+    It has the ConsoleOut interface. With --format jsonl statuses are written to stdout
+    and everything else to stderr, so stdout carries JSON lines only.
+    """
+
+    def __init__(self, out=None, err=None):
+        """ Initialize stream console output
+
+        :param out: TextIO, Stream of standard messages, stdout if None.
+        :param err: TextIO, Stream of informative and error messages, stderr if None.
+        :return:    None
+        """
+        self._out = sys.stdout if out is None else out
+        self._err = sys.stderr if err is None else err
+
+    def print_standard_message(self, msg):
+        self._write(self._out, msg)
+
+    def print_informative_message(self, msg):
+        self._write(self._err, msg)
+
+    def print_error_message(self, msg):
+        self._write(self._err, msg)
+
+    @staticmethod
+    def _write(stream, msg):
+        stream.write(msg + "\n")
+        stream.flush()
+
+
+class BatchedConsoleOut:
+    """ Console output writing queued messages in batches on a background thread.
+
+    It has the ConsoleOut interface, so it may be used in its place by code running
+    on the UART receive thread, which then never waits for the terminal. When the
+    queue is full the oldest messages are dropped and their number is reported.
+    """
+
+    _STANDARD = 0
+    _INFORMATIVE = 1
+    _ERROR = 2
+
+    def __init__(self, console_out, max_queued=10000, batch_size=100, flush_interval=0.1):
+        """ Initialize batched console output
+
+        :param console_out:    ConsoleOut, Console output messages are written to.
+        :param max_queued:     int,        Maximum number of queued messages.
+        :param batch_size:     int,        Number of queued messages which triggers writing.
+        :param flush_interval: float,      Maximum time in seconds a message waits in the queue.
+        :return:               None
+        """
+        self._console_out = console_out
+        self._queue = collections.deque(maxlen=max_queued)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._dropped = 0
+        self._dropped_total = 0
+        self._running = False
+        self._thread = None
+
+    @property
+    def dropped_total(self):
+        with self._cond:
+            return self._dropped_total
+
+    def print_standard_message(self, msg):
+        self._put(self._STANDARD, msg)
+
+    def print_informative_message(self, msg):
+        self._put(self._INFORMATIVE, msg)
+
+    def print_error_message(self, msg):
+        self._put(self._ERROR, msg)
+
+    def start(self):
+        """ Start writer thread.
+
+        :return: None
+        """
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+
+        self._thread = threading.Thread(target=self._write_loop, name="BatchedConsoleOut", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop writer thread after queued messages are written.
+
+        :return: None
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self):
+        """ Write queued messages on the calling thread.
+
+        :return: None
+        """
+        self._write(*self._take())
+
+    def _put(self, kind, msg):
+        with self._cond:
+            if len(self._queue) == self._queue.maxlen:
+                self._dropped += 1
+                self._dropped_total += 1
+
+            self._queue.append((kind, msg))
+
+            if len(self._queue) >= self._batch_size:
+                self._cond.notify()
+
+    def _take(self):
+        with self._cond:
+            batch = list(self._queue)
+            self._queue.clear()
+            dropped, self._dropped = self._dropped, 0
+
+        return batch, dropped
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                if self._running and len(self._queue) < self._batch_size:
+                    self._cond.wait(self._flush_interval)
+
+                running = self._running
+
+            self.flush()
+
+            if not running:
+                return
+
+    def _write(self, batch, dropped):
+        if dropped:
+            self._console_out.print_error_message("Output too slow, {} message(s) dropped".format(dropped))
+
+        lines = []
+
+        for kind, msg in batch:
+            if kind == self._STANDARD:
+                lines.append(msg)
+                continue
+
+            if lines:
+                self._console_out.print_standard_message("\n".join(lines))
+                lines = []
+
+            if kind == self._INFORMATIVE:
+                self._console_out.print_informative_message(msg)
+            else:
+                self._console_out.print_error_message(msg)
+
+        if lines:
+            self._console_out.print_standard_message("\n".join(lines))
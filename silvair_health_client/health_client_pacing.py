@@ -0,0 +1,262 @@
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+# Sending any other request twice has the same effect as sending it once
+_NOT_COALESCED_OPCODES = frozenset([HealthClientOpcodes.FAULT_TEST, HealthClientOpcodes.FAULT_TEST_UNACKNOWLEDGED])
+
+_priority = threading.local()
+
+
+class SenderQueueFull(Exception):
+    """ Message cannot be queued without waiting for room in the queue """
+
+
+@contextlib.contextmanager
+def send_priority(priority):
+    """ Queue messages sent by the calling thread within the block with the priority.
+
+    :param priority: int, PRIORITY_INTERACTIVE or PRIORITY_BULK.
+    :return:         context manager
+    """
+    previous = current_send_priority()
+    _priority.value = priority
+
+    try:
+        yield
+    finally:
+        _priority.value = previous
+
+
+def current_send_priority():
+    return getattr(_priority, "value", PRIORITY_INTERACTIVE)
+
+
+class PacedSender:
+    """ Outbound queue sending messages through the Sender at a rate the modem and the mesh can carry.
+
+    It has the Sender interface. Messages are sent by a background thread paced by a token
+    bucket, interactive ones ahead of bulk ones (see send_priority). A message identical to
+    one still waiting in the queue is not queued again, send_message returns False then,
+    and the queued one is sent with the higher priority of the two.
+    The on_sent callback of a message is called when it leaves the queue, so that requests
+    start waiting for their statuses only once they are sent.
+    """
+
+    reports_sent = True
+
+    def __init__(self, sender, rate=20.0, burst=5, max_queued=1000, clock=time.monotonic, error_handler=None,
+                 metrics=None):
+        """ Initialize paced sender
+
+        :param sender:        Sender,                           Uart Sender.
+        :param rate:          float,                            Messages sent per second on average.
+        :param burst:         int,                              Messages which may be sent at once after idle time.
+        :param max_queued:    int,                              Queue length above which send_message blocks.
+        :param clock:         Callable,                         Monotonic time source.
+        :param error_handler: Callable[[msg, Exception], None], Called when Sender fails to send message.
+        :param metrics:       HealthClientMetrics,              Metrics messages are counted in when they are sent.
+        :return:              None
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rate and burst must be positive")
+
+        self._sender = sender
+        self._rate = rate
+        self._burst = burst
+        self._max_queued = max_queued
+        self._clock = clock
+        self._error_handler = error_handler
+        self._metrics = metrics
+        self._cond = threading.Condition()
+        self._queue = []
+        # Key of every queued message to its queue entry [priority, seq, key, msg, on_sent callbacks]
+        self._queued_keys = {}
+        self._seq = itertools.count()
+        self._tokens = float(burst)
+        self._refilled_at = clock()
+        self._running = False
+        self._thread = None
+
+        self.sent_messages = 0
+        self.coalesced_messages = 0
+
+    @property
+    def supports_dst_addr(self):
+        return getattr(self._sender, "supports_dst_addr", False)
+
+    @property
+    def queued_count(self):
+        with self._cond:
+            return len(self._queue)
+
+    def send_message(self, msg, on_sent=None):
+        """ Queue message, waiting for room in the queue when it is full.
+
+        :param msg:     MeshMessageRequestMessage, Message to be sent.
+        :param on_sent: Callable[[], None],        Called on the sending thread right before message is sent.
+        :return:        bool, False if message has been merged with an identical queued one
+        """
+        return self._put(msg, on_sent, True)
+
+    def try_send_message(self, msg, on_sent=None):
+        """ Queue message without waiting, e.g. from a thread which must not be blocked.
+
+        :param msg:     MeshMessageRequestMessage, Message to be sent.
+        :param on_sent: Callable[[], None],        Called on the sending thread right before message is sent.
+        :return:        bool, False if message has been merged with an identical queued one
+        :raises:        SenderQueueFull, when the queue is full
+        """
+        return self._put(msg, on_sent, False)
+
+    def _put(self, msg, on_sent, block):
+        key = self._key(msg)
+        priority = current_send_priority()
+        callbacks = [] if on_sent is None else [on_sent]
+
+        with self._cond:
+            if key is not None and key in self._queued_keys:
+                # Message is sent once, callbacks of both are called then
+                entry = self._queued_keys[key]
+                entry[-1].extend(callbacks)
+                self.coalesced_messages += 1
+
+                # Interactive request merged with a bulk one is not sent behind the other bulk ones
+                if priority < entry[0]:
+                    entry[0] = priority
+                    heapq.heapify(self._queue)
+
+                return False
+
+            while len(self._queue) >= self._max_queued and self._running:
+                if not block:
+                    raise SenderQueueFull("{} messages are queued already".format(len(self._queue)))
+
+                self._cond.wait()
+
+            entry = [priority, next(self._seq), key, msg, callbacks]
+            heapq.heappush(self._queue, entry)
+
+            if key is not None:
+                self._queued_keys[key] = entry
+
+            self._cond.notify_all()
+
+        return True
+
+    def send_pending(self, now=None):
+        """ Send queued messages the token bucket allows on the calling thread.
+
+        :param now: float, Current time, clock is used if None.
+        :return:    float, seconds until next message may be sent, None if queue is empty
+        """
+        while True:
+            with self._cond:
+                if not self._queue:
+                    return None
+
+                wait_s = self._take_token(self._clock() if now is None else now)
+
+                if wait_s > 0:
+                    return wait_s
+
+                _, _, key, msg, callbacks = heapq.heappop(self._queue)
+                self._queued_keys.pop(key, None)
+                self.sent_messages += 1
+                self._cond.notify_all()
+
+            self._notify_sent(callbacks)
+
+            if self._metrics is not None:
+                self._metrics.on_message_sent(msg.mesh_opcode)
+
+            try:
+                self._sender.send_message(msg)
+
+            except Exception as err:
+                if self._error_handler is None:
+                    raise
+
+                self._error_handler(msg, err)
+
+    def start(self):
+        """ Start sending thread.
+
+        :return: None
+        """
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+
+        self._thread = threading.Thread(target=self._send_loop, name="PacedSender", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop sending thread, queued messages are not sent.
+
+        Their on_sent callbacks are called nevertheless, so that requests waiting for them time out.
+
+        :return: None
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._cond:
+            dropped, self._queue = self._queue, []
+            self._queued_keys.clear()
+            self._cond.notify_all()
+
+        for entry in dropped:
+            self._notify_sent(entry[-1])
+
+    def _send_loop(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+
+                if not self._queue:
+                    self._cond.wait()
+                    continue
+
+            wait_s = self.send_pending()
+
+            if wait_s is not None:
+                with self._cond:
+                    self._cond.wait(wait_s)
+
+    def _notify_sent(self, callbacks):
+        for callback in callbacks:
+            callback()
+
+    def _take_token(self, now):
+        self._tokens = min(self._burst, self._tokens + max(now - self._refilled_at, 0.0) * self._rate)
+        self._refilled_at = now
+
+        if self._tokens < 1.0:
+            return (1.0 - self._tokens) / self._rate
+
+        self._tokens -= 1.0
+        return 0.0
+
+    @staticmethod
+    def _key(msg):
+        if msg.mesh_opcode in _NOT_COALESCED_OPCODES:
+            return None
+
+        return msg.instance_index, msg.mesh_opcode, getattr(msg, "dst_addr", None), bytes(msg.mesh_command)
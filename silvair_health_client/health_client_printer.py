@@ -1,70 +1,15 @@
-import io
-import enum
+import functools
+import json
+import time
 
 from silvair_otau_demo.console_out import ConsoleOut
 
-
-class HealthFaults(enum.IntEnum):
-  NO_FAULT                  = 0x00
-  BATTERY_LOW_WARN          = 0x01
-  BATTERY_LOW_ERR           = 0x02
-  SUPPLY_VOLTAGE_LOW_WARN   = 0x03
-  SUPPLY_VOLTAGE_LOW_ERR    = 0x04
-  SUPPLY_VOLTAGE_HIGH_WARN  = 0x05
-  SUPPLY_VOLTAGE_HIGH_ERR   = 0x06
-  POWER_INTERRUPTED_WARN    = 0x07
-  POWER_INTERRUPTED_ERR     = 0x08
-  NO_LOAD_WARN              = 0x09
-  NO_LOAD_ERR               = 0x0A
-  OVERLOAD_WARN             = 0x0B
-  OVERLOAD_ERR              = 0x0C
-  OVERHEAT_WARN             = 0x0D
-  OVERHEAT_ERR              = 0x0E
-  CONDENSATION_WARN         = 0x0F
-  CONDENSATION_ERR          = 0x10
-  VIBRATION_WARN            = 0x11
-  VIBRATION_ERR             = 0x12
-  CONFIGUTATION_WARN        = 0x13
-  CONFIGUTATION_ERR         = 0x14
-  ELEMENT_NOT_CAL_WARN      = 0x15
-  ELEMENT_NOT_CAL_ERR       = 0x16
-  MEMORY_WARN               = 0x17
-  MEMORY_ERR                = 0x18
-  SELF_TEST_WARN            = 0x19
-  SELF_TEST_ERR             = 0x1A
-  INPUT_TOO_LOW_WARN        = 0x1B
-  INPUT_TOO_LOW_ERR         = 0x1C
-  INPUT_TOO_HIGH_WARN       = 0x1D
-  INPUT_TOO_HIGH_ERR        = 0x1E
-  INPUT_NO_CHANGE_WARN      = 0x1F
-  INPUT_NO_CHANGE_ERR       = 0x20
-  ACTUATOR_BLOCKED_WARN     = 0x21
-  ACTUATOR_BLOCKED_ERR      = 0x22
-  HOUSING_OPENED_WARN       = 0x23
-  HOUSING_OPENED_ERR        = 0x24
-  TAMPER_WARN               = 0x25
-  TAMPER_ERR                = 0x26
-  DEVICE_MOVED_WARN         = 0x27
-  DEVICE_MOVED_ERR          = 0x28
-  DEVICE_DROPPED_WARN       = 0x29
-  DEVICE_DROPPED_ERR        = 0x2A
-  OVERFLOW_WARN             = 0x2B
-  OVERFLOW_ERR              = 0x2C
-  EMPTY_WARN                = 0x2D
-  EMPTY_ERR                 = 0x2E
-  INTERNAL_BUS_WARN         = 0x2F
-  INTERNAL_BUS_ERR          = 0x30
-  MECHANISM_JAMMED_WARN     = 0x31
-  MECHANISM_JAMMED_ERR      = 0x32
-  RFU_START                 = 0x33
-  RFU_END                   = 0x7F
-  VENDOR_SPECIFIC_START     = 0x80
-  DALI_CONTROL_GEAR_FAILURE = 0x81
-  DALI_LIGHT_SOURCE_FAILURE = 0x82
-  DALI_LIMIT_ERROR          = 0x83
-  DALI_NO_RESPONSE_WARNING  = 0x84
-  DALI_NO_RESPONSE_ERROR    = 0x85
-  VENDOR_SPECIFIC_END       = 0xFF
+# HealthFaults is imported for modules which used to import it from here
+from silvair_health_client.health_faults import HealthFaults, FAULT_NAMES
+from silvair_health_client.health_liveness import LivenessTracker
+from silvair_health_client.health_state_store import FaultStateStore
+from silvair_health_client.health_status import decode_attention_status, decode_period_status, \
+    decode_fault_status, decode_current_status, AttentionStatus, PeriodStatus, FaultStatus, CurrentStatus
 
 
 class HealthClientStatusPrinter:
@@ -77,55 +22,175 @@ class HealthClientStatusPrinter:
         :return              None
         """
         self._console_out = console_out
+        self._record_printers = {
+            AttentionStatus: self._print_attention,
+            PeriodStatus: self._print_period,
+            CurrentStatus: self._print_current,
+            FaultStatus: self._print_fault
+        }
 
     def print_attention_status(self, mesh_command: bytes):
-        status = self.__parse_attention_status(io.BytesIO(mesh_command))
-        self._console_out.print_standard_message("Attention: {} [s]".format(status["attention"]))
+        self._print_attention(decode_attention_status(mesh_command))
 
     def print_period_status(self, mesh_command: bytes):
-        status = self.__parse_period_status(io.BytesIO(mesh_command))
-        self._console_out.print_standard_message("Fast Period Divider: {} (value 2^n: {})".format(status["period"], 
-                                                                                          (1 << status["period"])))
+        self._print_period(decode_period_status(mesh_command))
 
     def print_current_status(self, mesh_command: bytes):
-        status = self.__parse_generic_status(io.BytesIO(mesh_command))
+        self._print_current(decode_current_status(mesh_command))
+
+    def print_fault_status(self, mesh_command: bytes):
+        self._print_fault(decode_fault_status(mesh_command))
+
+    def print_record(self, record, timestamp=None):
+        """ Print status record decoded already, e.g. delivered by HealthStatusBus.
+
+        :param  record:    AttentionStatus, PeriodStatus, CurrentStatus or FaultStatus, Decoded status.
+        :param  timestamp: float, Status reception time, it is not printed.
+        :return            None
+        """
+        self._record_printers[type(record)](record)
+
+    def _print_attention(self, status):
+        self._console_out.print_standard_message("Attention: {} [s]".format(status.attention))
+
+    def _print_period(self, status):
+        self._console_out.print_standard_message("Fast Period Divider: {} (value 2^n: {})".format(status.fast_period_divisor,
+                                                                                          (1 << status.fast_period_divisor)))
+
+    def _print_current(self, status):
         gen_status_str = self._create_generic_status_str(status)
 
         self._console_out.print_standard_message("Current Status:\n\t{}\n".format(gen_status_str))
 
-    def print_fault_status(self, mesh_command: bytes):
-        status = self.__parse_generic_status(io.BytesIO(mesh_command))
+    def _print_fault(self, status):
         gen_status_str = self._create_generic_status_str(status)
 
         self._console_out.print_standard_message("Fault Status: \n\t{}\n".format(gen_status_str))
 
-    def __parse_attention_status(self, stream):
-        return {"attention": int.from_bytes(stream.read(1), byteorder='little')}
-    
-    def __parse_period_status(self, stream):
-        return {"period": int.from_bytes(stream.read(1), byteorder='little')}
-
-    def __parse_generic_status(self, stream):
-        test_id = int.from_bytes(stream.read(1), byteorder='little')
-        company_id = int.from_bytes(stream.read(2), byteorder='little')
-        
-        left_bytes = len(stream.getvalue()) - stream.tell()
-        faults = stream.read(left_bytes - 2)
-        src_addr = int.from_bytes(stream.read(2), byteorder='little')
-
-        status = {
-            "test_id": test_id,
-            "company_id": company_id,
-            "faults": faults,
-            "src_addr": src_addr
-        }
+    def print_fault_state_change(self, change):
+        if change.kind == FaultStateStore.NODE_SILENT:
+            self._console_out.print_standard_message("Node 0x{:04x}: no status received".format(change.src_addr))
+            return
+
+        if change.kind == FaultStateStore.NODE_BACK:
+            self._console_out.print_standard_message("Node 0x{:04x}: status received again".format(change.src_addr))
+            return
+
+        self._console_out.print_standard_message("Node 0x{:04x}: raised: [{}], cleared: [{}]".format(
+            change.src_addr,
+            ", ".join(FAULT_NAMES[fault] for fault in sorted(change.raised)),
+            ", ".join(FAULT_NAMES[fault] for fault in sorted(change.cleared))))
 
-        return status
+    def print_liveness_change(self, change):
+        if change.kind == LivenessTracker.NODE_MISSING:
+            self._console_out.print_standard_message(
+                "Node 0x{:04x}: missing, no Current Status for {:.1f} s (published every {:.1f} s)".format(
+                    change.src_addr, change.timestamp - change.last_seen, change.interval))
+            return
+
+        self._console_out.print_standard_message("Node 0x{:04x}: Current Status received again".format(change.src_addr))
 
     def _create_generic_status_str(self, status):
-        src_addr_str = "src_addr: 0x{:04x}".format(status["src_addr"])
-        test_id_str = "test_id: {}".format(status["test_id"])
-        company_id_str = "company_id: 0x{:04x}".format(status["company_id"])
-        faults_str = "faults: [{}]".format(", ".join([HealthFaults(fault).name for fault in status["faults"]]))
+        src_addr_str = "src_addr: 0x{:04x}".format(status.src_addr or 0)
+        test_id_str = "test_id: {}".format(status.test_id)
+        company_id_str = "company_id: 0x{:04x}".format(status.company_id)
+        faults_str = "faults: [{}]".format(", ".join([FAULT_NAMES[fault] for fault in status.faults]))
 
         return ",\n\t".join([src_addr_str, test_id_str, company_id_str, faults_str])
+
+
+# Fault names are serialized once, JSON lines are assembled from these fragments
+_FAULT_NAMES_JSON = tuple(json.dumps(name) for name in FAULT_NAMES)
+
+
+def _json_addr(addr):
+    return "null" if addr is None else str(addr)
+
+
+# Nodes publish the same faults over and over, so their fragment is built once
+@functools.lru_cache(maxsize=1024)
+def _json_faults(faults):
+    return "[" + ",".join(map(str, faults)) + "],\"fault_names\":[" + \
+        ",".join([_FAULT_NAMES_JSON[fault] for fault in faults]) + "]"
+
+
+class HealthClientJsonPrinter:
+    """ Health Client Status Printer writing every decoded status as a JSON line.
+
+    It has the same interface as HealthClientStatusPrinter, so it may be used in its place.
+    """
+
+    _ATTENTION_FMT = '{{"timestamp":{:.6f},"opcode":"ATTENTION_STATUS","src_addr":{},"attention":{}}}'
+    _PERIOD_FMT = '{{"timestamp":{:.6f},"opcode":"PERIOD_STATUS","src_addr":{},"fast_period_divisor":{}}}'
+    _GENERIC_FMT = '{{"timestamp":{:.6f},"opcode":"{}","src_addr":{},"company_id":{},"test_id":{},"faults":{}}}'
+    _LIVENESS_FMT = '{{"timestamp":{:.6f},"event":"{}","src_addr":{},"last_seen":{:.6f},"interval":{}}}'
+    _CHANGE_FMT = '{{"timestamp":{:.6f},"event":"{}","src_addr":{},"company_id":{},"faults":{},"raised":{},' \
+                  '"cleared":{}}}'
+
+    def __init__(self, console_out: ConsoleOut, clock=time.time):
+        """ Initialize Health Client JSON Printer
+
+        :param  console_out: ConsoleOut, Console output.
+        :param  clock:       Callable,   Wall clock time source of the record timestamps.
+        :return              None
+        """
+        self._console_out = console_out
+        self._clock = clock
+        self._record_printers = {
+            AttentionStatus: self._print_attention,
+            PeriodStatus: self._print_period,
+            CurrentStatus: self._print_current,
+            FaultStatus: self._print_fault
+        }
+
+    def print_attention_status(self, mesh_command: bytes):
+        self._print_attention(decode_attention_status(mesh_command), self._clock())
+
+    def print_period_status(self, mesh_command: bytes):
+        self._print_period(decode_period_status(mesh_command), self._clock())
+
+    def print_current_status(self, mesh_command: bytes):
+        self._print_current(decode_current_status(mesh_command), self._clock())
+
+    def print_fault_status(self, mesh_command: bytes):
+        self._print_fault(decode_fault_status(mesh_command), self._clock())
+
+    def print_record(self, record, timestamp=None):
+        """ Print status record decoded already, e.g. delivered by HealthStatusBus.
+
+        :param  record:    AttentionStatus, PeriodStatus, CurrentStatus or FaultStatus, Decoded status.
+        :param  timestamp: float, Status reception time, clock is used if None.
+        :return            None
+        """
+        self._record_printers[type(record)](record, self._clock() if timestamp is None else timestamp)
+
+    def print_fault_state_change(self, change):
+        self._console_out.print_standard_message(self._CHANGE_FMT.format(
+            change.timestamp, change.kind, change.src_addr, change.company_id,
+            _json_faults(bytes(sorted(change.faults))),
+            "[" + ",".join(map(str, sorted(change.raised))) + "]",
+            "[" + ",".join(map(str, sorted(change.cleared))) + "]"))
+
+    def print_liveness_change(self, change):
+        self._console_out.print_standard_message(self._LIVENESS_FMT.format(
+            change.timestamp, change.kind, change.src_addr, change.last_seen,
+            "null" if change.interval is None else "{:.3f}".format(change.interval)))
+
+    def _print_attention(self, status, timestamp):
+        self._console_out.print_standard_message(self._ATTENTION_FMT.format(
+            timestamp, _json_addr(status.src_addr), status.attention))
+
+    def _print_period(self, status, timestamp):
+        self._console_out.print_standard_message(self._PERIOD_FMT.format(
+            timestamp, _json_addr(status.src_addr), status.fast_period_divisor))
+
+    def _print_current(self, status, timestamp):
+        self._print_generic_status("CURRENT_STATUS", status, timestamp)
+
+    def _print_fault(self, status, timestamp):
+        self._print_generic_status("FAULT_STATUS", status, timestamp)
+
+    def _print_generic_status(self, opcode_name, status, timestamp):
+        self._console_out.print_standard_message(self._GENERIC_FMT.format(
+            timestamp, opcode_name, _json_addr(status.src_addr), status.company_id, status.test_id,
+            _json_faults(bytes(status.faults))))
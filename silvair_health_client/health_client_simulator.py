@@ -0,0 +1,271 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from silvair_uart_common_libs.message_types import ModelID
+
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.utils import is_unicast_address
+
+
+def encode_generic_status(test_id, company_id, faults, src_addr):
+    """ Encode Current or Fault Status payload as received from the UART Modem.
+
+    :param test_id:    int,           Test Id.
+    :param company_id: int,           Company Id.
+    :param faults:     Iterable[int], Fault codes.
+    :param src_addr:   int,           Source address.
+    :return:           bytes
+    """
+    return bytes([test_id]) + company_id.to_bytes(2, byteorder='little') + bytes(faults) + \
+        src_addr.to_bytes(2, byteorder='little')
+
+
+def uniform_latency(low_s=0.02, high_s=0.2):
+    """ Create latency distribution uniform between bounds.
+
+    :param low_s:  float, Minimum latency in seconds.
+    :param high_s: float, Maximum latency in seconds.
+    :return:       Callable[[random.Random], float]
+    """
+    return lambda rng: rng.uniform(low_s, high_s)
+
+
+class SimulatedHealthServer:
+    """ Virtual node with Health Server model """
+
+    __slots__ = ("addr", "company_id", "faults", "test_id", "attention", "fast_period_divisor", "publish_period")
+
+    def __init__(self, addr, company_id=0x0136, faults=(), publish_period=None):
+        """ Initialize node
+
+        :param addr:           int,           Unicast address.
+        :param company_id:     int,           Company Id of the registered faults.
+        :param faults:         Iterable[int], Registered fault codes.
+        :param publish_period: float,         Current Status publication period in seconds, never if None.
+        :return:               None
+        """
+        self.addr = addr
+        self.company_id = company_id
+        self.faults = list(faults)
+        self.test_id = 0
+        self.attention = 0
+        self.fast_period_divisor = 0
+        self.publish_period = publish_period
+
+    @property
+    def current_publish_period(self):
+        """ Publication period, divided by 2^fast_period_divisor when faults are registered. """
+        if self.publish_period is None:
+            return None
+
+        if self.faults:
+            return self.publish_period / (1 << self.fast_period_divisor)
+
+        return self.publish_period
+
+    def generic_status(self):
+        return encode_generic_status(self.test_id, self.company_id, self.faults, self.addr)
+
+
+class SimulatedHealthMesh:
+    """ In-process UART Modem and mesh network of simulated Health Servers.
+
+    It implements Sender.send_message, so Health Client sends requests directly to it,
+    and delivers statuses to the event manager as if they were received from UART.
+    Unlike the UART Modem it delivers requests to their destination address (dst_addr),
+    requests without destination address are delivered to every node, like a publication
+    to a group all nodes subscribe.
+    """
+
+    supports_dst_addr = True
+
+    def __init__(self, event_mgr, nodes, latency=uniform_latency(), loss_rate=0.0, seed=None,
+                 model_ids=(ModelID.HealthClientID,), clock=time.monotonic):
+        """ Initialize simulated mesh
+
+        :param event_mgr: HealtClientEventMgr,                 Receiver of registered models and statuses.
+        :param nodes:     Iterable[SimulatedHealthServer],     Simulated nodes.
+        :param latency:   Callable[[random.Random], float],    Response latency distribution in seconds.
+        :param loss_rate: float,                               Probability a request or a status is lost.
+        :param seed:      int,                                 Random generator seed.
+        :param model_ids: Iterable[int],                       Model ids reported as registered on reset.
+        :param clock:     Callable,                            Monotonic time source.
+        :return:          None
+        """
+        self._event_mgr = event_mgr
+        self._nodes = {node.addr: node for node in nodes}
+        self._latency = latency
+        self._loss_rate = loss_rate
+        self._rng = random.Random(seed)
+        self._model_ids = list(model_ids)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._events = []
+        self._seq = itertools.count()
+        self._running = False
+        self._thread = None
+
+        self.sent_messages = 0
+        self.delivered_statuses = 0
+        self.lost_messages = 0
+
+        now = self._clock()
+
+        for node in self._nodes.values():
+            if node.publish_period is not None:
+                # Spread the first publications over the period, like nodes powered up at different times
+                self._schedule_publication(node, now + self._rng.uniform(0, node.publish_period))
+
+    @property
+    def nodes(self):
+        return self._nodes
+
+    def reset(self):
+        """ Simulate UART Modem reset reporting registered models.
+
+        :return: None
+        """
+        self._event_mgr.uart_registered_models(self._model_ids)
+
+    def send_message(self, msg):
+        """ Receive request from the Health Client.
+
+        :param msg: MeshMessageRequestMessage, Request message.
+        :return:    None
+        """
+        dst_addr = getattr(msg, "dst_addr", None)
+
+        with self._cond:
+            self.sent_messages += 1
+
+        if dst_addr is None or not is_unicast_address(dst_addr):
+            nodes = list(self._nodes.values())
+        else:
+            nodes = [self._nodes[dst_addr]] if dst_addr in self._nodes else []
+
+        for node in nodes:
+            status = self._handle_request(node, msg.mesh_opcode, bytes(msg.mesh_command))
+
+            if status is not None:
+                self._schedule(self._clock() + self._latency(self._rng), *status)
+
+    def run_pending(self, now=None):
+        """ Deliver statuses due at the given time on the calling thread.
+
+        :param now: float, Current time, clock is used if None.
+        :return:    int, number of delivered statuses
+        """
+        now = self._clock() if now is None else now
+        delivered = 0
+
+        while True:
+            with self._cond:
+                if not self._events or self._events[0][0] > now:
+                    return delivered
+
+                due_time, _, node, opcode, command = heapq.heappop(self._events)
+
+                if opcode == HealthClientOpcodes.CURRENT_STATUS:
+                    command = node.generic_status()
+                    self._schedule_publication(node, due_time + node.current_publish_period)
+
+                if self._rng.random() < self._loss_rate:
+                    self.lost_messages += 1
+                    continue
+
+                self.delivered_statuses += 1
+
+            self._event_mgr.uart_mesh_request(opcode, command)
+            delivered += 1
+
+    def start(self):
+        """ Start thread delivering statuses in real time.
+
+        :return: None
+        """
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run_loop, name="SimulatedHealthMesh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop delivering thread.
+
+        :return: None
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run_loop(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+
+                wait_s = self._events[0][0] - self._clock() if self._events else None
+
+                if wait_s is None or wait_s > 0:
+                    self._cond.wait(wait_s)
+                    continue
+
+            self.run_pending()
+
+    def _schedule(self, due_time, node, opcode, command):
+        with self._cond:
+            heapq.heappush(self._events, (due_time, next(self._seq), node, opcode, command))
+            self._cond.notify()
+
+    def _schedule_publication(self, node, due_time):
+        self._schedule(due_time, node, HealthClientOpcodes.CURRENT_STATUS, None)
+
+    def _handle_request(self, node, opcode, command):
+        if self._rng.random() < self._loss_rate:
+            with self._cond:
+                self.lost_messages += 1
+
+            return None
+
+        if opcode in (HealthClientOpcodes.ATTENTION_SET, HealthClientOpcodes.ATTENTION_SET_UNACKNOWLEDGED):
+            node.attention = command[0]
+
+        elif opcode in (HealthClientOpcodes.PERIOD_SET, HealthClientOpcodes.PERIOD_SET_UNACKNOWLEDGED):
+            node.fast_period_divisor = command[0]
+
+        elif opcode in (HealthClientOpcodes.FAULT_GET, HealthClientOpcodes.FAULT_CLEAR,
+                        HealthClientOpcodes.FAULT_CLEAR_UNACKNOWLEDGED):
+            # Health Server ignores requests for faults of other companies
+            if int.from_bytes(command[0:2], byteorder='little') != node.company_id:
+                return None
+
+            if opcode != HealthClientOpcodes.FAULT_GET:
+                node.faults = []
+
+        elif opcode in (HealthClientOpcodes.FAULT_TEST, HealthClientOpcodes.FAULT_TEST_UNACKNOWLEDGED):
+            if int.from_bytes(command[1:3], byteorder='little') != node.company_id:
+                return None
+
+            node.test_id = command[0]
+
+        if opcode in (HealthClientOpcodes.ATTENTION_GET, HealthClientOpcodes.ATTENTION_SET):
+            return node, HealthClientOpcodes.ATTENTION_STATUS, bytes([node.attention]) + node.addr.to_bytes(2, 'little')
+
+        if opcode in (HealthClientOpcodes.PERIOD_GET, HealthClientOpcodes.PERIOD_SET):
+            return node, HealthClientOpcodes.PERIOD_STATUS, \
+                bytes([node.fast_period_divisor]) + node.addr.to_bytes(2, 'little')
+
+        if opcode in (HealthClientOpcodes.FAULT_GET, HealthClientOpcodes.FAULT_CLEAR, HealthClientOpcodes.FAULT_TEST):
+            return node, HealthClientOpcodes.FAULT_STATUS, node.generic_status()
+
+        return None
@@ -0,0 +1,272 @@
+import collections
+import threading
+import time
+
+from concurrent.futures import Future
+
+from silvair_health_client.health_client_pacing import PRIORITY_BULK, send_priority
+from silvair_health_client.health_requests import HealthRequestTimeout, RetryBudget
+from silvair_health_client.health_status import decode_fault_status, decode_attention_status
+
+
+FaultSweepResult = collections.namedtuple("FaultSweepResult",
+                                          ["src_addr", "company_id", "test_id", "faults", "latency", "timeouts", "error"])
+
+AttentionCampaignResult = collections.namedtuple("AttentionCampaignResult",
+                                                 ["src_addr", "attention", "attempts", "latency", "error"])
+
+
+def parse_address_range(text):
+    """ Parse single address or inclusive address range e.g. '0x0001-0x0190'.
+
+    :param text: str, Address or range of addresses.
+    :return:     range
+    """
+    first, _, last = text.partition("-")
+    first = int(first, 16)
+    last = int(last, 16) if last else first
+
+    if not 0 < first <= last <= 0xFFFF:
+        raise ValueError("Invalid address range: {}".format(text))
+
+    return range(first, last + 1)
+
+
+class RequestWindow:
+    """ Sends requests keeping a bounded number of them in flight at a paced rate """
+
+    def __init__(self, concurrency=8, rate=None, clock=time.monotonic, sleep=time.sleep):
+        """ Initialize request window
+
+        :param concurrency: int,      Maximum number of requests waiting for a status.
+        :param rate:        float,    Maximum number of requests sent per second, unlimited if None.
+        :param clock:       Callable, Monotonic time source.
+        :param sleep:       Callable, Sleep function.
+        :return:            None
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be positive")
+
+        self._concurrency = concurrency
+        self._interval = 1.0 / rate if rate else 0.0
+        self._clock = clock
+        self._sleep = sleep
+
+    def run(self, targets, send, on_done):
+        """ Send request to every target and wait until all of them are done.
+
+        :param targets: Iterable,                        Request targets.
+        :param send:    Callable[[target], Future],      Sends request to the target.
+        :param on_done: Callable[[target, Future, float], Called with the finished future and its latency.
+        :return:        None
+        """
+        slots = threading.Semaphore(self._concurrency)
+        done_cond = threading.Condition()
+        in_flight = [0]
+        next_send_time = self._clock()
+
+        def done(target, sent_at, future):
+            try:
+                on_done(target, future, self._clock() - sent_at)
+            finally:
+                with done_cond:
+                    in_flight[0] -= 1
+                    done_cond.notify_all()
+
+                slots.release()
+
+        for target in targets:
+            slots.acquire()
+
+            wait_s = next_send_time - self._clock()
+            if wait_s > 0:
+                self._sleep(wait_s)
+
+            next_send_time = max(next_send_time, self._clock()) + self._interval
+
+            with done_cond:
+                in_flight[0] += 1
+
+            sent_at = self._clock()
+
+            try:
+                future = send(target)
+            except Exception as err:
+                future = Future()
+                future.set_exception(err)
+
+            future.add_done_callback(lambda f, target=target, sent_at=sent_at: done(target, sent_at, f))
+
+        with done_cond:
+            done_cond.wait_for(lambda: in_flight[0] == 0)
+
+
+class FaultSweep:
+    """ Fleet-wide Fault Get sweep """
+
+    def __init__(self, health_client, concurrency=8, rate=None, retries=None):
+        """ Initialize sweep
+
+        :param health_client: HealthClient, Health Client or HealthClientLanes created with a request tracker.
+        :param concurrency:   int,          Maximum number of requests waiting for a status.
+        :param rate:          float,        Maximum number of requests sent per second, unlimited if None.
+        :param retries:       int,          Retries of all sweep requests together, limited per request only if None.
+        :return:              None
+        """
+        if not health_client.supports_dst_addr:
+            raise ValueError("Sweep requires a sender able to address requests to the nodes")
+
+        self._health_client = health_client
+        self._window = RequestWindow(concurrency, rate)
+        self._retries = retries
+
+    def run(self, company_id, addresses):
+        """ Get registered faults from every node.
+
+        :param company_id: str,           Company Id.
+        :param addresses:  Iterable[int], Unicast addresses of the nodes.
+        :return:           list[FaultSweepResult], results in order of addresses
+        """
+        results = {}
+        lock = threading.Lock()
+        health_client = self._health_client
+
+        if self._retries is not None:
+            health_client = health_client.with_retry_budget(RetryBudget(self._retries))
+
+        def send(addr):
+            future = health_client.send_fault_get(company_id, dst_addr=addr)
+
+            if future is None:
+                raise ValueError("Health Client has no request tracker")
+
+            return future
+
+        def on_done(addr, future, latency):
+            result = self._create_result(addr, future, latency)
+
+            with lock:
+                results[addr] = result
+
+        addresses = list(addresses)
+
+        # PacedSender sends requests of other threads, e.g. commands typed in the CLI, ahead of the sweep requests
+        with send_priority(PRIORITY_BULK):
+            self._window.run(addresses, send, on_done)
+
+        return [results[addr] for addr in addresses]
+
+    @staticmethod
+    def _create_result(addr, future, latency):
+        err = future.exception()
+
+        if err is None:
+            status = decode_fault_status(future.result())
+            # Node which has answered a retry has missed the earlier attempts
+            return FaultSweepResult(addr, status.company_id, status.test_id, status.faults, latency,
+                                    future.request.attempts - 1, None)
+
+        timeouts = err.request.attempts if isinstance(err, HealthRequestTimeout) else 0
+        return FaultSweepResult(addr, None, None, None, None, timeouts, str(err))
+
+
+class AttentionCampaign:
+    """ Attention Set sent to many nodes in waves, e.g. room by room, confirmed with Attention Status.
+
+    Nodes which have not confirmed are sent the request again by the reissues of the wave only,
+    the request tracker does not retry campaign requests.
+    """
+
+    def __init__(self, health_client, concurrency=8, rate=None, reissues=2):
+        """ Initialize campaign
+
+        :param health_client: HealthClient, Health Client or HealthClientLanes created with a request tracker.
+        :param concurrency:   int,          Maximum number of requests waiting for a status.
+        :param rate:          float,        Maximum number of requests sent per second, unlimited if None.
+        :param reissues:      int,          Number of times the wave is sent again to nodes which have not confirmed.
+        :return:              None
+        """
+        if reissues < 0:
+            raise ValueError("Reissues must not be negative")
+
+        if not health_client.supports_dst_addr:
+            raise ValueError("Campaign requires a sender able to address requests to the nodes")
+
+        self._health_client = health_client
+        self._window = RequestWindow(concurrency, rate)
+        self._reissues = reissues
+
+    def run(self, attention_s, waves):
+        """ Set attention on every node, wave after wave.
+
+        Each wave is finished, including reissues, before the next one is started.
+
+        :param attention_s: int,                     Attention time in seconds, 0 turns attention off.
+        :param waves:       Iterable[Iterable[int]], Unicast addresses of the nodes of every wave.
+        :return:            list[AttentionCampaignResult], results in order of addresses
+        :raises:            ValueError, when attention time does not fit in Attention Set
+        """
+        attention_s = int(attention_s)
+
+        if not 0 <= attention_s <= 0xFF:
+            raise ValueError("Invalid attention time: {}".format(attention_s))
+
+        results = []
+        health_client = self._health_client.with_retry_budget(RetryBudget(0))
+
+        def send(addr):
+            future = health_client.send_attention_set(attention_s, dst_addr=addr)
+
+            if future is None:
+                raise ValueError("Health Client has no request tracker")
+
+            return future
+
+        # Attention commands typed in the CLI are sent ahead of the campaign requests by PacedSender
+        with send_priority(PRIORITY_BULK):
+            for wave in waves:
+                results.extend(self._run_wave(attention_s, list(wave), send))
+
+        return results
+
+    def _run_wave(self, attention_s, addresses, send):
+        results = {}
+        attempts = collections.Counter()
+        lock = threading.Lock()
+
+        def on_done(addr, future, latency):
+            result = self._create_result(attention_s, addr, future, latency, attempts[addr])
+
+            with lock:
+                results[addr] = result
+
+        pending = addresses
+
+        for _ in range(self._reissues + 1):
+            attempts.update(pending)
+            self._window.run(pending, send, on_done)
+            pending = [addr for addr in pending if results[addr].error is not None]
+
+            if not pending:
+                break
+
+        return [results[addr] for addr in addresses]
+
+    @staticmethod
+    def _create_result(attention_s, addr, future, latency, attempts):
+        err = future.exception()
+
+        if err is not None:
+            return AttentionCampaignResult(addr, None, attempts, None, str(err))
+
+        try:
+            status = decode_attention_status(future.result())
+        except ValueError as err:
+            return AttentionCampaignResult(addr, None, attempts, latency, str(err))
+
+        # Node reports the remaining attention time, it is turned on if it is not 0
+        if (status.attention > 0) != (attention_s > 0):
+            return AttentionCampaignResult(addr, status.attention, attempts, latency,
+                                           "attention not confirmed: {} s".format(status.attention))
+
+        return AttentionCampaignResult(addr, status.attention, attempts, latency, None)
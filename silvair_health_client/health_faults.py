@@ -0,0 +1,226 @@
+import enum
+import fnmatch
+
+
+class HealthFaults(enum.IntEnum):
+  NO_FAULT                  = 0x00
+  BATTERY_LOW_WARN          = 0x01
+  BATTERY_LOW_ERR           = 0x02
+  SUPPLY_VOLTAGE_LOW_WARN   = 0x03
+  SUPPLY_VOLTAGE_LOW_ERR    = 0x04
+  SUPPLY_VOLTAGE_HIGH_WARN  = 0x05
+  SUPPLY_VOLTAGE_HIGH_ERR   = 0x06
+  POWER_INTERRUPTED_WARN    = 0x07
+  POWER_INTERRUPTED_ERR     = 0x08
+  NO_LOAD_WARN              = 0x09
+  NO_LOAD_ERR               = 0x0A
+  OVERLOAD_WARN             = 0x0B
+  OVERLOAD_ERR              = 0x0C
+  OVERHEAT_WARN             = 0x0D
+  OVERHEAT_ERR              = 0x0E
+  CONDENSATION_WARN         = 0x0F
+  CONDENSATION_ERR          = 0x10
+  VIBRATION_WARN            = 0x11
+  VIBRATION_ERR             = 0x12
+  CONFIGUTATION_WARN        = 0x13
+  CONFIGUTATION_ERR         = 0x14
+  ELEMENT_NOT_CAL_WARN      = 0x15
+  ELEMENT_NOT_CAL_ERR       = 0x16
+  MEMORY_WARN               = 0x17
+  MEMORY_ERR                = 0x18
+  SELF_TEST_WARN            = 0x19
+  SELF_TEST_ERR             = 0x1A
+  INPUT_TOO_LOW_WARN        = 0x1B
+  INPUT_TOO_LOW_ERR         = 0x1C
+  INPUT_TOO_HIGH_WARN       = 0x1D
+  INPUT_TOO_HIGH_ERR        = 0x1E
+  INPUT_NO_CHANGE_WARN      = 0x1F
+  INPUT_NO_CHANGE_ERR       = 0x20
+  ACTUATOR_BLOCKED_WARN     = 0x21
+  ACTUATOR_BLOCKED_ERR      = 0x22
+  HOUSING_OPENED_WARN       = 0x23
+  HOUSING_OPENED_ERR        = 0x24
+  TAMPER_WARN               = 0x25
+  TAMPER_ERR                = 0x26
+  DEVICE_MOVED_WARN         = 0x27
+  DEVICE_MOVED_ERR          = 0x28
+  DEVICE_DROPPED_WARN       = 0x29
+  DEVICE_DROPPED_ERR        = 0x2A
+  OVERFLOW_WARN             = 0x2B
+  OVERFLOW_ERR              = 0x2C
+  EMPTY_WARN                = 0x2D
+  EMPTY_ERR                 = 0x2E
+  INTERNAL_BUS_WARN         = 0x2F
+  INTERNAL_BUS_ERR          = 0x30
+  MECHANISM_JAMMED_WARN     = 0x31
+  MECHANISM_JAMMED_ERR      = 0x32
+  RFU_START                 = 0x33
+  RFU_END                   = 0x7F
+  VENDOR_SPECIFIC_START     = 0x80
+  DALI_CONTROL_GEAR_FAILURE = 0x81
+  DALI_LIGHT_SOURCE_FAILURE = 0x82
+  DALI_LIMIT_ERROR          = 0x83
+  DALI_NO_RESPONSE_WARNING  = 0x84
+  DALI_NO_RESPONSE_ERROR    = 0x85
+  VENDOR_SPECIFIC_END       = 0xFF
+
+
+class HealthFaultSeverity(enum.IntEnum):
+  NONE    = 0
+  WARNING = 1
+  ERROR   = 2
+  RFU     = 3
+  VENDOR  = 4
+
+
+def _fault_name(code):
+    if HealthFaults.RFU_START <= code <= HealthFaults.RFU_END:
+        return "RFU_0x{:02x}".format(code)
+
+    if code in (HealthFaults.VENDOR_SPECIFIC_START, HealthFaults.VENDOR_SPECIFIC_END):
+        return "VENDOR_SPECIFIC_0x{:02x}".format(code)
+
+    try:
+        return HealthFaults(code).name
+    except ValueError:
+        return "VENDOR_SPECIFIC_0x{:02x}".format(code)
+
+
+def _fault_severity(code):
+    if code == HealthFaults.NO_FAULT:
+        return HealthFaultSeverity.NONE
+
+    if code >= HealthFaults.VENDOR_SPECIFIC_START:
+        # Named vendor faults, e.g. DALI_LIMIT_ERROR, are classified by the suffix of their name
+        name = _fault_name(code)
+
+        if name.endswith(("_ERROR", "_FAILURE")):
+            return HealthFaultSeverity.ERROR
+
+        if name.endswith("_WARNING"):
+            return HealthFaultSeverity.WARNING
+
+        return HealthFaultSeverity.VENDOR
+
+    if code >= HealthFaults.RFU_START:
+        return HealthFaultSeverity.RFU
+
+    # Specification defined faults alternate between warning (odd) and error (even) codes
+    return HealthFaultSeverity.WARNING if code % 2 else HealthFaultSeverity.ERROR
+
+
+# Fault code to name and severity lookup tables, indexed by the fault byte
+FAULT_NAMES = tuple(_fault_name(code) for code in range(256))
+FAULT_SEVERITIES = tuple(_fault_severity(code) for code in range(256))
+
+
+_FAULT_BITS = (1 << 256) - 2
+
+
+class FaultSet:
+    """ Immutable set of fault codes kept as 256 bit integer, bit n is set when fault code n is registered.
+
+    Set operations, membership and popcount are single integer operations, NO_FAULT is never a member.
+    """
+
+    __slots__ = ("bits",)
+
+    def __init__(self, bits=0):
+        self.bits = bits & _FAULT_BITS
+
+    @classmethod
+    def from_codes(cls, codes):
+        """ Create set of fault codes, e.g. the faults of decoded status.
+
+        :param codes: Iterable[int], Fault codes.
+        :return:      FaultSet
+        """
+        bits = 0
+
+        for code in codes:
+            bits |= 1 << code
+
+        return cls(bits)
+
+    @classmethod
+    def from_bytes(cls, bitmap):
+        """ Create set of faults from little-endian bitmap.
+
+        :param bitmap: bytes, Bitmap of at most 32 bytes.
+        :return:       FaultSet
+        """
+        return cls(int.from_bytes(bitmap, byteorder="little"))
+
+    def to_bytes(self):
+        """ Encode set as 32 byte little-endian bitmap.
+
+        :return: bytes
+        """
+        return self.bits.to_bytes(32, byteorder="little")
+
+    def names(self):
+        return [FAULT_NAMES[code] for code in self]
+
+    def __or__(self, other):
+        return FaultSet(self.bits | other.bits)
+
+    def __and__(self, other):
+        return FaultSet(self.bits & other.bits)
+
+    def __sub__(self, other):
+        return FaultSet(self.bits & ~other.bits)
+
+    def __xor__(self, other):
+        return FaultSet(self.bits ^ other.bits)
+
+    def __invert__(self):
+        return FaultSet(~self.bits)
+
+    def __contains__(self, code):
+        return 0 <= code < 256 and bool(self.bits >> code & 1)
+
+    def __iter__(self):
+        bits = self.bits
+
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __eq__(self, other):
+        return isinstance(other, FaultSet) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __repr__(self):
+        return "FaultSet([{}])".format(", ".join(self.names()))
+
+
+def _severity_faults(severity):
+    return FaultSet.from_codes(code for code in range(256) if FAULT_SEVERITIES[code] == severity)
+
+
+def fault_codes(pattern):
+    """ Get fault codes with names matching shell-style pattern, e.g. OVERHEAT_* or DALI_*.
+
+    :param pattern: str, Fault name pattern.
+    :return:        FaultSet
+    """
+    return FaultSet.from_codes(code for code, name in enumerate(FAULT_NAMES) if fnmatch.fnmatchcase(name, pattern))
+
+
+# Masks of fault classes, e.g. bool(status.fault_set & ERROR_FAULTS) tells if node has any error level fault.
+# ERROR_FAULTS and WARNING_FAULTS include the named vendor faults, VENDOR_FAULTS is the whole vendor range
+ALL_FAULTS = ~FaultSet()
+WARNING_FAULTS = _severity_faults(HealthFaultSeverity.WARNING)
+ERROR_FAULTS = _severity_faults(HealthFaultSeverity.ERROR)
+RFU_FAULTS = _severity_faults(HealthFaultSeverity.RFU)
+VENDOR_FAULTS = FaultSet.from_codes(range(HealthFaults.VENDOR_SPECIFIC_START, HealthFaults.VENDOR_SPECIFIC_END + 1))
+DALI_FAULTS = fault_codes("DALI_*")
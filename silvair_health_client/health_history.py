@@ -0,0 +1,270 @@
+""" Append-only columnar history of Current and Fault Statuses.
+
+Every column is a separate file of fixed size native byte order values: timestamp,
+src_addr, company_id, test_id and a 256 bit fault bitmap (FaultSet.to_bytes). Queries
+work on memory-mapped columns, select the time window by bisection of the timestamps
+and match faults with byte-wise operations on whole columns, so only the matching
+rows are visited in Python.
+
+Rows are buffered and written in batches, before every query and on flush and close.
+Timestamps never decrease: a status stamped earlier than the last stored one, e.g. by
+another thread or after the wall clock has been set back, is stored with the last one.
+"""
+import bisect
+import collections
+import functools
+import mmap
+import os
+import struct
+import threading
+import time
+
+from silvair_health_client.health_faults import FaultSet, ALL_FAULTS
+
+FAULT_BITMAP_SIZE = 32
+
+HistoryRecord = collections.namedtuple("HistoryRecord", ["timestamp", "src_addr", "company_id", "test_id", "faults"])
+
+# Column name, value format and number of values per row
+_COLUMNS = (
+    ("timestamp", "d", 1),
+    ("src_addr", "H", 1),
+    ("company_id", "H", 1),
+    ("test_id", "B", 1),
+    ("faults", "B", FAULT_BITMAP_SIZE)
+)
+
+_TIMESTAMP = struct.Struct("=d")
+_UINT16 = struct.Struct("=H")
+
+
+@functools.lru_cache(maxsize=256)
+def _bit_table(mask):
+    # Maps every bitmap byte to 1 when it has any of the mask bits set, to 0 otherwise
+    return bytes(int(value & mask != 0) for value in range(256))
+
+
+class FaultHistory:
+    """ Fault statuses of all nodes kept in memory-mapped column files of a directory """
+
+    def __init__(self, directory, clock=time.time, batch_rows=256):
+        """ Initialize history, rows already stored in the directory are kept
+
+        :param directory:  str,      Column files directory, created if it does not exist.
+        :param clock:      Callable, Wall clock time source.
+        :param batch_rows: int,      Number of buffered rows written to the column files at once.
+        :return:           None
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self._clock = clock
+        self._batch_rows = batch_rows
+        self._lock = threading.Lock()
+        self._files = {}
+        self._row_sizes = {}
+
+        for name, fmt, count in _COLUMNS:
+            self._files[name] = open(os.path.join(directory, name + ".col"), "a+b")
+            self._row_sizes[name] = struct.calcsize("=" + fmt) * count
+
+        # A row partially written by a crashed process is dropped
+        self._rows = min(os.path.getsize(self._files[name].name) // self._row_sizes[name] for name in self._files)
+
+        for name, column_file in self._files.items():
+            column_file.truncate(self._rows * self._row_sizes[name])
+
+        self._buffers = {name: bytearray() for name in self._files}
+        self._buffered_rows = 0
+        self._last_timestamp = float("-inf")
+
+        if self._rows:
+            column_file = self._files["timestamp"]
+            column_file.seek((self._rows - 1) * self._row_sizes["timestamp"])
+            self._last_timestamp, = _TIMESTAMP.unpack(column_file.read(_TIMESTAMP.size))
+
+        self._maps = []
+        self._views = None
+        self._mapped_rows = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._rows + self._buffered_rows
+
+    def on_status(self, status, timestamp=None):
+        """ Append decoded Current or Fault Status.
+
+        :param status:    FaultStatus, Decoded status.
+        :param timestamp: float,       Status reception time, clock is used if None.
+        :return:          None
+        """
+        if status.src_addr is None:
+            return
+
+        faults = FaultSet.from_codes(status.faults).to_bytes()
+
+        with self._lock:
+            # Time windows are bisected, so timestamps must not decrease
+            timestamp = max(self._clock() if timestamp is None else timestamp, self._last_timestamp)
+            self._last_timestamp = timestamp
+
+            self._buffers["timestamp"] += _TIMESTAMP.pack(timestamp)
+            self._buffers["src_addr"] += _UINT16.pack(status.src_addr)
+            self._buffers["company_id"] += _UINT16.pack(status.company_id)
+            self._buffers["test_id"].append(status.test_id)
+            self._buffers["faults"] += faults
+            self._buffered_rows += 1
+
+            if self._buffered_rows >= self._batch_rows:
+                self._write_buffered()
+
+    def records(self, since=None, until=None):
+        """ Get stored statuses.
+
+        :param since: float, Start of the time window (inclusive), beginning of the history if None.
+        :param until: float, End of the time window (exclusive), end of the history if None.
+        :return:      list[HistoryRecord]
+        """
+        with self._lock:
+            views = self._map()
+            start, end = self._window(views, since, until)
+            faults = views["faults"]
+
+            return [HistoryRecord(views["timestamp"][row], views["src_addr"][row], views["company_id"][row],
+                                  views["test_id"][row],
+                                  FaultSet.from_bytes(faults[row * FAULT_BITMAP_SIZE:(row + 1) * FAULT_BITMAP_SIZE]))
+                    for row in range(start, end)]
+
+    def nodes_with_faults(self, faults=ALL_FAULTS, since=None, until=None):
+        """ Get nodes which reported any of the faults within the time window.
+
+        :param faults: FaultSet, Faults, e.g. fault_codes("OVERHEAT_*") or ERROR_FAULTS, any fault by default.
+        :param since:  float,    Start of the time window (inclusive), beginning of the history if None.
+        :param until:  float,    End of the time window (exclusive), end of the history if None.
+        :return:       set of int
+        """
+        with self._lock:
+            views = self._map()
+            src_addrs = views["src_addr"]
+
+            return {src_addrs[row] for row in self._matching_rows(views, faults, since, until)}
+
+    def fault_counts(self, faults=ALL_FAULTS, since=None, until=None, interval=3600.0):
+        """ Count statuses reporting any of the faults per node and time interval.
+
+        :param faults:   FaultSet, Faults, any fault by default.
+        :param since:    float,    Start of the time window (inclusive), beginning of the history if None.
+        :param until:    float,    End of the time window (exclusive), end of the history if None.
+        :param interval: float,    Interval length in seconds, hour by default.
+        :return:         Counter of (src_addr, interval start timestamp) to number of statuses
+        """
+        counts = collections.Counter()
+
+        with self._lock:
+            views = self._map()
+            timestamps = views["timestamp"]
+            src_addrs = views["src_addr"]
+
+            for row in self._matching_rows(views, faults, since, until):
+                counts[src_addrs[row], timestamps[row] // interval * interval] += 1
+
+        return counts
+
+    def flush(self):
+        with self._lock:
+            self._write_buffered()
+
+            for column_file in self._files.values():
+                column_file.flush()
+
+    def close(self):
+        with self._lock:
+            self._write_buffered()
+            self._unmap()
+
+            for column_file in self._files.values():
+                column_file.close()
+
+    def _write_buffered(self):
+        if not self._buffered_rows:
+            return
+
+        for name, buffer in self._buffers.items():
+            self._files[name].write(buffer)
+            buffer.clear()
+
+        self._rows += self._buffered_rows
+        self._buffered_rows = 0
+
+    def _map(self):
+        self._write_buffered()
+
+        if self._views is not None and self._mapped_rows == self._rows:
+            return self._views
+
+        self._unmap()
+
+        for column_file in self._files.values():
+            column_file.flush()
+
+        self._views = {}
+
+        for name, fmt, _ in _COLUMNS:
+            if self._rows == 0:
+                self._views[name] = memoryview(b"").cast(fmt)
+                continue
+
+            column_map = mmap.mmap(self._files[name].fileno(), self._rows * self._row_sizes[name],
+                                   access=mmap.ACCESS_READ)
+            self._maps.append(column_map)
+            self._views[name] = memoryview(column_map).cast(fmt)
+
+        self._mapped_rows = self._rows
+
+        return self._views
+
+    def _unmap(self):
+        if self._views is not None:
+            for view in self._views.values():
+                view.release()
+
+            self._views = None
+
+        for column_map in self._maps:
+            column_map.close()
+
+        self._maps = []
+
+    def _window(self, views, since, until):
+        # Rows are appended in reception order, so timestamps are sorted
+        timestamps = views["timestamp"]
+        start = 0 if since is None else bisect.bisect_left(timestamps, since)
+        end = len(timestamps) if until is None else bisect.bisect_left(timestamps, until, start)
+
+        return start, end
+
+    def _matching_rows(self, views, faults, since, until):
+        start, end = self._window(views, since, until)
+
+        if start == end:
+            return
+
+        # Every bitmap byte is a strided slice of the column, rows matching any mask are OR-ed in a big integer
+        column = views["faults"]
+        matching = 0
+
+        for byte, mask in enumerate(faults.to_bytes()):
+            if not mask:
+                continue
+
+            byte_column = bytes(column[start * FAULT_BITMAP_SIZE + byte:end * FAULT_BITMAP_SIZE:FAULT_BITMAP_SIZE])
+            matching |= int.from_bytes(byte_column.translate(_bit_table(mask)), byteorder="big")
+
+        if not matching:
+            return
+
+        flags = matching.to_bytes(end - start, byteorder="big")
+        offset = flags.find(1)
+
+        while offset != -1:
+            yield start + offset
+            offset = flags.find(1, offset + 1)
@@ -0,0 +1,282 @@
+import collections
+import heapq
+import threading
+import time
+
+from silvair_health_client.health_status import CurrentStatus, PeriodStatus
+
+
+LivenessChange = collections.namedtuple("LivenessChange", ["kind", "src_addr", "timestamp", "last_seen", "interval"])
+
+
+class _NodeLiveness:
+    __slots__ = ("last_seen", "last_status", "published_at", "faulty", "intervals", "fast_period_divisor", "deadline",
+                 "missing", "long_intervals")
+
+    def __init__(self):
+        self.last_seen = None
+        self.last_status = None
+        # Reception time of the publication the next interval is measured from
+        self.published_at = None
+        self.faulty = False
+        # Learned publication interval without faults and with faults (fast period)
+        self.intervals = [None, None]
+        self.fast_period_divisor = None
+        self.deadline = None
+        self.missing = False
+        self.long_intervals = 0
+
+    def expected_interval(self):
+        interval = self.intervals[self.faulty]
+
+        if interval is not None:
+            return interval
+
+        other = self.intervals[not self.faulty]
+
+        if other is None:
+            return None
+
+        if self.fast_period_divisor is not None:
+            return other / (1 << self.fast_period_divisor) if self.faulty else other * (1 << self.fast_period_divisor)
+
+        # Fast period is never longer than the regular one, so it may be waited for as long
+        return other if self.faulty else None
+
+
+class LivenessTracker:
+    """ Reports nodes which stopped publishing Current Status.
+
+    Publication interval of every node is learned from the intervals between its Current
+    Statuses, separately with and without faults, since Health Servers with registered faults
+    publish Fast Period Divisor times more often. A node is reported missing when it has not
+    published for the given number of its intervals. Deadlines of all nodes are kept in a
+    single heap, so each status costs O(log n) regardless of the number of tracked nodes.
+
+    A publication received through several modems is counted once: a status identical to
+    the last one of the node within the duplicate window is ignored, and a status arriving
+    within a fraction of the learned interval keeps the node alive without being learned.
+    """
+
+    NODE_MISSING = "node_missing"
+    NODE_BACK = "node_back"
+
+    # Intervals shorter than this part of the learned one are not publications of the period
+    SHORT_INTERVAL_RATIO = 0.25
+
+    def __init__(self, missed_publications=3, smoothing=0.25, clock=time.time, duplicate_window=1.0):
+        """ Initialize tracker
+
+        :param missed_publications: float,    Number of publication intervals after which node is missing.
+        :param smoothing:           float,    Weight of the last interval in the learned one, 1.0 keeps the last only.
+        :param clock:               Callable, Wall clock time source.
+        :param duplicate_window:    float,    Time within which a status identical to the last one is a duplicate.
+        :return:                    None
+        """
+        if missed_publications <= 1 or not 0 < smoothing <= 1:
+            raise ValueError("Missed publications must be above 1 and smoothing within (0, 1]")
+
+        self._missed_publications = missed_publications
+        self._smoothing = smoothing
+        self._clock = clock
+        self._duplicate_window = duplicate_window
+        self._cond = threading.Condition()
+        self._nodes = {}
+        self._deadlines = []
+        self._listeners = []
+        self._running = False
+        self._thread = None
+
+    def __len__(self):
+        with self._cond:
+            return len(self._nodes)
+
+    def expected_interval(self, src_addr):
+        """ Get learned publication interval of node in its current fault state.
+
+        :param src_addr: int, Node address.
+        :return:         float, None if it is not learned yet
+        """
+        with self._cond:
+            node = self._nodes.get(src_addr)
+            return None if node is None else node.expected_interval()
+
+    def add_listener(self, listener):
+        """ Register function called with every LivenessChange.
+
+        :param listener: Callable[[LivenessChange], None], Change listener.
+        :return:         None
+        """
+        self._listeners.append(listener)
+
+    def on_status(self, status, timestamp=None):
+        """ Feed decoded Current Status or Period Status.
+
+        :param status:    CurrentStatus or PeriodStatus, Decoded status, other statuses are ignored.
+        :param timestamp: float,                         Status reception time, clock is used if None.
+        :return:          LivenessChange, None if node has not been missing
+        """
+        if status.src_addr is None:
+            return None
+
+        if isinstance(status, PeriodStatus):
+            with self._cond:
+                self._nodes.setdefault(status.src_addr, _NodeLiveness()).fast_period_divisor = \
+                    status.fast_period_divisor
+
+            return None
+
+        if not isinstance(status, CurrentStatus):
+            return None
+
+        timestamp = self._clock() if timestamp is None else timestamp
+        faulty = bool(status.fault_set)
+        change = None
+
+        with self._cond:
+            node = self._nodes.get(status.src_addr)
+
+            if node is None:
+                node = self._nodes[status.src_addr] = _NodeLiveness()
+
+            # The same publication received through another modem
+            if status == node.last_status and 0 <= timestamp - node.last_seen < self._duplicate_window:
+                return None
+
+            if node.missing:
+                change = LivenessChange(self.NODE_BACK, status.src_addr, timestamp, node.last_seen,
+                                        node.expected_interval())
+
+            # Interval spanning fault state change is not learned
+            if node.published_at is None or node.faulty != faulty or self._learn(node, timestamp - node.published_at):
+                node.published_at = timestamp
+
+            node.last_seen = timestamp
+            node.last_status = status
+            node.faulty = faulty
+            node.missing = False
+            self._schedule(status.src_addr, node)
+
+        if change is not None:
+            self._notify(change)
+
+        return change
+
+    def expire(self, now=None):
+        """ Report nodes whose publications stopped.
+
+        :param now: float, Current time, clock is used if None.
+        :return:    list[LivenessChange]
+        """
+        now = self._clock() if now is None else now
+        changes = []
+
+        with self._cond:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, src_addr = heapq.heappop(self._deadlines)
+                node = self._nodes.get(src_addr)
+
+                # Entries of nodes rescheduled since they were pushed are skipped
+                if node is None or node.missing or node.deadline != deadline:
+                    continue
+
+                node.missing = True
+                node.deadline = None
+                changes.append(LivenessChange(self.NODE_MISSING, src_addr, now, node.last_seen,
+                                              node.expected_interval()))
+
+        for change in changes:
+            self._notify(change)
+
+        return changes
+
+    def start(self):
+        """ Start thread reporting missing nodes.
+
+        :return: None
+        """
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+
+        self._thread = threading.Thread(target=self._watch, name="LivenessTracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop reporting thread.
+
+        :return: None
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _learn(self, node, observed):
+        interval = node.intervals[node.faulty]
+
+        # Statuses far more frequent than the publications, e.g. duplicates with changed payload, are not learned
+        # and the next interval is still measured from the last publication
+        if interval is not None and observed < interval * self.SHORT_INTERVAL_RATIO:
+            return False
+
+        # A publication lost in the mesh makes the interval twice as long, so a single long interval
+        # is not learned, consecutive ones mean the publish period has been changed
+        if interval is not None and observed > interval * 1.5:
+            node.long_intervals += 1
+
+            if node.long_intervals < 2:
+                return True
+
+        elif interval is not None:
+            observed = interval + self._smoothing * (observed - interval)
+
+        node.long_intervals = 0
+        node.intervals[node.faulty] = observed
+        return True
+
+    def _schedule(self, src_addr, node):
+        interval = node.expected_interval()
+
+        if interval is None:
+            node.deadline = None
+            return
+
+        node.deadline = node.last_seen + interval * self._missed_publications
+        heapq.heappush(self._deadlines, (node.deadline, src_addr))
+
+        # Stale entries are dropped once they outnumber the nodes
+        if len(self._deadlines) > 2 * len(self._nodes) + 64:
+            self._deadlines = [(other.deadline, addr) for addr, other in self._nodes.items()
+                               if other.deadline is not None]
+            heapq.heapify(self._deadlines)
+
+        if self._deadlines[0][1] == src_addr:
+            self._cond.notify_all()
+
+    def _watch(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+
+                if not self._deadlines:
+                    self._cond.wait()
+                    continue
+
+                wait_s = self._deadlines[0][0] - self._clock()
+
+                if wait_s > 0:
+                    self._cond.wait(wait_s)
+                    continue
+
+            self.expire()
+
+    def _notify(self, change):
+        for listener in self._listeners:
+            listener(change)
@@ -17,3 +17,15 @@ class HealthClientOpcodes(enum.IntEnum):
     PERIOD_SET = 0x8035
     PERIOD_SET_UNACKNOWLEDGED = 0x8036
     PERIOD_STATUS = 0x8037
+
+
+# Acknowledged request opcode to the status opcode it is answered with
+ACKNOWLEDGED_STATUS_OPCODES = {
+    HealthClientOpcodes.ATTENTION_GET: HealthClientOpcodes.ATTENTION_STATUS,
+    HealthClientOpcodes.ATTENTION_SET: HealthClientOpcodes.ATTENTION_STATUS,
+    HealthClientOpcodes.FAULT_GET: HealthClientOpcodes.FAULT_STATUS,
+    HealthClientOpcodes.FAULT_CLEAR: HealthClientOpcodes.FAULT_STATUS,
+    HealthClientOpcodes.FAULT_TEST: HealthClientOpcodes.FAULT_STATUS,
+    HealthClientOpcodes.PERIOD_GET: HealthClientOpcodes.PERIOD_STATUS,
+    HealthClientOpcodes.PERIOD_SET: HealthClientOpcodes.PERIOD_STATUS
+}
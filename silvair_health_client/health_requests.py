@@ -0,0 +1,510 @@
+import collections
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from concurrent.futures import Future
+
+from silvair_health_client.health_opcodes import HealthClientOpcodes, ACKNOWLEDGED_STATUS_OPCODES
+from silvair_health_client.health_status import STATUS_PAYLOAD_LEN, status_src_addr
+
+
+DEFAULT_REQUEST_TIMEOUT_S = 5.0
+
+
+class HealthRequestTimeout(Exception):
+    """ Matching status has not been received before the request deadline """
+
+    def __init__(self, request):
+        super(HealthRequestTimeout, self).__init__(
+            "No status for opcode 0x{:04x} (dst_addr: {}) after {} attempt(s)".format(
+                request.opcode,
+                "publication" if request.dst_addr is None else "0x{:04x}".format(request.dst_addr),
+                request.attempts))
+        self.request = request
+
+
+class RetryPolicy:
+    """ Re-sending of acknowledged requests which status has not been received in time.
+
+    Every next attempt waits for the status longer, timeout is multiplied by backoff and
+    randomized by jitter, so retries of many requests do not collide again.
+    """
+
+    def __init__(self, max_attempts=3, backoff=2.0, jitter=0.2, rng=random.random):
+        """ Initialize policy
+
+        :param max_attempts: int,      Maximum number of times a request is sent.
+        :param backoff:      float,    Timeout multiplier of every next attempt.
+        :param jitter:       float,    Maximum relative random change of the timeout.
+        :param rng:          Callable, Random number generator returning values in [0, 1).
+        :return:             None
+        """
+        if max_attempts < 1:
+            raise ValueError("At least one attempt is required")
+
+        self.max_attempts = max_attempts
+        self._backoff = backoff
+        self._jitter = jitter
+        self._rng = rng
+
+    def timeout(self, base_timeout, attempt):
+        """ Timeout of the attempt.
+
+        :param base_timeout: float, Timeout of the first attempt in seconds.
+        :param attempt:      int,   Attempt number, starting from 1.
+        :return:             float
+        """
+        if attempt == 1:
+            return base_timeout
+
+        return base_timeout * self._backoff ** (attempt - 1) * (1.0 + self._jitter * (2.0 * self._rng() - 1.0))
+
+
+class RetryBudget:
+    """ Number of retries shared by many requests, e.g. by all requests of a sweep.
+
+    It is given to the requests explicitly, see HealthClient.with_retry_budget.
+    """
+
+    def __init__(self, retries):
+        self._remaining = retries
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return self._remaining
+
+    def take(self):
+        """ Use one retry.
+
+        :return: bool, False if budget is exhausted
+        """
+        with self._lock:
+            if self._remaining <= 0:
+                return False
+
+            self._remaining -= 1
+            return True
+
+
+def _copy_future_state(source, destination):
+    # Coalesced request has been sent as many times as the one it has been merged with
+    destination.request.attempts = source.request.attempts
+
+    if source.cancelled():
+        destination.cancel()
+    elif not destination.set_running_or_notify_cancel():
+        # Coalesced request has been cancelled by its caller
+        return
+    elif source.exception() is not None:
+        destination.set_exception(source.exception())
+    else:
+        destination.set_result(source.result())
+
+
+class PendingHealthRequest:
+    """ Acknowledged Health request waiting for its status.
+
+    Its future refers back to it as future.request, so that the number of attempts
+    of a completed request is known to the caller.
+    """
+
+    __slots__ = ("opcode", "status_opcode", "dst_addr", "sent_at", "timeout", "deadline", "attempts", "resend",
+                 "budget", "queued", "attempt_timeout", "future")
+
+    def __init__(self, opcode, status_opcode, dst_addr, sent_at, timeout, resend=None, budget=None, queued=False):
+        self.opcode = opcode
+        self.status_opcode = status_opcode
+        self.dst_addr = dst_addr
+        self.sent_at = sent_at
+        self.timeout = timeout
+        # Request waiting in an outbound queue has no deadline until it is sent
+        self.queued = queued
+        self.attempt_timeout = timeout
+        self.deadline = None if queued else sent_at + timeout
+        self.attempts = 1
+        self.resend = resend
+        self.budget = budget
+        self.future = Future()
+        self.future.request = self
+
+    @property
+    def key(self):
+        return self.status_opcode, self.dst_addr
+
+
+class HealthRequestTracker:
+    """ Correlates acknowledged Health requests with received status messages.
+
+    Pending requests are keyed by the expected status opcode and the destination
+    address. A request sent to the model publication address (dst_addr None) is
+    answered by the first matching status from any source.
+
+    With a retry policy, requests which can be re-sent are sent again on their deadline
+    until they run out of attempts or of their retry budget. After a retried unicast
+    request has been completed, up to one status per extra attempt identical to the one
+    which completed it is recognized as a late duplicate, unless a newer request waits
+    for it. Other statuses of the node are handled as usual.
+    """
+
+    def __init__(self, timeout=DEFAULT_REQUEST_TIMEOUT_S, clock=time.monotonic, metrics=None, retry_policy=None):
+        """ Initialize tracker
+
+        :param timeout:      float,               Default request timeout in seconds.
+        :param clock:        Callable,            Monotonic time source.
+        :param metrics:      HealthClientMetrics, Metrics latency and timeouts are recorded in.
+        :param retry_policy: RetryPolicy,         Policy of re-sending requests, requests are not re-sent if None.
+        :return:             None
+        """
+        self._timeout = timeout
+        self._clock = clock
+        self._metrics = metrics
+        self._retry_policy = retry_policy
+        # (status opcode, src_addr) of completed retried requests to [payload, remaining duplicates, expiry time]
+        self._completed_retried = {}
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._deadlines = []
+        self._seq = itertools.count()
+        self._stats = collections.Counter()
+        self._thread = None
+        self._running = False
+
+    @property
+    def pending_count(self):
+        with self._cond:
+            return sum(len(requests) for requests in self._pending.values())
+
+    @property
+    def stats(self):
+        """ Counters: sent, completed, timed_out, retried, unmatched, coalesced, duplicates. """
+        with self._cond:
+            return dict(self._stats)
+
+    def track(self, opcode, dst_addr=None, timeout=None, resend=None, budget=None, queued=False):
+        """ Register acknowledged request before it is sent.
+
+        :param opcode:   HealthClientOpcodes, Request opcode.
+        :param dst_addr: int,                 Destination address, None for the publication address.
+        :param timeout:  float,               Request timeout in seconds, tracker default if None.
+        :param resend:   Callable[[], None],  Sends the request again without blocking, request is not retried if None.
+        :param budget:   RetryBudget,         Retries shared with other requests, limited by the policy only if None.
+        :param queued:   bool,                Request waits in an outbound queue, its timeout starts with sent.
+        :return:         PendingHealthRequest
+        """
+        status_opcode = ACKNOWLEDGED_STATUS_OPCODES[opcode]
+        request = PendingHealthRequest(opcode, status_opcode, dst_addr, self._clock(),
+                                       self._timeout if timeout is None else timeout, resend, budget, queued)
+
+        with self._cond:
+            self._pending.setdefault(request.key, collections.deque()).append(request)
+
+            if request.deadline is not None:
+                self._push_deadline(request)
+
+            self._stats["sent"] += 1
+
+        request.future.add_done_callback(lambda future: self._forget_cancelled(request))
+        return request
+
+    def sent(self, request):
+        """ Start timeout of the queued request, which has just left the outbound queue.
+
+        :param request: PendingHealthRequest, Request returned by track with queued set.
+        :return:        bool, False if request is no longer pending
+        """
+        with self._cond:
+            requests = self._pending.get(request.key)
+
+            if requests is None or request not in requests or request.future.cancelled():
+                return False
+
+            now = self._clock()
+
+            # Latency is measured from the first attempt
+            if request.attempts == 1:
+                request.sent_at = now
+
+            request.deadline = now + request.attempt_timeout
+            self._push_deadline(request)
+
+        return True
+
+    def join(self, request):
+        """ Complete request together with an older pending one, when it has been coalesced with it.
+
+        :param request: PendingHealthRequest, Request returned by track, which has not been sent.
+        :return:        bool, False if there is no older pending request with the same opcode and destination
+        """
+        with self._cond:
+            leader = next((pending for pending in self._pending.get(request.key, ())
+                           if pending is not request and pending.opcode == request.opcode), None)
+
+            if leader is None:
+                return False
+
+            self._remove(request)
+            self._stats["sent"] -= 1
+            self._stats["coalesced"] += 1
+
+        leader.future.add_done_callback(lambda future: _copy_future_state(future, request.future))
+        return True
+
+    def discard(self, request):
+        """ Forget request which could not be sent.
+
+        :param request: PendingHealthRequest, Request returned by track.
+        :return:        None
+        """
+        with self._cond:
+            self._remove(request)
+            self._stats["sent"] -= 1
+
+        request.future.cancel()
+
+    def resolve(self, status_opcode, src_addr, result):
+        """ Complete the oldest request matching received status.
+
+        :param status_opcode: HealthClientOpcodes, Received status opcode.
+        :param src_addr:      int,                 Status source address, None if unknown.
+        :param result:        object,              Value the request future is resolved with.
+        :return:              bool, True if status has been matched with a request
+        """
+        return self._resolve(status_opcode, src_addr, result)[0]
+
+    def _resolve(self, status_opcode, src_addr, result):
+        now = self._clock()
+        duplicate = False
+
+        with self._cond:
+            request = self._pop_matching((status_opcode, src_addr))
+
+            if request is None and src_addr is not None:
+                request = self._pop_matching((status_opcode, None))
+
+            if request is not None:
+                self._stats["completed"] += 1
+
+                # Every earlier attempt may be answered with the same status
+                if request.attempts > 1 and request.dst_addr is not None:
+                    self._completed_retried[request.key] = [result, request.attempts - 1, now + request.timeout]
+                elif src_addr is not None:
+                    # Status of a newer request to the node cannot be told apart from a late duplicate
+                    self._completed_retried.pop((status_opcode, src_addr), None)
+
+            # Late duplicate is recognized only when no request waits for the status
+            elif self._is_late_duplicate((status_opcode, src_addr), result, now):
+                duplicate = True
+                self._stats["duplicates"] += 1
+
+            else:
+                self._stats["unmatched"] += 1
+
+        if self._metrics is not None:
+            if request is not None:
+                self._metrics.on_request_completed(request.opcode, now - request.sent_at)
+            elif not duplicate:
+                self._metrics.on_unmatched_status(status_opcode)
+
+        if request is None:
+            return False, duplicate
+
+        request.future.set_result(result)
+        return True, False
+
+    def on_mesh_status(self, opcode, mesh_command):
+        """ Feed status message received from the UART Modem.
+
+        :param opcode:       int,   Status opcode.
+        :param mesh_command: bytes, Status message payload.
+        :return:             bool, True if status has been matched with a request
+        """
+        return self._on_mesh_status(opcode, mesh_command)[0]
+
+    def accept_status(self, opcode, mesh_command):
+        """ Feed status message received from the UART Modem and tell if it should be handled further.
+
+        :param opcode:       int,   Status opcode.
+        :param mesh_command: bytes, Status message payload.
+        :return:             bool, False if status is a late duplicate of a retried request
+        """
+        return not self._on_mesh_status(opcode, mesh_command)[1]
+
+    def _on_mesh_status(self, opcode, mesh_command):
+        if opcode not in STATUS_PAYLOAD_LEN or opcode == HealthClientOpcodes.CURRENT_STATUS:
+            return False, False
+
+        return self._resolve(opcode, status_src_addr(opcode, mesh_command), mesh_command)
+
+    def expire(self, now=None):
+        """ Re-send or fail requests which deadline has passed.
+
+        :param now: float, Current time, clock is used if None.
+        :return:    list[PendingHealthRequest], expired requests
+        """
+        now = self._clock() if now is None else now
+        expired = []
+        resent = []
+
+        with self._cond:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, _, request = heapq.heappop(self._deadlines)
+
+                # Entry is stale when the request has been completed or re-armed
+                if deadline != request.deadline or request not in self._pending.get(request.key, ()):
+                    continue
+
+                if self._can_retry(request):
+                    request.attempts += 1
+                    request.attempt_timeout = self._retry_policy.timeout(request.timeout, request.attempts)
+
+                    if request.queued:
+                        request.deadline = None
+                    else:
+                        request.deadline = now + request.attempt_timeout
+                        self._push_deadline(request)
+
+                    self._stats["retried"] += 1
+                    resent.append(request)
+                    continue
+
+                self._remove(request)
+
+                # Request cancelled by its caller is dropped without failing its future
+                if not request.future.set_running_or_notify_cancel():
+                    continue
+
+                expired.append(request)
+                self._stats["timed_out"] += 1
+
+            for key, (_, _, duplicates_until) in list(self._completed_retried.items()):
+                if duplicates_until <= now:
+                    del self._completed_retried[key]
+
+        for request in resent:
+            if self._metrics is not None:
+                self._metrics.on_request_retried(request.opcode)
+
+            try:
+                request.resend()
+            except Exception:
+                # Request is failed on its deadline if it cannot be sent again
+                request.resend = None
+
+                if request.queued:
+                    self.sent(request)
+
+        for request in expired:
+            if self._metrics is not None:
+                self._metrics.on_request_timeout(request.opcode)
+
+            request.future.set_exception(HealthRequestTimeout(request))
+
+        return expired
+
+    def start(self):
+        """ Start thread expiring requests on their deadlines.
+
+        :return: None
+        """
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+
+        self._thread = threading.Thread(target=self._expire_loop, name="HealthRequestTracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop expiring thread.
+
+        :return: None
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _expire_loop(self):
+        while True:
+            with self._cond:
+                if not self._running:
+                    return
+
+                wait_s = self._deadlines[0][0] - self._clock() if self._deadlines else None
+
+                if wait_s is None or wait_s > 0:
+                    self._cond.wait(wait_s)
+
+            self.expire()
+
+    def _can_retry(self, request):
+        if self._retry_policy is None or request.resend is None or request.future.cancelled():
+            return False
+
+        if request.attempts >= self._retry_policy.max_attempts:
+            return False
+
+        return request.budget is None or request.budget.take()
+
+    def _is_late_duplicate(self, key, result, now):
+        completed = self._completed_retried.get(key)
+
+        if completed is None or completed[2] <= now or completed[0] != result:
+            return False
+
+        completed[1] -= 1
+
+        if completed[1] == 0:
+            del self._completed_retried[key]
+
+        return True
+
+    def _forget_cancelled(self, request):
+        # Request cancelled by its caller is not waited for any longer
+        if request.future.cancelled():
+            with self._cond:
+                self._remove(request)
+
+    def _push_deadline(self, request):
+        is_earliest = not self._deadlines or request.deadline < self._deadlines[0][0]
+        heapq.heappush(self._deadlines, (request.deadline, next(self._seq), request))
+
+        if is_earliest:
+            self._cond.notify()
+
+    def _pop_matching(self, key):
+        requests = self._pending.get(key)
+
+        while requests:
+            request = requests.popleft()
+
+            if not requests:
+                del self._pending[key]
+
+            # Future of the popped request can no longer be cancelled, so it is safe to complete it
+            if request.future.set_running_or_notify_cancel():
+                return request
+
+        return None
+
+    def _remove(self, request):
+        requests = self._pending.get(request.key)
+
+        if requests is None or request not in requests:
+            return False
+
+        requests.remove(request)
+
+        if not requests:
+            del self._pending[request.key]
+
+        return True
@@ -0,0 +1,258 @@
+import collections
+import sqlite3
+import threading
+import time
+
+from silvair_health_client.health_faults import HealthFaults, FaultSet, ALL_FAULTS
+from silvair_health_client.health_status import CurrentStatus
+
+
+FaultStateChange = collections.namedtuple("FaultStateChange",
+                                          ["kind", "src_addr", "timestamp", "company_id", "faults", "raised", "cleared"])
+
+NodeFaultState = collections.namedtuple("NodeFaultState",
+                                        ["src_addr", "timestamp", "company_id", "test_id", "faults", "silent"])
+
+
+class FaultStateStore:
+    """ Last fault state of every node, emitting events only when it changes.
+
+    The state is the current faults of the node, reported by Current Status. Fault Status
+    carries the registered faults, which differ from the current ones, so it is ignored.
+
+    Every change and the first status of every node are appended to an SQLite log, the
+    latest state of each node is loaded from it on start, so a restarted client does not
+    report known faults again. The log is committed by the store thread every commit
+    interval and on close, not on the thread feeding statuses.
+    """
+
+    FAULTS_CHANGED = "faults_changed"
+    NODE_SILENT = "node_silent"
+    NODE_BACK = "node_back"
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fault_log (
+            timestamp REAL NOT NULL,
+            src_addr INTEGER NOT NULL,
+            company_id INTEGER NOT NULL,
+            test_id INTEGER NOT NULL,
+            faults BLOB NOT NULL,
+            silent INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS fault_log_src_addr ON fault_log (src_addr);
+    """
+
+    def __init__(self, path=":memory:", silence_timeout=None, clock=time.time, commit_interval=1.0):
+        """ Initialize store
+
+        :param path:            str,      SQLite database path, in memory if not given.
+        :param silence_timeout: float,    Seconds without status after which node is reported silent, never if None.
+        :param clock:           Callable, Wall clock time source.
+        :param commit_interval: float,    Seconds between commits of the log by the store thread.
+        :return:                None
+        """
+        self._silence_timeout = silence_timeout
+        self._commit_interval = commit_interval
+        self._uncommitted = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._nodes = {}
+        # Fault code to the nodes which have it registered, and bits of the codes any node has registered
+        self._nodes_by_fault = {}
+        self._present_faults = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(self._SCHEMA)
+        self._load()
+        self._loaded_at = self._clock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._nodes)
+
+    def __getitem__(self, src_addr):
+        with self._lock:
+            return self._nodes[src_addr]
+
+    def nodes_with_faults(self, faults=ALL_FAULTS):
+        """ Get nodes which have any of the faults registered now.
+
+        :param faults: FaultSet, Faults, e.g. ERROR_FAULTS, any fault by default.
+        :return:       list of int, sorted source addresses
+        """
+        with self._lock:
+            src_addrs = set()
+
+            # Only the index entries of the faults registered by any node are visited
+            for fault in FaultSet(faults.bits & self._present_faults):
+                src_addrs.update(self._nodes_by_fault[fault])
+
+            return sorted(src_addrs)
+
+    def add_listener(self, listener):
+        """ Register function called with every FaultStateChange.
+
+        :param listener: Callable[[FaultStateChange], None], Change listener.
+        :return:         None
+        """
+        self._listeners.append(listener)
+
+    def on_status(self, status, timestamp=None):
+        """ Update node state with decoded Current Status.
+
+        :param status:    CurrentStatus, Decoded status, other records are ignored.
+        :param timestamp: float,         Status reception time, clock is used if None.
+        :return:          FaultStateChange, None if fault state has not changed
+        """
+        if status.src_addr is None or not isinstance(status, CurrentStatus):
+            return None
+
+        timestamp = self._clock() if timestamp is None else timestamp
+        faults = frozenset(fault for fault in status.faults if fault != HealthFaults.NO_FAULT)
+
+        with self._lock:
+            previous = self._nodes.get(status.src_addr)
+            state = NodeFaultState(status.src_addr, timestamp, status.company_id, status.test_id, faults, False)
+            self._nodes[status.src_addr] = state
+
+            previous_faults = frozenset() if previous is None else previous.faults
+            faults_changed = faults != previous_faults
+
+            if faults_changed:
+                self._index(status.src_addr, previous_faults, faults)
+
+            if faults_changed:
+                kind = self.FAULTS_CHANGED
+            elif previous is not None and previous.silent:
+                kind = self.NODE_BACK
+            else:
+                kind = None
+
+            # First status of a node without faults is not a change, but the node is known after restart
+            if kind is None and previous is not None:
+                return None
+
+            self._append(state)
+
+        if kind is None:
+            return None
+
+        change = FaultStateChange(kind, status.src_addr, timestamp, status.company_id, faults,
+                                  faults - previous_faults, previous_faults - faults)
+        self._notify(change)
+
+        return change
+
+    def expire_silent(self, now=None):
+        """ Report nodes which have not sent status within silence timeout.
+
+        :param now: float, Current time, clock is used if None.
+        :return:    list[FaultStateChange]
+        """
+        if self._silence_timeout is None:
+            return []
+
+        now = self._clock() if now is None else now
+        changes = []
+
+        with self._lock:
+            for state in list(self._nodes.values()):
+                # Nodes loaded from the log are given full timeout after restart
+                if state.silent or now - max(state.timestamp, self._loaded_at) < self._silence_timeout:
+                    continue
+
+                state = state._replace(silent=True)
+                self._nodes[state.src_addr] = state
+                self._append(state)
+
+                changes.append(FaultStateChange(self.NODE_SILENT, state.src_addr, now, state.company_id,
+                                                state.faults, frozenset(), frozenset()))
+
+        for change in changes:
+            self._notify(change)
+
+        return changes
+
+    def commit(self):
+        """ Commit changes appended to the log since the last commit.
+
+        :return: None
+        """
+        with self._lock:
+            if self._uncommitted:
+                self._db.commit()
+                self._uncommitted = 0
+
+    def start(self):
+        """ Start thread committing the log and reporting silent nodes.
+
+        :return: None
+        """
+        if self._thread is not None:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._expire_loop, name="FaultStateStore", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop reporting thread.
+
+        :return: None
+        """
+        self._stop_event.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.commit()
+
+        with self._lock:
+            self._db.close()
+
+    def _expire_loop(self):
+        interval = self._commit_interval
+
+        if self._silence_timeout is not None:
+            interval = min(interval, self._silence_timeout / 4)
+
+        while not self._stop_event.wait(interval):
+            self.expire_silent()
+            self.commit()
+
+    def _notify(self, change):
+        for listener in self._listeners:
+            listener(change)
+
+    def _append(self, state):
+        self._db.execute("INSERT INTO fault_log VALUES (?, ?, ?, ?, ?, ?)",
+                         (state.timestamp, state.src_addr, state.company_id, state.test_id,
+                          bytes(sorted(state.faults)), int(state.silent)))
+        self._uncommitted += 1
+
+    def _load(self):
+        rows = self._db.execute("SELECT timestamp, src_addr, company_id, test_id, faults, silent FROM fault_log "
+                                "WHERE rowid IN (SELECT MAX(rowid) FROM fault_log GROUP BY src_addr)")
+
+        for timestamp, src_addr, company_id, test_id, faults, silent in rows:
+            self._nodes[src_addr] = NodeFaultState(src_addr, timestamp, company_id, test_id,
+                                                   frozenset(faults), bool(silent))
+            self._index(src_addr, frozenset(), frozenset(faults))
+
+    def _index(self, src_addr, previous_faults, faults):
+        for fault in previous_faults - faults:
+            nodes = self._nodes_by_fault[fault]
+            nodes.discard(src_addr)
+
+            if not nodes:
+                del self._nodes_by_fault[fault]
+                self._present_faults &= ~(1 << fault)
+
+        for fault in faults - previous_faults:
+            self._nodes_by_fault.setdefault(fault, set()).add(src_addr)
+            self._present_faults |= 1 << fault
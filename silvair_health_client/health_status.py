@@ -0,0 +1,157 @@
+""" Health status messages decoder.
+
+Decoders work directly on the received buffer and return compact tuple records.
+The `faults` field of Fault and Current Status records is a memoryview over the
+decoded buffer, convert it with bytes() to keep it beyond the buffer lifetime, or use
+the `fault_set` property for set operations with fault masks.
+
+The UART Modem appends the 2 byte source address to every status payload. Attention and
+Period Status payloads are 1 byte long, or 3 bytes with the address. A Fault or Current
+Status payload holds the address when it is at least 5 bytes long (the 3 byte header and
+the address), shorter ones are decoded with src_addr None. Payloads which do not fit these
+lengths, e.g. an empty one, raise ValueError.
+"""
+import collections
+import struct
+
+from silvair_health_client.health_faults import FaultSet
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+
+
+AttentionStatus = collections.namedtuple("AttentionStatus", ["attention", "src_addr"])
+PeriodStatus = collections.namedtuple("PeriodStatus", ["fast_period_divisor", "src_addr"])
+
+
+class _FaultSetMixin:
+    __slots__ = ()
+
+    @property
+    def fault_set(self):
+        """ Registered faults as FaultSet, for set operations with fault masks """
+        return FaultSet.from_codes(self.faults)
+
+
+class FaultStatus(_FaultSetMixin,
+                  collections.namedtuple("FaultStatus", ["test_id", "company_id", "faults", "src_addr"])):
+    __slots__ = ()
+
+
+class CurrentStatus(_FaultSetMixin,
+                    collections.namedtuple("CurrentStatus", ["test_id", "company_id", "faults", "src_addr"])):
+    __slots__ = ()
+
+
+_GENERIC_HEADER = struct.Struct("<BH")
+_ADDR = struct.Struct("<H")
+
+# Length of the status payload preceding the source address appended by the UART Modem
+STATUS_PAYLOAD_LEN = {
+    HealthClientOpcodes.CURRENT_STATUS: _GENERIC_HEADER.size,
+    HealthClientOpcodes.FAULT_STATUS: _GENERIC_HEADER.size,
+    HealthClientOpcodes.ATTENTION_STATUS: 1,
+    HealthClientOpcodes.PERIOD_STATUS: 1
+}
+
+
+def status_src_addr(opcode, mesh_command):
+    """ Get source address appended by the UART Modem to the status message.
+
+    :param opcode:       int,   Status opcode.
+    :param mesh_command: bytes, Status message payload.
+    :return:             int, source address or None if it is not present
+    """
+    payload_len = STATUS_PAYLOAD_LEN.get(opcode)
+    size = len(mesh_command)
+
+    if payload_len is None or size < payload_len + _ADDR.size:
+        return None
+
+    return _ADDR.unpack_from(mesh_command, size - _ADDR.size)[0]
+
+
+def _decode_octet_status(mesh_command, name):
+    size = len(mesh_command)
+
+    if size == 1:
+        return mesh_command[0], None
+
+    if size == 1 + _ADDR.size:
+        return mesh_command[0], _ADDR.unpack_from(mesh_command, 1)[0]
+
+    raise ValueError("{} payload of {} bytes, expected 1 or {}".format(name, size, 1 + _ADDR.size))
+
+
+def decode_attention_status(mesh_command):
+    """ Decode Attention Status message.
+
+    :param mesh_command: bytes, Message payload.
+    :return:             AttentionStatus
+    :raises:             ValueError, when payload is neither 1 nor 3 bytes long
+    """
+    return AttentionStatus(*_decode_octet_status(mesh_command, "Attention Status"))
+
+
+def decode_period_status(mesh_command):
+    """ Decode Period Status message.
+
+    :param mesh_command: bytes, Message payload.
+    :return:             PeriodStatus
+    :raises:             ValueError, when payload is neither 1 nor 3 bytes long
+    """
+    return PeriodStatus(*_decode_octet_status(mesh_command, "Period Status"))
+
+
+def decode_fault_status(mesh_command, status_type=FaultStatus):
+    """ Decode Fault Status message.
+
+    :param mesh_command: bytes, Message payload.
+    :param status_type:  type,  Record type, FaultStatus or CurrentStatus.
+    :return:             FaultStatus
+    :raises:             ValueError, when payload is shorter than the status header
+    """
+    view = memoryview(mesh_command)
+    size = len(view)
+
+    if size < _GENERIC_HEADER.size:
+        raise ValueError("{} payload of {} bytes, expected at least {}".format(status_type.__name__, size,
+                                                                                _GENERIC_HEADER.size))
+
+    test_id, company_id = _GENERIC_HEADER.unpack_from(view)
+
+    if size >= _GENERIC_HEADER.size + _ADDR.size:
+        return status_type(test_id, company_id, view[_GENERIC_HEADER.size:size - _ADDR.size],
+                           _ADDR.unpack_from(view, size - _ADDR.size)[0])
+
+    return status_type(test_id, company_id, view[_GENERIC_HEADER.size:], None)
+
+
+def decode_current_status(mesh_command):
+    """ Decode Current Status message.
+
+    :param mesh_command: bytes, Message payload.
+    :return:             CurrentStatus
+    """
+    return decode_fault_status(mesh_command, CurrentStatus)
+
+
+STATUS_DECODERS = {
+    HealthClientOpcodes.ATTENTION_STATUS: decode_attention_status,
+    HealthClientOpcodes.PERIOD_STATUS: decode_period_status,
+    HealthClientOpcodes.FAULT_STATUS: decode_fault_status,
+    HealthClientOpcodes.CURRENT_STATUS: decode_current_status
+}
+
+
+def decode_status(opcode, mesh_command):
+    """ Decode Health status message.
+
+    :param opcode:       int,   Status opcode.
+    :param mesh_command: bytes, Message payload.
+    :return:             status record, None if opcode is not a Health status
+    """
+    decoder = STATUS_DECODERS.get(opcode)
+
+    if decoder is None:
+        return None
+
+    return decoder(mesh_command)
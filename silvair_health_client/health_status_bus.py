@@ -0,0 +1,143 @@
+import functools
+import threading
+
+from silvair_health_client.health_faults import HealthFaults
+from silvair_health_client.health_status import STATUS_DECODERS
+
+
+class StatusFilter:
+    """ Condition a decoded status record has to meet to be delivered to a subscriber """
+
+    __slots__ = ("src_ranges", "company_id", "faults_only")
+
+    def __init__(self, src_ranges=None, company_id=None, faults_only=False):
+        """ Initialize filter
+
+        :param src_ranges:  Iterable[range], Accepted source addresses, any if None.
+        :param company_id:  int,             Accepted Company Id of Fault and Current Status, any if None.
+        :param faults_only: bool,            Accept only Fault and Current Status with registered faults.
+        :return:            None
+        """
+        self.src_ranges = None if src_ranges is None else tuple(src_ranges)
+        self.company_id = company_id
+        self.faults_only = faults_only
+
+    def matches(self, record):
+        """ Check record meets the filter.
+
+        :param record: status record, Decoded status.
+        :return:       bool
+        """
+        if self.src_ranges is not None:
+            if record.src_addr is None or not any(record.src_addr in src_range for src_range in self.src_ranges):
+                return False
+
+        if self.company_id is not None and getattr(record, "company_id", None) != self.company_id:
+            return False
+
+        if self.faults_only:
+            return any(fault != HealthFaults.NO_FAULT for fault in getattr(record, "faults", ()))
+
+        return True
+
+
+class HealthStatusBus:
+    """ Delivers Health statuses to every subscriber of their opcode.
+
+    A status is decoded once and the record is passed to the subscribers whose
+    filter it meets. Subscriptions are kept in tuples swapped on change, so
+    statuses are published without locking.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, callback, opcodes=tuple(STATUS_DECODERS), status_filter=None):
+        """ Subscribe function to statuses.
+
+        :param callback:      Callable[[record], None], Function called with decoded status record, and with
+                                                        its reception time as well when it is published with one.
+        :param opcodes:       Iterable[int],            Status opcodes, every Health status by default.
+        :param status_filter: StatusFilter,             Filter records have to meet, every record if None.
+        :return:              tuple, subscription to be passed to unsubscribe
+        """
+        subscription = (callback, status_filter)
+        opcodes = tuple(opcodes)
+
+        for opcode in opcodes:
+            if opcode not in STATUS_DECODERS:
+                raise ValueError("Not a Health status opcode: 0x{:04x}".format(opcode))
+
+        with self._lock:
+            subscribers = dict(self._subscribers)
+
+            for opcode in opcodes:
+                subscribers[opcode] = subscribers.get(opcode, ()) + (subscription,)
+
+            self._subscribers = subscribers
+
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """ Remove subscription.
+
+        :param subscription: tuple, Subscription returned by subscribe.
+        :return:             None
+        """
+        with self._lock:
+            self._subscribers = {opcode: tuple(sub for sub in subscribers if sub is not subscription)
+                                 for opcode, subscribers in self._subscribers.items()}
+
+    def opcode_to_func_map(self):
+        """ Handlers publishing statuses, for HealthClientOpcodesDispatcher or QueuedOpcodesDispatcher.
+
+        :return: dict<HealthClientOpcodes, Callable>, Health Client Opcode to function.
+        """
+        return {opcode: functools.partial(self.publish, opcode) for opcode in STATUS_DECODERS}
+
+    def dispatch(self, opcode, mesh_command, timestamp=None):
+        """ Publish status, HealthClientOpcodesDispatcher interface.
+
+        :param opcode:       int,   Status opcode.
+        :param mesh_command: bytes, Status message payload.
+        :param timestamp:    float, Status reception time, subscribers take it from their clocks if None.
+        :return:             bool, True if status has any subscriber
+        """
+        return self.publish(opcode, mesh_command, timestamp)
+
+    def publish(self, opcode, mesh_command, timestamp=None):
+        """ Decode status and deliver it to the subscribers.
+
+        Every subscriber is called even if one of them raises, the first exception is re-raised.
+
+        :param opcode:       int,   Status opcode.
+        :param mesh_command: bytes, Status message payload.
+        :param timestamp:    float, Status reception time, e.g. of a replayed status, passed on to the subscribers,
+                                    they take it from their clocks if None.
+        :return:             bool, True if status has any subscriber
+        """
+        subscribers = self._subscribers.get(opcode)
+
+        if not subscribers:
+            return False
+
+        record = STATUS_DECODERS[opcode](mesh_command)
+        args = (record,) if timestamp is None else (record, timestamp)
+        error = None
+
+        for callback, status_filter in subscribers:
+            if status_filter is not None and not status_filter.matches(record):
+                continue
+
+            try:
+                callback(*args)
+
+            except Exception as err:
+                if error is None:
+                    error = err
+
+        if error is not None:
+            raise error
+
+        return True
@@ -1,3 +1,37 @@
+import collections
+import itertools
+import threading
+import time
+
+from silvair_health_client.health_status import status_src_addr
+
+
+def is_unicast_address(addr):
+    """ Check address is a unicast address.
+
+    :param addr: int, Mesh address.
+    :return:     bool
+    """
+    return 0x0001 <= addr <= 0x7FFF
+
+
+def is_virtual_address(addr):
+    """ Check address is a virtual address.
+
+    :param addr: int, Mesh address.
+    :return:     bool
+    """
+    return 0x8000 <= addr <= 0xBFFF
+
+
+def is_group_address(addr):
+    """ Check address is a group address, including fixed group addresses.
+
+    :param addr: int, Mesh address.
+    :return:     bool
+    """
+    return 0xC000 <= addr <= 0xFFFF
+
 
 class ModelIdToInstanceIndexMapper(object):
     """ Model Id to Instance Index mapper. """
@@ -5,36 +39,30 @@ class ModelIdToInstanceIndexMapper(object):
     def __init__(self, console_out):
         """ Initalize mapper """
         self._console_out = console_out
-        self._mid_to_iid = []
-        self._instance_index = 1
+        self._mid_to_iids = {}
+        self._iid_to_mid = {}
     
     def map_models_ids(self, model_ids):
-        """ Map model ids on the instance indexes.
+        """ Map model ids on the instance indexes, replacing previous mapping.
 
         :param  model_ids: list[ModelId], List of model indexes.
         :return            None
         """
+        mid_to_iids = {}
+        iid_to_mid = {}
 
-        self._instance_index = 1
-        
-        for model_id in model_ids:
-            self._mid_to_iid.append(model_id)
+        for instance_index, model_id in enumerate(model_ids, start=1):
+            mid_to_iids.setdefault(model_id, []).append(instance_index)
+            iid_to_mid[instance_index] = model_id
             self._console_out.print_standard_message("Mapped model_id to instance_index: {:04x} => {}"
-                                                     .format(model_id, self._instance_index))
+                                                     .format(model_id, instance_index))
 
-            self._instance_index += 1
+        # Indexes are swapped at once, so readers on other threads never see partial mapping
+        self._mid_to_iids, self._iid_to_mid = \
+            {model_id: tuple(iids) for model_id, iids in mid_to_iids.items()}, iid_to_mid
 
     def __getitem__(self, key):
-        instance_index = 1
-        iids = []
-
-        for model_id in self._mid_to_iid:
-            if key == model_id:
-                iids.append(instance_index)
-
-            instance_index += 1
-
-        return tuple(iids)
+        return self._mid_to_iids.get(key, ())
 
     def contains_model_id(self, model_id):
         """ Check Model Id has been mapped onto instance index. 
@@ -42,30 +70,288 @@ class ModelIdToInstanceIndexMapper(object):
         :param model_id: ModelId, Model Id
         :return          bool
         """
-        return any([model_id == mid for mid in self._mid_to_iid])
+        return model_id in self._mid_to_iids
+
+    def model_id(self, instance_index):
+        """ Get Model Id mapped onto instance index.
+
+        :param instance_index: int, Instance index
+        :return                ModelId, None if instance index has not been mapped
+        """
+        return self._iid_to_mid.get(instance_index)
 
 
 class HealthClientOpcodesDispatcher:
     """ Health Client opcodes dispatcher """
     
-    def __init__(self, opcode_to_func_map):
+    def __init__(self, opcode_to_func_map, metrics=None):
         """ Initialize dispatcher 
 
         :param opcode_to_func_map: dict<HealthClientOpcodes, Callable>, Health Client Opcode to function.
+        :param metrics:            HealthClientMetrics,                 Metrics received statuses are recorded in.
         :return                    bool, True if opcode has been dispatched, False otherwise
         """
         self._opcode_to_func_map = opcode_to_func_map
+        self._metrics = metrics
         
         
-    def dispatch(self, opcode, command):
-        """ Dispatch messages """
-        result = True
+    def dispatch(self, opcode, command, timestamp=None):
+        """ Dispatch messages
 
+        :param opcode:    int,   Message opcode.
+        :param command:   bytes, Message payload.
+        :param timestamp: float, Reception time passed on to the handler, e.g. of a replayed status,
+                                 handler takes the time from its clock if None.
+        :return           bool, True if opcode has a handler, False otherwise
+        """
         try:
             func = self._opcode_to_func_map[opcode]
-            func(command)
 
         except KeyError:
-            result = False
+            if self._metrics is not None:
+                self._metrics.on_unknown_opcode(opcode)
+
+            return False
+
+        args = (command,) if timestamp is None else (command, timestamp)
+
+        if self._metrics is None:
+            func(*args)
+            return True
+
+        start_time = time.perf_counter()
+
+        try:
+            func(*args)
+
+        except Exception:
+            self._metrics.on_decode_error(opcode)
+            raise
+
+        self._metrics.on_status_handled(opcode, command, time.perf_counter() - start_time)
+        return True
+
+
+class QueuedOpcodesDispatcher:
+    """ Health Client opcodes dispatcher running handlers on a worker pool.
+
+    Only the handler lookup is done on the calling (UART reader) thread, messages are put
+    to a queue of their source node, shared by at most max_queued messages. Each queue is
+    serviced by one worker at a time, so statuses of a node are handled in order of
+    reception, while statuses of different nodes are handled in parallel. Statuses without
+    source address are ordered per opcode. Messages dispatched after stop are dropped.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+    def __init__(self, opcode_to_func_map, metrics=None, workers=2, max_queued=1000, overflow=DROP_OLDEST,
+                 error_handler=None):
+        """ Initialize dispatcher
+
+        :param opcode_to_func_map: dict<HealthClientOpcodes, Callable>, Health Client Opcode to function.
+        :param metrics:            HealthClientMetrics,                 Metrics received statuses are recorded in.
+        :param workers:            int,                                 Number of worker threads.
+        :param max_queued:         int,                                 Maximum number of queued messages.
+        :param overflow:           str,                                 DROP_OLDEST or BLOCK the caller on full queue,
+                                                                        oldest is dropped until workers are started.
+        :param error_handler:      Callable[[int, bytes, Exception], None], Called when handler raises exception.
+        :return                    None
+        """
+        if overflow not in (self.DROP_OLDEST, self.BLOCK):
+            raise ValueError("Unknown overflow policy: {}".format(overflow))
+
+        if max_queued < 1:
+            raise ValueError("Maximum number of queued messages must be positive")
+
+        self._opcode_to_func_map = opcode_to_func_map
+        self._metrics = metrics
+        self._workers_count = workers
+        self._max_queued = max_queued
+        self._overflow = overflow
+        self._error_handler = error_handler
+        self._cond = threading.Condition()
+        # Ordering key to its queued (sequence number, opcode, command, timestamp), only keys with queued or
+        # handled messages
+        self._queues = {}
+        self._queued = 0
+        self._seq = itertools.count()
+        # Keys with queued messages waiting for a worker, scheduled ones are also being handled
+        self._ready = collections.deque()
+        self._scheduled = set()
+        self._dropped = 0
+        self._running = False
+        self._stopped = False
+        self._workers = []
+
+    @property
+    def dropped(self):
+        with self._cond:
+            return self._dropped
+
+    @property
+    def queued_count(self):
+        with self._cond:
+            return self._queued
+
+    def dispatch(self, opcode, command, timestamp=None):
+        """ Queue message for its handler.
+
+        :param opcode:    int,   Message opcode.
+        :param command:   bytes, Message payload.
+        :param timestamp: float, Reception time passed on to the handler, e.g. of a replayed status,
+                                 handler takes the time from its clock if None.
+        :return           bool, True if opcode has a handler, False otherwise
+        """
+        if opcode not in self._opcode_to_func_map:
+            if self._metrics is not None:
+                self._metrics.on_unknown_opcode(opcode)
+
+            return False
+
+        key = status_src_addr(opcode, command)
+
+        if key is None:
+            key = (opcode,)
+
+        with self._cond:
+            while self._queued >= self._max_queued and not self._stopped:
+                # Nobody would make room before workers are started
+                if self._overflow == self.BLOCK and self._running:
+                    self._cond.wait()
+                else:
+                    self._drop_oldest()
+
+            if self._stopped:
+                self._on_dropped(opcode)
+                return True
+
+            queue = self._queues.get(key)
+
+            if queue is None:
+                queue = self._queues[key] = collections.deque()
+
+            queue.append((next(self._seq), opcode, command, timestamp))
+            self._queued += 1
+
+            if key not in self._scheduled:
+                self._scheduled.add(key)
+                self._ready.append(key)
+                self._cond.notify_all()
+
+        return True
+
+    def start(self):
+        """ Start worker threads.
+
+        :return: None
+        """
+        with self._cond:
+            if self._running:
+                return
+
+            self._running = True
+            self._stopped = False
+
+        self._workers = [threading.Thread(target=self._work_loop, name="QueuedOpcodesDispatcher-{}".format(idx),
+                                          daemon=True) for idx in range(self._workers_count)]
+
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self):
+        """ Stop worker threads after queued messages are handled, messages dispatched from now on are dropped.
+
+        :return: None
+        """
+        with self._cond:
+            self._running = False
+            self._stopped = True
+            self._cond.notify_all()
+
+        for worker in self._workers:
+            worker.join()
+
+        self._workers = []
+
+    def _drop_oldest(self):
+        # Overflow is rare, so the oldest message is looked up among the heads of all queues
+        queue = min((queue for queue in self._queues.values() if queue), key=lambda queue: queue[0][0])
+        _, opcode, _, _ = queue.popleft()
+        self._queued -= 1
+        self._on_dropped(opcode)
+
+    def _on_dropped(self, opcode):
+        self._dropped += 1
+
+        if self._metrics is not None:
+            self._metrics.on_status_dropped(opcode)
+
+    def _take(self):
+        with self._cond:
+            while True:
+                while not self._ready:
+                    if not self._running:
+                        return None, None, None, None
+
+                    self._cond.wait()
+
+                key = self._ready.popleft()
+                queue = self._queues[key]
+
+                # Every message of the key has been dropped while it waited for a worker
+                if not queue:
+                    self._unschedule(key)
+                    continue
+
+                _, opcode, command, timestamp = queue.popleft()
+                self._queued -= 1
+                # Free slot in the queue for the callers blocked on overflow
+                self._cond.notify_all()
+
+                return key, opcode, command, timestamp
+
+    def _release(self, key):
+        with self._cond:
+            if self._queues[key]:
+                self._ready.append(key)
+                self._cond.notify_all()
+            else:
+                self._unschedule(key)
+
+    def _unschedule(self, key):
+        del self._queues[key]
+        self._scheduled.discard(key)
+
+    def _work_loop(self):
+        while True:
+            key, opcode, command, timestamp = self._take()
+
+            if key is None:
+                return
+
+            try:
+                self._handle(opcode, command, timestamp)
+            finally:
+                self._release(key)
+
+    def _handle(self, opcode, command, timestamp):
+        start_time = time.perf_counter()
+
+        try:
+            if timestamp is None:
+                self._opcode_to_func_map[opcode](command)
+            else:
+                self._opcode_to_func_map[opcode](command, timestamp)
+
+        except Exception as err:
+            if self._metrics is not None:
+                self._metrics.on_decode_error(opcode)
+
+            if self._error_handler is not None:
+                self._error_handler(opcode, command, err)
+
+            return
 
-        return result
+        if self._metrics is not None:
+            self._metrics.on_status_handled(opcode, command, time.perf_counter() - start_time)
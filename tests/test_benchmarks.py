@@ -0,0 +1,36 @@
+import unittest
+
+from benchmarks import runner
+
+
+def result(best_s):
+  return {"best_s": best_s, "median_s": best_s, "number": 1}
+
+
+class TestBenchmarksRunner(unittest.TestCase):
+
+  def test_should_flag_regression_when_benchmark_is_slower_than_threshold(self):
+    # GIVEN
+    baseline = {"fast": result(1.0), "slow": result(1.0)}
+    current = {"fast": result(1.05), "slow": result(1.5)}
+
+    # WHEN
+    rows = runner.compare(baseline, current, threshold=0.1)
+
+    # THEN
+    self.assertEqual([("fast", False), ("slow", True)], [(row[0], row[4]) for row in rows])
+
+  def test_should_skip_benchmarks_missing_in_one_of_results(self):
+    self.assertEqual([], runner.compare({"a": result(1.0)}, {"b": result(1.0)}))
+
+  def test_should_measure_time_per_call(self):
+    # WHEN
+    measured = runner.measure(lambda: None, repeat=1)
+
+    # THEN
+    self.assertGreater(measured["number"], 0)
+    self.assertLessEqual(measured["best_s"], measured["median_s"])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,163 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from silvair_health_client.health_capture import CaptureWriter, CapturingSender, CaptureReplayer, CaptureRecord, \
+  read_capture, OUTBOUND, INBOUND
+from silvair_otau_demo.console_out import ConsoleOut
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_evt_mgr import HealtClientEventMgr
+from silvair_health_client.health_client_printer import HealthClientJsonPrinter
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_status_bus import HealthStatusBus
+from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher
+
+from tests.test_health_client import BufferedSender
+from tests.test_health_client_printer import BufferedConsoleOut
+from tests.test_health_requests import ManualClock
+
+
+class TestHealthCapture(unittest.TestCase):
+
+  def setUp(self):
+    fd, self.path = tempfile.mkstemp(suffix=".hccap")
+    os.close(fd)
+    self.addCleanup(os.remove, self.path)
+
+    self.clock = ManualClock()
+
+  def test_should_read_recorded_messages_when_capture_is_written(self):
+    # GIVEN
+    sender = BufferedSender()
+
+    with CaptureWriter(self.path, self.clock) as writer:
+      hc = HealthClient(CapturingSender(sender, writer), 0x0003)
+
+      # WHEN
+      self.clock.now = 10.0
+      hc.send_fault_get("0x0136", dst_addr=0x0005)
+      self.clock.now = 10.5
+      writer.record_inbound(HealthClientOpcodes.FAULT_STATUS, bytes([0x00, 0x36, 0x01, 0x05, 0x00]))
+      hc.send_period_get()
+
+    # THEN
+    self.assertEqual(2, len(sender.sent_messages))
+    self.assertEqual([
+      CaptureRecord(OUTBOUND, 10.0, HealthClientOpcodes.FAULT_GET, 0x0003, 0x0005, bytes([0x36, 0x01])),
+      CaptureRecord(INBOUND, 10.5, HealthClientOpcodes.FAULT_STATUS, 0, None, bytes([0x00, 0x36, 0x01, 0x05, 0x00])),
+      CaptureRecord(OUTBOUND, 10.5, HealthClientOpcodes.PERIOD_GET, 0x0003, None, bytes())
+    ], list(read_capture(self.path)))
+
+  def test_should_skip_truncated_record_when_capture_is_read(self):
+    # GIVEN
+    with CaptureWriter(self.path, self.clock) as writer:
+      writer.record_inbound(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x05, 0x05, 0x00]))
+      writer.record_inbound(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x06, 0x05, 0x00]))
+
+    with open(self.path, "r+b") as capture:
+      capture.truncate(os.path.getsize(self.path) - 1)
+
+    # WHEN
+    records = list(read_capture(self.path))
+
+    # THEN
+    self.assertEqual(1, len(records))
+
+  def test_should_read_vendor_opcode_when_it_is_recorded(self):
+    # GIVEN
+    with CaptureWriter(self.path, self.clock) as writer:
+      writer.record_inbound(0xC00136, bytes([0x01]))
+
+    # WHEN
+    records = list(read_capture(self.path))
+
+    # THEN
+    self.assertEqual([CaptureRecord(INBOUND, 0.0, 0xC00136, 0, None, bytes([0x01]))], records)
+
+  def test_should_read_records_when_capture_has_first_format_version(self):
+    # GIVEN
+    with open(self.path, "wb") as capture:
+      capture.write(b"HCCAP\x01")
+      capture.write(struct.pack("<BdHHHH", INBOUND, 1.5, HealthClientOpcodes.ATTENTION_STATUS, 0, 0, 3))
+      capture.write(bytes([0x05, 0x05, 0x00]))
+
+    # WHEN
+    records = list(read_capture(self.path))
+
+    # THEN
+    self.assertEqual([CaptureRecord(INBOUND, 1.5, HealthClientOpcodes.ATTENTION_STATUS, 0, None,
+                                    bytes([0x05, 0x05, 0x00]))], records)
+
+  def test_should_raise_value_error_when_file_is_not_a_capture(self):
+    # GIVEN
+    with open(self.path, "wb") as capture:
+      capture.write(b"not a capture")
+
+    # WHEN / THEN
+    with self.assertRaises(ValueError):
+      list(read_capture(self.path))
+
+
+class TestCaptureReplayer(unittest.TestCase):
+
+  def setUp(self):
+    self.records = [
+      CaptureRecord(INBOUND, 100.0, HealthClientOpcodes.CURRENT_STATUS, 0, None, bytes([0x01])),
+      CaptureRecord(OUTBOUND, 100.5, HealthClientOpcodes.FAULT_GET, 1, 0x0005, bytes([0x36, 0x01])),
+      CaptureRecord(INBOUND, 102.0, HealthClientOpcodes.FAULT_STATUS, 0, None, bytes([0x02]))
+    ]
+    self.clock = ManualClock()
+    self.sleeps = []
+
+  def sleep(self, seconds):
+    self.sleeps.append(seconds)
+    self.clock.now += seconds
+
+  def test_should_deliver_inbound_messages_at_scaled_pace_when_speed_is_given(self):
+    # GIVEN
+    delivered = []
+    replayer = CaptureReplayer(self.records, speed=4.0, clock=self.clock, sleep=self.sleep)
+
+    # WHEN
+    count, duration = replayer.replay(lambda opcode, command, timestamp: delivered.append((opcode, command,
+                                                                                           timestamp)))
+
+    # THEN
+    self.assertEqual(2, count)
+    self.assertEqual([(HealthClientOpcodes.CURRENT_STATUS, bytes([0x01]), 100.0),
+                      (HealthClientOpcodes.FAULT_STATUS, bytes([0x02]), 102.0)], delivered)
+    self.assertEqual([0.5], self.sleeps)
+    self.assertEqual(0.5, duration)
+
+  def test_should_not_sleep_when_replayed_as_fast_as_possible(self):
+    # GIVEN
+    replayer = CaptureReplayer(self.records, speed=None, clock=self.clock, sleep=self.sleep)
+
+    # WHEN
+    count, _ = replayer.replay(lambda opcode, command, timestamp: None)
+
+    # THEN
+    self.assertEqual(2, count)
+    self.assertEqual([], self.sleeps)
+
+  def test_should_print_captured_timestamp_when_status_is_replayed_through_event_manager(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    status_bus = HealthStatusBus()
+    status_bus.subscribe(HealthClientJsonPrinter(console_out, clock=lambda: 999.0).print_record)
+    event_mgr = HealtClientEventMgr(ConsoleOut(), ModelIdToInstanceIndexMapper(ConsoleOut()),
+                                    HealthClientOpcodesDispatcher(status_bus.opcode_to_func_map()))
+    records = [CaptureRecord(INBOUND, 100.0, HealthClientOpcodes.CURRENT_STATUS, 0, None,
+                             bytes([0x00, 0x36, 0x01, 0x05, 0x00]))]
+
+    # WHEN
+    CaptureReplayer(records, speed=None).replay(event_mgr.uart_mesh_request)
+
+    # THEN
+    self.assertEqual(1, len(console_out.messages))
+    self.assertTrue(console_out.messages[0].startswith('{"timestamp":100.000000,'))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -2,7 +2,7 @@ import binascii
 import random
 import unittest
 
-from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client import HealthClient, HealthClientLanes
 from silvair_health_client.health_opcodes import HealthClientOpcodes
 
 
@@ -26,8 +26,18 @@ def any_fast_period_divider():
   return random.randrange(0, 15)
 
 
+def any_unicast_addr():
+  return random.randrange(0x0001, 0x8000)
+
+
+def any_group_addr():
+  return random.randrange(0xC000, 0x10000)
+
+
 class BufferedSender:
 
+  supports_dst_addr = True
+
   def __init__(self):
     self._sent_messages = []
 
@@ -268,6 +278,82 @@ class HealthClientTests(unittest.TestCase):
     self.assertEqual(HealthClientOpcodes.PERIOD_SET_UNACKNOWLEDGED, msg.mesh_opcode)
     self.assertEqual(int(fast_period_divider).to_bytes(1, byteorder='little'), msg.mesh_command)
 
+  def test_should_send_message_to_destination_when_send_method_is_called_with_dst_addr(self):
+    # GIVEN
+    sender = BufferedSender()
+    hc = HealthClient(sender, any_instance_index())
+
+    dst_addr = any_unicast_addr()
+
+    # WHEN
+    hc.send_fault_get(any_company_id(), dst_addr=dst_addr)
+
+    # THEN
+    self.assertEqual(dst_addr, sender.sent_messages[0].dst_addr)
+
+  def test_should_raise_value_error_when_send_method_is_called_with_unassigned_dst_addr(self):
+    # GIVEN
+    sender = BufferedSender()
+    hc = HealthClient(sender, any_instance_index())
+
+    # THEN
+    with self.assertRaises(ValueError):
+      hc.send_period_get(dst_addr=0x0000)
+
+    self.assertEqual(0, len(sender.sent_messages))
+
+  def test_should_raise_value_error_when_sender_cannot_address_requests(self):
+    # GIVEN
+    sender = BufferedSender()
+    sender.supports_dst_addr = False
+    hc = HealthClient(sender, any_instance_index())
+
+    # THEN
+    with self.assertRaises(ValueError):
+      hc.send_fault_get(any_company_id(), dst_addr=any_unicast_addr())
+
+    self.assertEqual(0, len(sender.sent_messages))
+
+  def test_should_raise_value_error_when_send_method_is_called_with_virtual_address(self):
+    # GIVEN
+    sender = BufferedSender()
+    hc = HealthClient(sender, any_instance_index())
+
+    # THEN
+    with self.assertRaises(ValueError):
+      hc.send_attention_get(dst_addr=random.randrange(0x8000, 0xC000))
+
+    self.assertEqual(0, len(sender.sent_messages))
+
+
+class HealthClientLanesTests(unittest.TestCase):
+
+  def test_should_send_requests_to_same_unicast_destination_through_same_lane(self):
+    # GIVEN
+    sender = BufferedSender()
+    lanes = HealthClientLanes(sender, [1, 2, 3])
+
+    dst_addr = any_unicast_addr()
+
+    # WHEN
+    lanes.send_attention_get(dst_addr)
+    lanes.send_fault_get(any_company_id(), dst_addr)
+
+    # THEN
+    self.assertEqual(sender.sent_messages[0].instance_index, sender.sent_messages[1].instance_index)
+
+  def test_should_spread_requests_over_lanes_when_destination_is_not_unicast(self):
+    # GIVEN
+    sender = BufferedSender()
+    lanes = HealthClientLanes(sender, [1, 2, 3])
+
+    # WHEN
+    for _ in range(3):
+      lanes.send_period_get(any_group_addr())
+
+    # THEN
+    self.assertEqual({1, 2, 3}, {msg.instance_index for msg in sender.sent_messages})
+
 
 if __name__ == "__main__":
   unittest.main()
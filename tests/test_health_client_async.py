@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import unittest
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_async import AsyncHealthClient
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker, HealthRequestTimeout
+from silvair_health_client.health_status import FaultStatus, CurrentStatus
+
+from tests.test_health_client import BufferedSender, any_instance_index
+
+
+class TestAsyncHealthClient(unittest.TestCase):
+
+  def setUp(self):
+    self.loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(self.loop)
+
+    self.tracker = HealthRequestTracker(timeout=0.1)
+    self.sender = BufferedSender()
+    self.client = AsyncHealthClient(HealthClient(self.sender, any_instance_index(), self.tracker), self.loop)
+
+  def tearDown(self):
+    asyncio.set_event_loop(None)
+    self.loop.close()
+
+  def test_should_return_fault_status_when_status_is_received_on_other_thread(self):
+    # GIVEN
+    command = bytes([0x00, 0x36, 0x01, 0x0E, 0x05, 0x00])
+
+    def receive():
+      self.tracker.on_mesh_status(HealthClientOpcodes.FAULT_STATUS, command)
+
+    async def fault_get():
+      task = asyncio.ensure_future(self.client.fault_get("0x0136"))
+      await asyncio.sleep(0)
+      threading.Thread(target=receive).start()
+      return await task
+
+    # WHEN
+    status = self.loop.run_until_complete(fault_get())
+
+    # THEN
+    self.assertEqual(FaultStatus(test_id=0, company_id=0x0136, faults=bytes([0x0E]), src_addr=0x0005), status)
+
+  def test_should_raise_timeout_when_status_is_not_received(self):
+    # GIVEN
+    self.tracker.start()
+    self.addCleanup(self.tracker.stop)
+
+    # THEN
+    with self.assertRaises(HealthRequestTimeout):
+      self.loop.run_until_complete(self.client.period_get())
+
+  def test_should_return_none_when_unacknowledged_request_is_sent(self):
+    # WHEN
+    status = self.loop.run_until_complete(self.client.attention_set(5, unack=True))
+
+    # THEN
+    self.assertIsNone(status)
+    self.assertEqual(1, len(self.sender.sent_messages))
+
+  def test_should_queue_current_status_when_it_is_dispatched(self):
+    # GIVEN
+    command = bytes([0x00, 0x36, 0x01, 0x01, 0x00])
+
+    # WHEN
+    res = self.client.dispatch(HealthClientOpcodes.CURRENT_STATUS, command)
+    status = self.loop.run_until_complete(asyncio.wait_for(self.client.next_status(), 1))
+
+    # THEN
+    self.assertTrue(res)
+    self.assertEqual(CurrentStatus(test_id=0, company_id=0x0136, faults=bytes(), src_addr=0x0001), status)
+
+
+  def test_should_drop_request_from_tracker_when_awaiting_task_is_cancelled(self):
+    # GIVEN
+    async def cancel_fault_get():
+      task = asyncio.ensure_future(self.client.fault_get("0x0136", dst_addr=0x0005))
+      await asyncio.sleep(0)
+      task.cancel()
+
+      try:
+        await task
+      except asyncio.CancelledError:
+        return True
+
+      return False
+
+    async def wait_until_dropped():
+      while self.tracker.pending_count:
+        await asyncio.sleep(0.01)
+
+    # WHEN
+    cancelled = self.loop.run_until_complete(cancel_fault_get())
+    self.loop.run_until_complete(asyncio.wait_for(wait_until_dropped(), 1))
+
+    # THEN
+    self.assertTrue(cancelled)
+    self.assertEqual(0, self.tracker.pending_count)
+
+  def test_should_run_other_tasks_when_sender_blocks(self):
+    # GIVEN
+    unblocked = threading.Event()
+
+    class BlockingSender(BufferedSender):
+      def send_message(self, msg):
+        unblocked.wait(1)
+        super().send_message(msg)
+
+    sender = BlockingSender()
+    client = AsyncHealthClient(HealthClient(sender, any_instance_index(), self.tracker), self.loop)
+
+    async def unblock():
+      await asyncio.sleep(0)
+      unblocked.set()
+      return len(sender.sent_messages)
+
+    # WHEN
+    sent_before_unblocked, _ = self.loop.run_until_complete(asyncio.gather(
+      unblock(), client.attention_set(5, unack=True)))
+
+    # THEN
+    self.assertEqual(0, sent_before_unblocked)
+    self.assertEqual(1, len(sender.sent_messages))
+
+  def test_should_pass_status_to_next_dispatcher_when_it_is_dispatched(self):
+    # GIVEN
+    dispatched = []
+
+    class NextDispatcher:
+      def dispatch(self, opcode, command):
+        dispatched.append((opcode, command))
+        return True
+
+    client = AsyncHealthClient(HealthClient(self.sender, any_instance_index(), self.tracker), self.loop,
+                               next_dispatcher=NextDispatcher())
+    command = bytes([0x00, 0x36, 0x01, 0x01, 0x00])
+
+    # WHEN
+    res = client.dispatch(HealthClientOpcodes.CURRENT_STATUS, command)
+    status = self.loop.run_until_complete(asyncio.wait_for(client.next_status(), 1))
+
+    # THEN
+    self.assertTrue(res)
+    self.assertEqual([(HealthClientOpcodes.CURRENT_STATUS, command)], dispatched)
+    self.assertEqual(0x0001, status.src_addr)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,245 @@
+import threading
+import unittest
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_cli import HealthClientCli, EXIT_OK, EXIT_FAULTS, \
+  EXIT_NO_REPLY, EXIT_SCRIPT_ERROR
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker
+
+from tests.test_health_client import any_instance_index
+from tests.test_health_client_output import RecordingConsoleOut
+
+
+class FaultServersSender:
+
+  supports_dst_addr = True
+
+  def __init__(self, tracker, faults_by_addr):
+    self._tracker = tracker
+    self._faults_by_addr = faults_by_addr
+    self.sent_messages = []
+
+  def send_message(self, msg):
+    self.sent_messages.append(msg)
+
+    if msg.mesh_opcode != HealthClientOpcodes.FAULT_GET or msg.dst_addr not in self._faults_by_addr:
+      return
+
+    command = bytes([0x00]) + msg.mesh_command + bytes(self._faults_by_addr[msg.dst_addr]) + \
+      msg.dst_addr.to_bytes(2, byteorder="little")
+    threading.Thread(target=self._tracker.on_mesh_status,
+                     args=(HealthClientOpcodes.FAULT_STATUS, command)).start()
+
+
+class TestHealthClientCliScript(unittest.TestCase):
+
+  def setUp(self):
+    self.tracker = HealthRequestTracker(timeout=0.2)
+    self.tracker.start()
+    self.addCleanup(self.tracker.stop)
+
+    self.console_out = RecordingConsoleOut()
+
+  def create_cli(self, faults_by_addr):
+    self.sender = FaultServersSender(self.tracker, faults_by_addr)
+    health_client = HealthClient(self.sender, any_instance_index(), self.tracker)
+    return HealthClientCli(self.console_out, health_client)
+
+  def test_should_return_ok_when_every_node_replies_without_faults(self):
+    # GIVEN
+    cli = self.create_cli({0x0001: [], 0x0002: [0x00]})
+
+    # WHEN
+    exit_code = cli.run_script(["# audit", "fault get 0x0136 @0x0001", "",
+                                "fault get 0x0136 @0x0002"])
+
+    # THEN
+    self.assertEqual(EXIT_OK, exit_code)
+    self.assertEqual(2, len(self.sender.sent_messages))
+
+  def test_should_return_faults_when_any_node_reports_fault(self):
+    # GIVEN
+    cli = self.create_cli({0x0001: [], 0x0002: [0x0D]})
+
+    # WHEN
+    exit_code = cli.run_script(["fault get 0x0136 @0x0001", "fault get 0x0136 @0x0002"])
+
+    # THEN
+    self.assertEqual(EXIT_FAULTS, exit_code)
+
+  def test_should_return_no_reply_when_request_times_out(self):
+    # GIVEN
+    cli = self.create_cli({0x0001: []})
+
+    # WHEN
+    exit_code = cli.run_script(["fault get 0x0136 @0x0001", "fault get 0x0136 @0x0003"])
+
+    # THEN
+    self.assertEqual(EXIT_NO_REPLY, exit_code)
+
+  def test_should_stop_script_when_expectation_fails(self):
+    # GIVEN
+    cli = self.create_cli({0x0002: [0x0D]})
+
+    # WHEN
+    exit_code = cli.run_script(["fault get 0x0136 @0x0002", "expect no-faults",
+                                "fault get 0x0136 @0x0001"])
+
+    # THEN
+    self.assertEqual(EXIT_FAULTS, exit_code)
+    self.assertEqual(1, len(self.sender.sent_messages))
+
+  def test_should_return_no_reply_when_attention_campaign_is_not_confirmed(self):
+    # GIVEN
+    cli = self.create_cli({})
+
+    # WHEN
+    exit_code = cli.run_script(["attention campaign 30 4 0x0001-0x0002 0x0005"])
+
+    # THEN
+    self.assertEqual(EXIT_NO_REPLY, exit_code)
+    self.assertEqual(9, len(self.sender.sent_messages))
+    self.assertIn("3 nodes, 0 confirmed, 3 failed", self.console_out.messages[-2][1])
+
+  def test_should_send_requests_after_wait_when_replies_are_received(self):
+    # GIVEN
+    cli = self.create_cli({0x0001: []})
+
+    # WHEN
+    exit_code = cli.run_script(["fault get 0x0136 @0x0001", "wait", "expect replies",
+                                "period get @0x0001"])
+
+    # THEN
+    self.assertEqual(EXIT_NO_REPLY, exit_code)
+    self.assertEqual(2, len(self.sender.sent_messages))
+
+  def test_should_return_script_error_when_command_is_not_supported(self):
+    # GIVEN
+    cli = self.create_cli({})
+
+    # WHEN
+    exit_code = cli.run_script(["unknown", "fault get 0x0136 @0x0001"])
+
+    # THEN
+    self.assertEqual(EXIT_SCRIPT_ERROR, exit_code)
+    self.assertEqual(0, len(self.sender.sent_messages))
+
+  def test_should_return_script_error_when_sub_command_is_not_supported(self):
+    # GIVEN
+    cli = self.create_cli({})
+
+    # WHEN
+    exit_code = cli.run_script(["fault foo", "fault get 0x0136 @0x0001"])
+
+    # THEN
+    self.assertEqual(EXIT_SCRIPT_ERROR, exit_code)
+    self.assertEqual(0, len(self.sender.sent_messages))
+
+  def test_should_return_script_error_when_command_arguments_are_missing(self):
+    # GIVEN
+    cli = self.create_cli({})
+
+    # WHEN
+    exit_code = cli.run_script(["attention set", "fault get 0x0136 @0x0001"])
+
+    # THEN
+    self.assertEqual(EXIT_SCRIPT_ERROR, exit_code)
+    self.assertEqual(0, len(self.sender.sent_messages))
+
+  def test_should_return_script_error_when_attention_time_is_out_of_range(self):
+    # GIVEN
+    cli = self.create_cli({})
+
+    # WHEN
+    exit_code = cli.run_script(["attention campaign 256 4 0x0001-0x0002"])
+
+    # THEN
+    self.assertEqual(EXIT_SCRIPT_ERROR, exit_code)
+    self.assertEqual(0, len(self.sender.sent_messages))
+
+  def test_should_return_script_error_when_destination_is_not_supported(self):
+    # GIVEN
+    cli = self.create_cli({0x0001: []})
+    self.sender.supports_dst_addr = False
+
+    # WHEN
+    exit_code = cli.run_script(["fault get 0x0136 @0x0001"])
+
+    # THEN
+    self.assertEqual(EXIT_SCRIPT_ERROR, exit_code)
+    self.assertEqual(0, len(self.sender.sent_messages))
+
+  def test_should_return_script_error_when_value_is_invalid(self):
+    # GIVEN
+    cli = self.create_cli({})
+
+    # WHEN
+    exit_code = cli.run_script(["fault get 0x0136 @0xZZ"])
+
+    # THEN
+    self.assertEqual(EXIT_SCRIPT_ERROR, exit_code)
+
+
+class TestHealthClientCliPrompt(unittest.TestCase):
+
+  def setUp(self):
+    self.tracker = HealthRequestTracker(timeout=0.2)
+    self.tracker.start()
+    self.addCleanup(self.tracker.stop)
+
+    self.console_out = RecordingConsoleOut()
+    self.sender = FaultServersSender(self.tracker, {0x0001: [], 0x0002: [0x0D]})
+    health_client = HealthClient(self.sender, any_instance_index(), self.tracker)
+    self.cli = HealthClientCli(self.console_out, health_client)
+
+  def test_should_return_to_prompt_before_sweep_is_finished(self):
+    # GIVEN
+    finished = threading.Event()
+    print_standard_message = self.console_out.print_standard_message
+
+    def record(msg):
+      print_standard_message(msg)
+
+      if msg.startswith("Sweep finished"):
+        finished.set()
+
+    self.console_out.print_standard_message = record
+
+    # WHEN
+    res = self.cli.process_line("sweep 0x0136 0x0001-0x0003")
+    returned_before_finished = not finished.is_set()
+
+    # THEN
+    self.assertTrue(res)
+    self.assertTrue(returned_before_finished)
+    self.assertTrue(finished.wait(5))
+    self.assertTrue(self.console_out.messages[-1][1].startswith(
+      "Sweep finished: 3 nodes, 2 responded, 1 failed"))
+
+
+  def test_should_return_to_prompt_before_attention_campaign_is_finished(self):
+    # GIVEN
+    finished = threading.Event()
+    print_standard_message = self.console_out.print_standard_message
+
+    def record(msg):
+      print_standard_message(msg)
+
+      if msg.startswith("Attention campaign finished"):
+        finished.set()
+
+    self.console_out.print_standard_message = record
+
+    # WHEN
+    res = self.cli.process_line("attention campaign 30 4 0x0001")
+    returned_before_finished = not finished.is_set()
+
+    # THEN
+    self.assertTrue(res)
+    self.assertTrue(returned_before_finished)
+    self.assertTrue(finished.wait(5))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+
+from silvair_otau_demo.console_out import ConsoleOut
+
+from silvair_health_client.health_client_evt_mgr import HealtClientEventMgr
+from silvair_health_client.health_client_gateway import StatusDeduplicator
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher
+
+from tests.test_utils import any_model_id, any_model_id_different_than
+
+
+def create_event_mgr():
+  console_out = ConsoleOut()
+  return HealtClientEventMgr(console_out, ModelIdToInstanceIndexMapper(console_out), HealthClientOpcodesDispatcher({}))
+
+
+class TestHealthClientEventMgrReadiness(unittest.TestCase):
+
+  def test_should_return_true_when_model_is_registered_while_waiting(self):
+    # GIVEN
+    event_mgr = create_event_mgr()
+    model_id = any_model_id()
+
+    # WHEN
+    threading.Timer(0.01, event_mgr.uart_registered_models, args=([model_id],)).start()
+
+    # THEN
+    self.assertTrue(event_mgr.wait_for_model(model_id, 5))
+
+  def test_should_return_true_when_model_has_been_registered_before_waiting(self):
+    # GIVEN
+    event_mgr = create_event_mgr()
+    model_id = any_model_id()
+    event_mgr.uart_registered_models([model_id])
+
+    # THEN
+    self.assertTrue(event_mgr.wait_for_model(model_id, 0))
+
+  def test_should_return_false_when_other_model_is_registered_before_timeout(self):
+    # GIVEN
+    event_mgr = create_event_mgr()
+    model_id = any_model_id()
+    event_mgr.uart_registered_models([any_model_id_different_than(model_id)])
+
+    # THEN
+    self.assertFalse(event_mgr.wait_for_model(model_id, 0.01))
+
+  def test_should_call_callback_with_model_ids_when_models_are_registered(self):
+    # GIVEN
+    event_mgr = create_event_mgr()
+    registered = []
+    event_mgr.add_models_registered_callback(registered.append)
+    model_ids = [any_model_id()]
+
+    # WHEN
+    event_mgr.uart_registered_models(model_ids)
+
+    # THEN
+    self.assertEqual([model_ids], registered)
+
+
+class TestHealthClientEventMgrDeduplication(unittest.TestCase):
+
+  def test_should_dispatch_status_once_when_it_is_received_through_two_modems(self):
+    # GIVEN
+    console_out = ConsoleOut()
+    dispatched = []
+    opcodes_disp = HealthClientOpcodesDispatcher({HealthClientOpcodes.CURRENT_STATUS: dispatched.append})
+    deduplicator = StatusDeduplicator()
+    event_mgrs = [HealtClientEventMgr(console_out, ModelIdToInstanceIndexMapper(console_out), opcodes_disp,
+                                      deduplicator=deduplicator) for _ in range(2)]
+    command = bytes([0x00, 0x36, 0x01, 0x05, 0x00])
+
+    # WHEN
+    for event_mgr in event_mgrs:
+      event_mgr.uart_mesh_request(HealthClientOpcodes.CURRENT_STATUS, command)
+
+    # THEN
+    self.assertEqual([command], dispatched)
+
+  def test_should_dispatch_status_twice_when_it_is_received_twice_through_one_modem(self):
+    # GIVEN
+    console_out = ConsoleOut()
+    dispatched = []
+    opcodes_disp = HealthClientOpcodesDispatcher({HealthClientOpcodes.CURRENT_STATUS: dispatched.append})
+    event_mgr = HealtClientEventMgr(console_out, ModelIdToInstanceIndexMapper(console_out), opcodes_disp,
+                                    deduplicator=StatusDeduplicator())
+    command = bytes([0x00, 0x36, 0x01, 0x05, 0x00])
+
+    # WHEN
+    event_mgr.uart_mesh_request(HealthClientOpcodes.CURRENT_STATUS, command)
+    event_mgr.uart_mesh_request(HealthClientOpcodes.CURRENT_STATUS, command)
+
+    # THEN
+    self.assertEqual([command, command], dispatched)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_gateway import HealthClientGateway, StatusDeduplicator, parse_port_route
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker
+
+from tests.test_health_client import BufferedSender, any_instance_index, any_group_addr
+from tests.test_health_requests import ManualClock
+
+
+def fault_status(src_addr):
+  return bytes([0x00, 0x36, 0x01]) + src_addr.to_bytes(2, byteorder="little")
+
+
+class TestHealthClientGateway(unittest.TestCase):
+
+  def setUp(self):
+    self.senders = [BufferedSender() for _ in range(3)]
+
+  def create_gateway(self, address_ranges, tracker=None):
+    return HealthClientGateway([HealthClient(sender, any_instance_index(), tracker) for sender in self.senders],
+                               address_ranges)
+
+  def test_should_send_request_through_modem_serving_address_range_when_dst_addr_is_unicast(self):
+    # GIVEN
+    gateway = self.create_gateway([range(0x0001, 0x1000), range(0x1000, 0x2000), None])
+
+    # WHEN
+    gateway.send_fault_get("0x0136", dst_addr=0x1005)
+    gateway.send_attention_get(dst_addr=0x0005)
+
+    # THEN
+    self.assertEqual([1, 1, 0], [len(sender.sent_messages) for sender in self.senders])
+    self.assertEqual(0x1005, self.senders[1].sent_messages[0].dst_addr)
+
+  def test_should_send_request_through_modem_without_range_when_dst_addr_is_out_of_ranges(self):
+    # GIVEN
+    gateway = self.create_gateway([range(0x0001, 0x1000), range(0x1000, 0x2000), None])
+
+    # WHEN
+    gateway.send_period_get(dst_addr=0x3000)
+
+    # THEN
+    self.assertEqual([0, 0, 1], [len(sender.sent_messages) for sender in self.senders])
+
+  def test_should_raise_value_error_when_no_modem_serves_dst_addr(self):
+    # GIVEN
+    gateway = self.create_gateway([range(0x0001, 0x1000), range(0x1000, 0x2000), range(0x2000, 0x3000)])
+
+    # WHEN / THEN
+    with self.assertRaises(ValueError):
+      gateway.send_period_get(dst_addr=0x3000)
+
+  def test_should_send_request_through_single_modem_when_dst_addr_is_group(self):
+    # GIVEN
+    gateway = self.create_gateway([range(0x0001, 0x1000), None, None])
+
+    # WHEN
+    gateway.send_attention_set(5, unack=True, dst_addr=any_group_addr())
+    gateway.send_period_get()
+
+    # THEN
+    self.assertEqual([0, 2, 0], [len(sender.sent_messages) for sender in self.senders])
+
+  def test_should_resolve_future_with_status_when_publication_request_is_sent(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=1.0)
+    gateway = self.create_gateway(None, tracker)
+
+    # WHEN
+    future = gateway.send_fault_get("0x0136")
+    tracker.on_mesh_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+
+    # THEN
+    self.assertEqual(fault_status(0x0005), future.result(timeout=0))
+    self.assertEqual([1, 0, 0], [len(sender.sent_messages) for sender in self.senders])
+
+
+class TestStatusDeduplicator(unittest.TestCase):
+
+  def setUp(self):
+    self.clock = ManualClock()
+    self.deduplicator = StatusDeduplicator(window=1.0, clock=self.clock)
+
+  def test_should_recognize_status_received_through_other_modem_within_window(self):
+    # WHEN
+    first = self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 0)
+    self.clock.now = 0.02
+    second = self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 1)
+    other = self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0006), 1)
+
+    # THEN
+    self.assertEqual([False, True, False], [first, second, other])
+    self.assertEqual(1, self.deduplicator.duplicates)
+
+  def test_should_accept_identical_status_received_through_same_modem_within_window(self):
+    # GIVEN
+    self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 0)
+    self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 1)
+
+    # WHEN
+    self.clock.now = 0.5
+    again = self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 1)
+    copy = self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 0)
+
+    # THEN
+    self.assertEqual([False, True], [again, copy])
+    self.assertEqual(2, self.deduplicator.duplicates)
+
+  def test_should_accept_identical_status_when_window_has_passed(self):
+    # GIVEN
+    self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 0)
+
+    # WHEN
+    self.clock.now = 1.0
+    res = self.deduplicator.is_duplicate(HealthClientOpcodes.CURRENT_STATUS, fault_status(0x0005), 1)
+
+    # THEN
+    self.assertFalse(res)
+
+
+class TestParsePortRoute(unittest.TestCase):
+
+  def test_should_return_port_and_address_range_when_range_is_given(self):
+    self.assertEqual(("/dev/ttyUSB0", range(0x0001, 0x1000)), parse_port_route("/dev/ttyUSB0@0x0001-0x0fff"))
+
+  def test_should_return_port_without_address_range_when_range_is_not_given(self):
+    self.assertEqual(("/dev/ttyUSB0", None), parse_port_route("/dev/ttyUSB0"))
+
+
+if __name__ == "__main__":
+  unittest.main()
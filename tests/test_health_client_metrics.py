@@ -0,0 +1,92 @@
+import unittest
+import urllib.request
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_metrics import HealthClientMetrics, MetricsHttpServer
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker
+from silvair_health_client.utils import HealthClientOpcodesDispatcher
+
+from tests.test_health_client import BufferedSender, any_company_id, any_instance_index
+
+
+class TestHealthClientMetrics(unittest.TestCase):
+
+  def test_should_count_sent_messages_per_opcode(self):
+    # GIVEN
+    metrics = HealthClientMetrics()
+    hc = HealthClient(BufferedSender(), any_instance_index(), metrics=metrics)
+
+    # WHEN
+    hc.send_fault_get(any_company_id())
+    hc.send_fault_get(any_company_id())
+
+    # THEN
+    self.assertEqual(2, metrics.messages_sent.get("FAULT_GET"))
+    self.assertIn('health_messages_sent_total{opcode="FAULT_GET"} 2', metrics.render())
+
+  def test_should_record_received_statuses_and_unknown_opcodes_when_dispatched(self):
+    # GIVEN
+    metrics = HealthClientMetrics()
+    dispatcher = HealthClientOpcodesDispatcher({HealthClientOpcodes.ATTENTION_STATUS: lambda command: None}, metrics)
+
+    # WHEN
+    dispatcher.dispatch(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x01, 0x05, 0x00]))
+    dispatcher.dispatch(0x1234, bytes())
+
+    # THEN
+    self.assertEqual(1, metrics.statuses_received.get("ATTENTION_STATUS"))
+    self.assertEqual(1, metrics.statuses_by_source.get("0x0005"))
+    self.assertEqual(1, metrics.unknown_opcodes.get("0x1234"))
+    self.assertEqual(1, metrics.handler_time.count())
+
+  def test_should_count_decode_error_when_handler_raises(self):
+    # GIVEN
+    metrics = HealthClientMetrics()
+
+    def handler(command):
+      raise IndexError()
+
+    dispatcher = HealthClientOpcodesDispatcher({HealthClientOpcodes.PERIOD_STATUS: handler}, metrics)
+
+    # THEN
+    with self.assertRaises(IndexError):
+      dispatcher.dispatch(HealthClientOpcodes.PERIOD_STATUS, bytes())
+
+    self.assertEqual(1, metrics.decode_errors.get("PERIOD_STATUS"))
+
+  def test_should_observe_latency_when_tracked_request_is_completed(self):
+    # GIVEN
+    metrics = HealthClientMetrics()
+    tracker = HealthRequestTracker(metrics=metrics)
+    tracker.track(HealthClientOpcodes.PERIOD_GET)
+
+    # WHEN
+    tracker.on_mesh_status(HealthClientOpcodes.PERIOD_STATUS, bytes([0x01]))
+
+    # THEN
+    self.assertEqual(1, metrics.request_latency.count())
+    self.assertIn('health_request_latency_seconds_bucket{opcode="PERIOD_GET",le="+Inf"} 1', metrics.render())
+
+
+class TestMetricsHttpServer(unittest.TestCase):
+
+  def test_should_serve_metrics_when_metrics_path_is_requested(self):
+    # GIVEN
+    metrics = HealthClientMetrics()
+    metrics.on_message_sent(HealthClientOpcodes.ATTENTION_GET)
+
+    server = MetricsHttpServer(metrics, 0)
+    server.start()
+    self.addCleanup(server.stop)
+
+    # WHEN
+    with urllib.request.urlopen("http://127.0.0.1:{}/metrics".format(server.port)) as response:
+      body = response.read().decode()
+
+    # THEN
+    self.assertIn('health_messages_sent_total{opcode="ATTENTION_GET"} 1', body)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,100 @@
+import io
+import unittest
+
+from silvair_health_client.health_client_output import BatchedConsoleOut, StreamConsoleOut
+
+
+class RecordingConsoleOut:
+
+  def __init__(self):
+    self.messages = []
+
+  def print_standard_message(self, msg):
+    self.messages.append(("standard", msg))
+
+  def print_informative_message(self, msg):
+    self.messages.append(("informative", msg))
+
+  def print_error_message(self, msg):
+    self.messages.append(("error", msg))
+
+
+class TestBatchedConsoleOut(unittest.TestCase):
+
+  def test_should_write_standard_messages_in_one_batch_when_flushed(self):
+    # GIVEN
+    console_out = RecordingConsoleOut()
+    out = BatchedConsoleOut(console_out)
+
+    # WHEN
+    out.print_standard_message("a")
+    out.print_standard_message("b")
+    out.flush()
+
+    # THEN
+    self.assertEqual([("standard", "a\nb")], console_out.messages)
+
+  def test_should_keep_order_of_messages_of_different_kinds(self):
+    # GIVEN
+    console_out = RecordingConsoleOut()
+    out = BatchedConsoleOut(console_out)
+
+    # WHEN
+    out.print_standard_message("a")
+    out.print_error_message("b")
+    out.print_standard_message("c")
+    out.flush()
+
+    # THEN
+    self.assertEqual([("standard", "a"), ("error", "b"), ("standard", "c")], console_out.messages)
+
+  def test_should_drop_oldest_messages_and_report_them_when_queue_is_full(self):
+    # GIVEN
+    console_out = RecordingConsoleOut()
+    out = BatchedConsoleOut(console_out, max_queued=2)
+
+    # WHEN
+    for msg in "abc":
+      out.print_standard_message(msg)
+
+    out.flush()
+
+    # THEN
+    self.assertEqual(1, out.dropped_total)
+    self.assertEqual("error", console_out.messages[0][0])
+    self.assertEqual(("standard", "b\nc"), console_out.messages[1])
+
+  def test_should_write_queued_messages_when_stopped(self):
+    # GIVEN
+    console_out = RecordingConsoleOut()
+    out = BatchedConsoleOut(console_out, flush_interval=10)
+    out.start()
+
+    # WHEN
+    out.print_standard_message("a")
+    out.stop()
+
+    # THEN
+    self.assertEqual([("standard", "a")], console_out.messages)
+
+
+class TestStreamConsoleOut(unittest.TestCase):
+
+  def test_should_write_only_standard_messages_to_output_stream(self):
+    # GIVEN
+    out = io.StringIO()
+    err = io.StringIO()
+    console_out = StreamConsoleOut(out, err)
+
+    # WHEN
+    console_out.print_standard_message("{}")
+    console_out.print_informative_message("Ready...")
+    console_out.print_error_message("Output too slow")
+
+    # THEN
+    self.assertEqual("{}\n", out.getvalue())
+    self.assertEqual("Ready...\nOutput too slow\n", err.getvalue())
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,207 @@
+import time
+import unittest
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_metrics import HealthClientMetrics
+from silvair_health_client.health_client_pacing import PacedSender, PRIORITY_BULK, send_priority
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker, HealthRequestTimeout
+
+from tests.test_health_client import BufferedSender, any_instance_index
+from tests.test_health_requests import ManualClock
+
+
+def fault_status(src_addr):
+  return bytes([0x00, 0x36, 0x01]) + src_addr.to_bytes(2, byteorder="little")
+
+
+class TestPacedSender(unittest.TestCase):
+
+  def setUp(self):
+    self.clock = ManualClock()
+    self.sender = BufferedSender()
+    self.paced_sender = PacedSender(self.sender, rate=10.0, burst=2, clock=self.clock)
+    self.health_client = HealthClient(self.paced_sender, any_instance_index())
+
+  def test_should_send_burst_and_then_pace_messages_when_messages_are_queued(self):
+    # GIVEN
+    for addr in range(1, 6):
+      self.health_client.send_attention_get(dst_addr=addr)
+
+    # WHEN
+    wait_s = self.paced_sender.send_pending()
+    sent_at_once = len(self.sender.sent_messages)
+
+    self.clock.now += 0.1
+    self.paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual(2, sent_at_once)
+    self.assertAlmostEqual(0.1, wait_s)
+    self.assertEqual(3, len(self.sender.sent_messages))
+    self.assertEqual(2, self.paced_sender.queued_count)
+
+  def test_should_send_interactive_messages_ahead_of_bulk_ones(self):
+    # GIVEN
+    with send_priority(PRIORITY_BULK):
+      self.health_client.send_fault_get("0x0136", dst_addr=0x0001)
+      self.health_client.send_fault_get("0x0136", dst_addr=0x0002)
+
+    self.health_client.send_attention_get(dst_addr=0x0003)
+
+    # WHEN
+    self.paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual([0x0003, 0x0001], [msg.dst_addr for msg in self.sender.sent_messages])
+
+  def test_should_coalesce_message_when_identical_one_is_queued(self):
+    # GIVEN
+    self.health_client.send_fault_get("0x0136", dst_addr=0x0001)
+
+    # WHEN
+    self.health_client.send_fault_get("0x0136", dst_addr=0x0001)
+    self.health_client.send_fault_test("0x0136", 1, dst_addr=0x0001)
+    self.health_client.send_fault_test("0x0136", 1, dst_addr=0x0001)
+    self.paced_sender.send_pending()
+    self.clock.now += 1.0
+    self.paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual(1, self.paced_sender.coalesced_messages)
+    self.assertEqual([HealthClientOpcodes.FAULT_GET, HealthClientOpcodes.FAULT_TEST, HealthClientOpcodes.FAULT_TEST],
+                     [msg.mesh_opcode for msg in self.sender.sent_messages])
+
+  def test_should_promote_queued_bulk_message_when_interactive_one_is_coalesced_with_it(self):
+    # GIVEN
+    with send_priority(PRIORITY_BULK):
+      self.health_client.send_fault_get("0x0136", dst_addr=0x0001)
+      self.health_client.send_fault_get("0x0136", dst_addr=0x0002)
+      self.health_client.send_fault_get("0x0136", dst_addr=0x0003)
+
+    # WHEN
+    self.health_client.send_fault_get("0x0136", dst_addr=0x0003)
+    self.paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual([0x0003, 0x0001], [msg.dst_addr for msg in self.sender.sent_messages])
+
+  def test_should_count_only_messages_which_leave_the_queue(self):
+    # GIVEN
+    metrics = HealthClientMetrics()
+    paced_sender = PacedSender(self.sender, rate=10.0, burst=2, clock=self.clock, metrics=metrics)
+    health_client = HealthClient(paced_sender, any_instance_index(), metrics=metrics)
+
+    health_client.send_fault_get("0x0136", dst_addr=0x0001)
+    health_client.send_fault_get("0x0136", dst_addr=0x0001)
+    health_client.send_fault_get("0x0136", dst_addr=0x0002)
+
+    # WHEN
+    queued = metrics.messages_sent.total()
+    paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual(0, queued)
+    self.assertEqual(2, metrics.messages_sent.get("FAULT_GET"))
+
+  def test_should_resolve_coalesced_requests_with_the_same_status(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=1.0)
+    health_client = HealthClient(self.paced_sender, any_instance_index(), tracker)
+
+    first = health_client.send_fault_get("0x0136", dst_addr=0x0005)
+    second = health_client.send_fault_get("0x0136", dst_addr=0x0005)
+    self.paced_sender.send_pending()
+
+    # WHEN
+    tracker.on_mesh_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+
+    # THEN
+    self.assertEqual(1, len(self.sender.sent_messages))
+    self.assertEqual(fault_status(0x0005), first.result(timeout=0))
+    self.assertEqual(fault_status(0x0005), second.result(timeout=0))
+    self.assertEqual(1, tracker.stats["coalesced"])
+    self.assertEqual(0, tracker.pending_count)
+
+  def test_should_start_request_timeout_when_message_leaves_the_queue(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=1.0, clock=self.clock)
+    health_client = HealthClient(self.paced_sender, any_instance_index(), tracker)
+
+    for addr in range(1, 4):
+      health_client.send_fault_get("0x0136", dst_addr=addr)
+
+    self.paced_sender.send_pending()
+
+    # WHEN
+    expired_at_once = tracker.expire(1.0)
+    self.clock.now = 5.0
+    self.paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual([0x0001, 0x0002], [request.dst_addr for request in expired_at_once])
+    self.assertEqual([], tracker.expire(5.5))
+    self.assertEqual([0x0003], [request.dst_addr for request in tracker.expire(6.0)])
+
+  def test_should_time_out_queued_requests_when_sender_is_stopped(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=1.0, clock=self.clock)
+    health_client = HealthClient(self.paced_sender, any_instance_index(), tracker)
+    future = health_client.send_fault_get("0x0136", dst_addr=0x0005)
+
+    # WHEN
+    self.paced_sender.stop()
+    tracker.expire(1.0)
+
+    # THEN
+    self.assertEqual(0, len(self.sender.sent_messages))
+    self.assertIsInstance(future.exception(timeout=0), HealthRequestTimeout)
+
+  def test_should_report_error_and_send_next_messages_when_sender_fails(self):
+    # GIVEN
+    class FailingSender(BufferedSender):
+
+      def send_message(self, msg):
+        if msg.dst_addr == 0x0001:
+          raise IOError("UART closed")
+
+        super().send_message(msg)
+
+    errors = []
+    sender = FailingSender()
+    paced_sender = PacedSender(sender, rate=10.0, burst=2, clock=self.clock,
+                               error_handler=lambda msg, err: errors.append(err))
+    health_client = HealthClient(paced_sender, any_instance_index())
+
+    # WHEN
+    health_client.send_period_get(dst_addr=0x0001)
+    health_client.send_period_get(dst_addr=0x0002)
+    paced_sender.send_pending()
+
+    # THEN
+    self.assertEqual(1, len(errors))
+    self.assertEqual([0x0002], [msg.dst_addr for msg in sender.sent_messages])
+
+  def test_should_send_queued_messages_in_background_when_started(self):
+    # GIVEN
+    paced_sender = PacedSender(self.sender, rate=1000.0, burst=1)
+    health_client = HealthClient(paced_sender, any_instance_index())
+    paced_sender.start()
+    self.addCleanup(paced_sender.stop)
+
+    # WHEN
+    for addr in range(1, 11):
+      health_client.send_attention_get(dst_addr=addr)
+
+    # THEN
+    for _ in range(100):
+      if len(self.sender.sent_messages) == 10:
+        break
+
+      time.sleep(0.01)
+
+    self.assertEqual(10, len(self.sender.sent_messages))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,9 +1,13 @@
 import random
 import unittest
 import binascii
+import json
 import re
 
-from silvair_health_client.health_client_printer import HealthClientStatusPrinter
+from silvair_health_client.health_client_printer import HealthClientStatusPrinter, HealthClientJsonPrinter
+from silvair_health_client.health_liveness import LivenessChange, LivenessTracker
+from silvair_health_client.health_state_store import FaultStateChange, FaultStateStore
+from silvair_health_client.health_status import decode_fault_status
 
 
 def any_attention_s():
@@ -127,6 +131,127 @@ class TestHealthClientPrinter(unittest.TestCase):
 
     self.assertTrue(msg_match is not None)
 
+  def test_should_print_fault_names_when_fault_status_contains_known_and_unknown_codes(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientStatusPrinter(console_out)
+
+    mesh_command = bytes([any_test_id()]) + int(any_company_id()).to_bytes(2, byteorder="little") + \
+      bytes([0x0E, 0x40, 0x90]) + bytes([0x01, 0x00])
+
+    # WHEN
+    printer.print_fault_status(mesh_command)
+
+    # THEN
+    self.assertIn("faults: [OVERHEAT_ERR, RFU_0x40, VENDOR_SPECIFIC_0x90]", console_out.messages[0])
+
+  def test_should_print_raised_and_cleared_faults_when_print_fault_state_change_method_is_called(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientStatusPrinter(console_out)
+
+    change = FaultStateChange(FaultStateStore.FAULTS_CHANGED, 0x0005, 0.0, any_company_id(),
+                              frozenset([0x0E]), frozenset([0x0E]), frozenset([0x01]))
+
+    # WHEN
+    printer.print_fault_state_change(change)
+
+    # THEN
+    self.assertEqual(["Node 0x0005: raised: [OVERHEAT_ERR], cleared: [BATTERY_LOW_WARN]"], console_out.messages)
+
+  def test_should_print_missing_node_when_print_liveness_change_method_is_called(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientStatusPrinter(console_out)
+
+    change = LivenessChange(LivenessTracker.NODE_MISSING, 0x0005, 131.0, 100.0, 10.0)
+
+    # WHEN
+    printer.print_liveness_change(change)
+
+    # THEN
+    self.assertEqual(["Node 0x0005: missing, no Current Status for 31.0 s (published every 10.0 s)"],
+                     console_out.messages)
+
+  def test_should_print_the_same_text_when_print_record_method_is_called_with_decoded_status(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientStatusPrinter(console_out)
+
+    mesh_command = bytes([any_test_id()]) + int(any_company_id()).to_bytes(2, byteorder="little") + \
+      bytes([0x0E]) + bytes([0x01, 0x00])
+
+    # WHEN
+    printer.print_fault_status(mesh_command)
+    printer.print_record(decode_fault_status(mesh_command))
+
+    # THEN
+    self.assertEqual(console_out.messages[0], console_out.messages[1])
+
+
+class TestHealthClientJsonPrinter(unittest.TestCase):
+
+  def test_should_print_fault_status_as_json_line_when_print_fault_status_method_is_called(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientJsonPrinter(console_out, clock=lambda: 1500000000.25)
+
+    mesh_command = bytes([0x02]) + (0x0136).to_bytes(2, byteorder="little") + bytes([0x0E, 0x90]) + bytes([0x05, 0x00])
+
+    # WHEN
+    printer.print_fault_status(mesh_command)
+
+    # THEN
+    self.assertEqual(1, len(console_out.messages))
+    self.assertNotIn("\n", console_out.messages[0])
+    self.assertEqual({"timestamp": 1500000000.25, "opcode": "FAULT_STATUS", "src_addr": 0x0005, "company_id": 0x0136,
+                      "test_id": 0x02, "faults": [0x0E, 0x90], "fault_names": ["OVERHEAT_ERR", "VENDOR_SPECIFIC_0x90"]},
+                     json.loads(console_out.messages[0]))
+
+  def test_should_print_null_src_addr_when_attention_status_has_no_address_appended(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientJsonPrinter(console_out, clock=lambda: 0.0)
+
+    # WHEN
+    printer.print_attention_status(bytes([0x07]))
+
+    # THEN
+    self.assertEqual({"timestamp": 0.0, "opcode": "ATTENTION_STATUS", "src_addr": None, "attention": 0x07},
+                     json.loads(console_out.messages[0]))
+
+  def test_should_print_fault_state_change_as_json_line_when_print_fault_state_change_method_is_called(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientJsonPrinter(console_out)
+
+    change = FaultStateChange(FaultStateStore.FAULTS_CHANGED, 0x0005, 10.0, 0x0136,
+                              frozenset([0x0E]), frozenset([0x0E]), frozenset([0x01]))
+
+    # WHEN
+    printer.print_fault_state_change(change)
+
+    # THEN
+    record = json.loads(console_out.messages[0])
+    self.assertEqual("faults_changed", record["event"])
+    self.assertEqual(["OVERHEAT_ERR"], record["fault_names"])
+    self.assertEqual(([0x0E], [0x01]), (record["raised"], record["cleared"]))
+
+
+  def test_should_print_liveness_change_as_json_line_when_print_liveness_change_method_is_called(self):
+    # GIVEN
+    console_out = BufferedConsoleOut()
+    printer = HealthClientJsonPrinter(console_out)
+
+    change = LivenessChange(LivenessTracker.NODE_BACK, 0x0005, 131.0, 100.0, None)
+
+    # WHEN
+    printer.print_liveness_change(change)
+
+    # THEN
+    self.assertEqual({"timestamp": 131.0, "event": "node_back", "src_addr": 0x0005, "last_seen": 100.0,
+                      "interval": None}, json.loads(console_out.messages[0]))
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_simulator import SimulatedHealthMesh, SimulatedHealthServer, uniform_latency
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker
+from silvair_health_client.health_status import decode_status
+
+from tests.test_health_requests import ManualClock
+
+
+class RecordingEventMgr:
+
+  def __init__(self, request_tracker=None):
+    self._request_tracker = request_tracker
+    self.registered_models = []
+    self.statuses = []
+
+  def uart_registered_models(self, model_ids):
+    self.registered_models.append(model_ids)
+
+  def uart_mesh_request(self, opcode, command):
+    if self._request_tracker is not None:
+      self._request_tracker.on_mesh_status(opcode, command)
+
+    self.statuses.append(decode_status(opcode, command))
+
+
+class TestSimulatedHealthMesh(unittest.TestCase):
+
+  def test_should_respond_with_fault_status_when_fault_get_is_sent_to_node(self):
+    # GIVEN
+    clock = ManualClock()
+    tracker = HealthRequestTracker(clock=clock)
+    event_mgr = RecordingEventMgr(tracker)
+    mesh = SimulatedHealthMesh(event_mgr, [SimulatedHealthServer(0x0005, faults=[0x0E])],
+                               latency=uniform_latency(0.1, 0.1), clock=clock)
+    hc = HealthClient(mesh, 1, tracker)
+
+    # WHEN
+    future = hc.send_fault_get("0x0136", dst_addr=0x0005)
+    clock.now = 0.1
+    mesh.run_pending()
+
+    # THEN
+    status = decode_status(HealthClientOpcodes.FAULT_STATUS, future.result(0))
+    self.assertEqual(0x0005, status.src_addr)
+    self.assertEqual(bytes([0x0E]), status.faults)
+
+  def test_should_not_respond_when_company_id_is_different(self):
+    # GIVEN
+    event_mgr = RecordingEventMgr()
+    mesh = SimulatedHealthMesh(event_mgr, [SimulatedHealthServer(0x0005, company_id=0x0136)])
+
+    # WHEN
+    HealthClient(mesh, 1).send_fault_get("0x1234", dst_addr=0x0005)
+
+    # THEN
+    self.assertEqual(0, mesh.run_pending(float("inf")))
+
+  def test_should_publish_current_status_periodically_from_every_node(self):
+    # GIVEN
+    clock = ManualClock()
+    event_mgr = RecordingEventMgr()
+    nodes = [SimulatedHealthServer(addr, publish_period=10.0) for addr in range(1, 1001)]
+    mesh = SimulatedHealthMesh(event_mgr, nodes, seed=1, clock=clock)
+
+    # WHEN
+    delivered = mesh.run_pending(30.0)
+
+    # THEN
+    self.assertEqual(3000, delivered)
+    self.assertEqual(set(range(1, 1001)), {status.src_addr for status in event_mgr.statuses})
+
+  def test_should_publish_faster_when_node_has_faults_and_fast_period_divisor_is_set(self):
+    # GIVEN
+    clock = ManualClock()
+    node = SimulatedHealthServer(0x0005, faults=[0x01], publish_period=8.0)
+    event_mgr = RecordingEventMgr()
+    mesh = SimulatedHealthMesh(event_mgr, [node], clock=clock)
+
+    # WHEN
+    HealthClient(mesh, 1).send_period_set(2, unack=True)
+
+    # THEN
+    self.assertEqual(2.0, node.current_publish_period)
+
+  def test_should_lose_every_message_when_loss_rate_is_one(self):
+    # GIVEN
+    event_mgr = RecordingEventMgr()
+    mesh = SimulatedHealthMesh(event_mgr, [SimulatedHealthServer(addr) for addr in range(1, 11)], loss_rate=1.0)
+
+    # WHEN
+    HealthClient(mesh, 1).send_attention_get()
+
+    # THEN
+    self.assertEqual(0, mesh.run_pending(float("inf")))
+    self.assertEqual(10, mesh.lost_messages)
+
+  def test_should_report_registered_models_when_reset(self):
+    # GIVEN
+    event_mgr = RecordingEventMgr()
+    mesh = SimulatedHealthMesh(event_mgr, [], model_ids=[0x0002])
+
+    # WHEN
+    mesh.reset()
+
+    # THEN
+    self.assertEqual([[0x0002]], event_mgr.registered_models)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,237 @@
+import threading
+import unittest
+
+from concurrent.futures import Future
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_sweep import AttentionCampaign, FaultSweep, RequestWindow, \
+  parse_address_range
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker, RetryPolicy
+
+from tests.test_health_client import any_instance_index
+
+
+class RespondingSender:
+
+  supports_dst_addr = True
+
+  def __init__(self, tracker, silent_addrs=(), lost_messages=0):
+    self._tracker = tracker
+    self._silent_addrs = silent_addrs
+    self._lost_messages = lost_messages
+    self.sent_messages = []
+
+  def send_message(self, msg):
+    self.sent_messages.append(msg)
+
+    if msg.dst_addr in self._silent_addrs or len(self.sent_messages) <= self._lost_messages:
+      return
+
+    command = bytes([0x00]) + msg.mesh_command + bytes([0x0D]) + msg.dst_addr.to_bytes(2, byteorder="little")
+    threading.Thread(target=self._tracker.on_mesh_status, args=(HealthClientOpcodes.FAULT_STATUS, command)).start()
+
+
+class TestFaultSweep(unittest.TestCase):
+
+  def test_should_return_result_for_every_address_when_sweep_is_run(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=0.2)
+    tracker.start()
+    self.addCleanup(tracker.stop)
+
+    sender = RespondingSender(tracker, silent_addrs=(0x0003,))
+    sweep = FaultSweep(HealthClient(sender, any_instance_index(), tracker), concurrency=2)
+
+    # WHEN
+    results = sweep.run("0x0136", range(1, 6))
+
+    # THEN
+    self.assertEqual([1, 2, 3, 4, 5], [result.src_addr for result in results])
+    self.assertEqual(5, len(sender.sent_messages))
+
+    for result in results:
+      if result.src_addr == 0x0003:
+        self.assertEqual(1, result.timeouts)
+        self.assertIsNotNone(result.error)
+      else:
+        self.assertEqual(0x0136, result.company_id)
+        self.assertEqual(bytes([0x0D]), result.faults)
+        self.assertIsNone(result.error)
+
+  def test_should_report_missed_attempts_when_node_answers_retry(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=0.1, retry_policy=RetryPolicy(max_attempts=3, jitter=0.0))
+    tracker.start()
+    self.addCleanup(tracker.stop)
+
+    sender = RespondingSender(tracker, lost_messages=2)
+    sweep = FaultSweep(HealthClient(sender, any_instance_index(), tracker))
+
+    # WHEN
+    results = sweep.run("0x0136", [0x0004])
+
+    # THEN
+    self.assertIsNone(results[0].error)
+    self.assertEqual(2, results[0].timeouts)
+
+  def test_should_raise_value_error_when_sender_cannot_address_requests(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    sender = RespondingSender(tracker)
+    sender.supports_dst_addr = False
+
+    # THEN
+    with self.assertRaises(ValueError):
+      FaultSweep(HealthClient(sender, any_instance_index(), tracker))
+
+
+class AttentionServersSender:
+
+  supports_dst_addr = True
+
+  def __init__(self, tracker, ignored_attempts):
+    self._tracker = tracker
+    self._ignored_attempts = dict(ignored_attempts)
+    self.sent_messages = []
+
+  def send_message(self, msg):
+    self.sent_messages.append(msg)
+
+    if self._ignored_attempts.get(msg.dst_addr, 0) > 0:
+      self._ignored_attempts[msg.dst_addr] -= 1
+      return
+
+    command = msg.mesh_command + msg.dst_addr.to_bytes(2, byteorder="little")
+    threading.Thread(target=self._tracker.on_mesh_status,
+                     args=(HealthClientOpcodes.ATTENTION_STATUS, command)).start()
+
+
+class TestAttentionCampaign(unittest.TestCase):
+
+  def setUp(self):
+    self.tracker = HealthRequestTracker(timeout=0.1)
+    self.tracker.start()
+    self.addCleanup(self.tracker.stop)
+
+  def test_should_reissue_attention_to_nodes_which_have_not_confirmed(self):
+    # GIVEN
+    sender = AttentionServersSender(self.tracker, {0x0002: 1, 0x0004: 10})
+    campaign = AttentionCampaign(HealthClient(sender, any_instance_index(), self.tracker), concurrency=2, reissues=2)
+
+    # WHEN
+    results = campaign.run(30, [range(1, 3), range(3, 5)])
+
+    # THEN
+    self.assertEqual([1, 2, 3, 4], [result.src_addr for result in results])
+    self.assertEqual([1, 2, 1, 3], [result.attempts for result in results])
+    self.assertEqual([None, None, None], [result.error for result in results[:3]])
+    self.assertEqual([30, 30, 30], [result.attention for result in results[:3]])
+    self.assertIsNotNone(results[3].error)
+    self.assertEqual(7, len(sender.sent_messages))
+
+  def test_should_finish_wave_before_next_one_is_started(self):
+    # GIVEN
+    sender = AttentionServersSender(self.tracker, {0x0001: 1})
+    campaign = AttentionCampaign(HealthClient(sender, any_instance_index(), self.tracker), concurrency=8)
+
+    # WHEN
+    campaign.run(5, [[0x0001, 0x0002], [0x0003]])
+
+    # THEN
+    self.assertEqual([0x0001, 0x0002, 0x0001, 0x0003], [msg.dst_addr for msg in sender.sent_messages])
+
+  def test_should_report_error_when_node_does_not_confirm_attention_state(self):
+    # GIVEN
+    class AttentionOffSender(AttentionServersSender):
+
+      def send_message(self, msg):
+        msg.mesh_command = bytes([0x00])
+        super().send_message(msg)
+
+    sender = AttentionOffSender(self.tracker, {})
+    campaign = AttentionCampaign(HealthClient(sender, any_instance_index(), self.tracker), reissues=0)
+
+    # WHEN
+    results = campaign.run(30, [[0x0001]])
+
+    # THEN
+    self.assertEqual(0, results[0].attention)
+    self.assertIn("not confirmed", results[0].error)
+
+  def test_should_send_request_once_per_reissue_when_tracker_retries_requests(self):
+    # GIVEN
+    tracker = HealthRequestTracker(timeout=0.05, retry_policy=RetryPolicy(max_attempts=3))
+    tracker.start()
+    self.addCleanup(tracker.stop)
+
+    sender = AttentionServersSender(tracker, {0x0001: 10})
+    campaign = AttentionCampaign(HealthClient(sender, any_instance_index(), tracker), reissues=1)
+
+    # WHEN
+    results = campaign.run(30, [[0x0001]])
+
+    # THEN
+    self.assertEqual(2, results[0].attempts)
+    self.assertEqual(2, len(sender.sent_messages))
+
+  def test_should_raise_value_error_before_sending_when_attention_time_is_out_of_range(self):
+    # GIVEN
+    sender = AttentionServersSender(self.tracker, {})
+    campaign = AttentionCampaign(HealthClient(sender, any_instance_index(), self.tracker))
+
+    # WHEN / THEN
+    with self.assertRaises(ValueError):
+      campaign.run(256, [[0x0001]])
+
+    self.assertEqual(0, len(sender.sent_messages))
+
+
+class TestRequestWindow(unittest.TestCase):
+
+  def test_should_keep_at_most_concurrency_requests_in_flight(self):
+    # GIVEN
+    window = RequestWindow(concurrency=3)
+    lock = threading.Lock()
+    in_flight = [0, 0]
+    futures = []
+
+    def send(target):
+      future = Future()
+
+      with lock:
+        in_flight[0] += 1
+        in_flight[1] = max(in_flight[1], in_flight[0])
+
+      def complete():
+        with lock:
+          in_flight[0] -= 1
+        future.set_result(target)
+
+      threading.Timer(0.01, complete).start()
+      futures.append(future)
+      return future
+
+    # WHEN
+    window.run(range(20), send, lambda target, future, latency: None)
+
+    # THEN
+    self.assertEqual(20, len(futures))
+    self.assertLessEqual(in_flight[1], 3)
+
+
+class TestParseAddressRange(unittest.TestCase):
+
+  def test_should_return_inclusive_range_when_range_is_given(self):
+    self.assertEqual(range(0x0001, 0x0191), parse_address_range("0x0001-0x0190"))
+
+  def test_should_return_single_address_when_address_is_given(self):
+    self.assertEqual(range(0x0010, 0x0011), parse_address_range("0x0010"))
+
+  def test_should_raise_value_error_when_range_is_reversed(self):
+    with self.assertRaises(ValueError):
+      parse_address_range("0x0010-0x0001")
+
+
+if __name__ == "__main__":
+  unittest.main()
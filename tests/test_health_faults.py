@@ -0,0 +1,94 @@
+import unittest
+
+from silvair_health_client.health_faults import HealthFaults, HealthFaultSeverity, FAULT_NAMES, FAULT_SEVERITIES, \
+  FaultSet, fault_codes, ERROR_FAULTS, WARNING_FAULTS, VENDOR_FAULTS, DALI_FAULTS, ALL_FAULTS
+
+
+class TestHealthFaultTables(unittest.TestCase):
+
+  def test_should_name_every_fault_code(self):
+    self.assertEqual(256, len(FAULT_NAMES))
+    self.assertTrue(all(FAULT_NAMES))
+
+  def test_should_use_enum_name_when_fault_code_is_defined(self):
+    for fault in HealthFaults:
+      if fault.name.endswith(("_START", "_END")):
+        continue
+
+      self.assertEqual(fault.name, FAULT_NAMES[fault])
+
+  def test_should_name_unknown_codes_by_range(self):
+    self.assertEqual("RFU_0x40", FAULT_NAMES[0x40])
+    self.assertEqual("VENDOR_SPECIFIC_0x90", FAULT_NAMES[0x90])
+
+  def test_should_classify_severity_by_fault_name(self):
+    for code in range(0x01, HealthFaults.RFU_START):
+      expected = HealthFaultSeverity.WARNING if FAULT_NAMES[code].endswith("_WARN") else HealthFaultSeverity.ERROR
+      self.assertEqual(expected, FAULT_SEVERITIES[code])
+
+  def test_should_classify_severity_of_reserved_and_vendor_codes(self):
+    self.assertEqual(HealthFaultSeverity.NONE, FAULT_SEVERITIES[HealthFaults.NO_FAULT])
+    self.assertEqual(HealthFaultSeverity.RFU, FAULT_SEVERITIES[0x40])
+    self.assertEqual(HealthFaultSeverity.VENDOR, FAULT_SEVERITIES[0x90])
+
+  def test_should_classify_severity_of_named_vendor_codes_by_name_suffix(self):
+    self.assertEqual(HealthFaultSeverity.ERROR, FAULT_SEVERITIES[HealthFaults.DALI_LIMIT_ERROR])
+    self.assertEqual(HealthFaultSeverity.ERROR, FAULT_SEVERITIES[HealthFaults.DALI_CONTROL_GEAR_FAILURE])
+    self.assertEqual(HealthFaultSeverity.WARNING, FAULT_SEVERITIES[HealthFaults.DALI_NO_RESPONSE_WARNING])
+
+  def test_should_return_codes_of_faults_matching_name_pattern(self):
+    self.assertEqual([HealthFaults.OVERHEAT_WARN, HealthFaults.OVERHEAT_ERR], list(fault_codes("OVERHEAT_*")))
+    self.assertEqual(FaultSet(), fault_codes("UNKNOWN_*"))
+
+
+class TestFaultSet(unittest.TestCase):
+
+  def test_should_contain_fault_codes_without_no_fault(self):
+    # WHEN
+    faults = FaultSet.from_codes([HealthFaults.NO_FAULT, HealthFaults.OVERHEAT_ERR, 0xFF, HealthFaults.BATTERY_LOW_WARN])
+
+    # THEN
+    self.assertEqual([HealthFaults.BATTERY_LOW_WARN, HealthFaults.OVERHEAT_ERR, 0xFF], list(faults))
+    self.assertEqual(3, len(faults))
+    self.assertIn(HealthFaults.OVERHEAT_ERR, faults)
+    self.assertNotIn(HealthFaults.NO_FAULT, faults)
+    self.assertEqual(["BATTERY_LOW_WARN", "OVERHEAT_ERR", "VENDOR_SPECIFIC_0xff"], faults.names())
+
+  def test_should_combine_sets_when_set_operators_are_used(self):
+    # GIVEN
+    first = FaultSet.from_codes([0x01, 0x02, 0x03])
+    second = FaultSet.from_codes([0x03, 0x04])
+
+    # THEN
+    self.assertEqual(FaultSet.from_codes([0x01, 0x02, 0x03, 0x04]), first | second)
+    self.assertEqual(FaultSet.from_codes([0x03]), first & second)
+    self.assertEqual(FaultSet.from_codes([0x01, 0x02]), first - second)
+    self.assertEqual(FaultSet.from_codes([0x01, 0x02, 0x04]), first ^ second)
+    self.assertEqual(253, len(~second))
+    self.assertFalse(FaultSet())
+
+  def test_should_decode_encoded_bitmap(self):
+    # GIVEN
+    faults = FaultSet.from_codes([0x01, 0x0E, 0x81, 0xFF])
+
+    # WHEN
+    bitmap = faults.to_bytes()
+
+    # THEN
+    self.assertEqual(32, len(bitmap))
+    self.assertEqual(faults, FaultSet.from_bytes(bitmap))
+
+  def test_should_split_faults_by_severity_masks(self):
+    self.assertEqual(255, len(ALL_FAULTS))
+    self.assertEqual(ALL_FAULTS, WARNING_FAULTS | ERROR_FAULTS | fault_codes("RFU_*") | VENDOR_FAULTS)
+    self.assertFalse(WARNING_FAULTS & ERROR_FAULTS)
+    self.assertIn(HealthFaults.OVERHEAT_ERR, ERROR_FAULTS)
+    self.assertIn(HealthFaults.OVERHEAT_WARN, WARNING_FAULTS)
+    self.assertEqual(5, len(DALI_FAULTS))
+    self.assertEqual(DALI_FAULTS, DALI_FAULTS & VENDOR_FAULTS)
+    self.assertIn(HealthFaults.DALI_NO_RESPONSE_ERROR, ERROR_FAULTS)
+    self.assertIn(HealthFaults.DALI_NO_RESPONSE_WARNING, WARNING_FAULTS)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from silvair_health_client.health_faults import HealthFaults, FaultSet, fault_codes
+from silvair_health_client.health_history import FaultHistory, HistoryRecord
+from silvair_health_client.health_status import CurrentStatus, FaultStatus
+
+
+def current_status(src_addr, faults):
+  return CurrentStatus(0, 0x0136, bytes(faults), src_addr)
+
+
+class TestFaultHistory(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, self.directory)
+
+    self.history = FaultHistory(self.directory)
+    self.addCleanup(self.history.close)
+
+  def test_should_return_appended_records_within_time_window(self):
+    # GIVEN
+    self.history.on_status(current_status(0x0005, [0x0E]), timestamp=100.0)
+    self.history.on_status(FaultStatus(0x01, 0x0136, bytes([0x00, 0x81]), 0x0006), timestamp=200.0)
+    self.history.on_status(current_status(0x0007, []), timestamp=300.0)
+
+    # WHEN
+    records = self.history.records(since=150.0, until=300.0)
+
+    # THEN
+    self.assertEqual([HistoryRecord(200.0, 0x0006, 0x0136, 0x01, FaultSet.from_codes([0x81]))], records)
+    self.assertEqual(3, len(self.history))
+
+  def test_should_return_nodes_with_matching_faults_when_nodes_are_queried(self):
+    # GIVEN
+    self.history.on_status(current_status(0x0005, [HealthFaults.OVERHEAT_ERR]), timestamp=100.0)
+    self.history.on_status(current_status(0x0006, [HealthFaults.BATTERY_LOW_WARN]), timestamp=110.0)
+    self.history.on_status(current_status(0x0007, [HealthFaults.OVERHEAT_WARN, 0x81]), timestamp=120.0)
+    self.history.on_status(current_status(0x0008, [HealthFaults.OVERHEAT_WARN]), timestamp=130.0)
+    self.history.on_status(current_status(0x0009, [HealthFaults.NO_FAULT]), timestamp=140.0)
+
+    # WHEN
+    overheated = self.history.nodes_with_faults(fault_codes("OVERHEAT_*"), until=130.0)
+    faulty = self.history.nodes_with_faults()
+
+    # THEN
+    self.assertEqual({0x0005, 0x0007}, overheated)
+    self.assertEqual({0x0005, 0x0006, 0x0007, 0x0008}, faulty)
+
+  def test_should_count_faulty_statuses_per_node_and_interval(self):
+    # GIVEN
+    for timestamp in (3600.0, 3700.0, 7300.0):
+      self.history.on_status(current_status(0x0005, [0x0E]), timestamp=timestamp)
+
+    self.history.on_status(current_status(0x0006, []), timestamp=3800.0)
+
+    # WHEN
+    counts = self.history.fault_counts(interval=3600.0)
+
+    # THEN
+    self.assertEqual({(0x0005, 3600.0): 2, (0x0005, 7200.0): 1}, dict(counts))
+
+  def test_should_query_rows_appended_after_previous_query(self):
+    # GIVEN
+    self.history.on_status(current_status(0x0005, [0x0E]), timestamp=100.0)
+    self.history.nodes_with_faults()
+
+    # WHEN
+    self.history.on_status(current_status(0x0006, [0x0E]), timestamp=200.0)
+
+    # THEN
+    self.assertEqual({0x0005, 0x0006}, self.history.nodes_with_faults())
+
+  def test_should_keep_rows_and_drop_partial_row_when_history_is_reopened(self):
+    # GIVEN
+    self.history.on_status(current_status(0x0005, [0x0E]), timestamp=100.0)
+    self.history.on_status(current_status(0x0006, [0x0E]), timestamp=200.0)
+    self.history.close()
+
+    with open(os.path.join(self.directory, "faults.col"), "r+b") as column:
+      column.truncate(40)
+
+    # WHEN
+    self.history = FaultHistory(self.directory)
+
+    # THEN
+    self.assertEqual(1, len(self.history))
+    self.assertEqual({0x0005}, self.history.nodes_with_faults())
+
+  def test_should_store_status_with_last_timestamp_when_it_is_stamped_earlier(self):
+    # GIVEN
+    self.history.on_status(current_status(0x0005, [0x0E]), timestamp=200.0)
+
+    # WHEN
+    self.history.on_status(current_status(0x0006, [0x0E]), timestamp=100.0)
+
+    # THEN
+    self.assertEqual([200.0, 200.0], [record.timestamp for record in self.history.records()])
+    self.assertEqual({0x0005, 0x0006}, self.history.nodes_with_faults(since=150.0))
+
+  def test_should_write_buffered_rows_when_batch_is_full(self):
+    # GIVEN
+    history = FaultHistory(self.directory, batch_rows=2)
+    self.addCleanup(history.close)
+    timestamp_path = os.path.join(self.directory, "timestamp.col")
+
+    # WHEN
+    history.on_status(current_status(0x0005, [0x0E]), timestamp=100.0)
+    buffered_size = os.path.getsize(timestamp_path)
+    history.on_status(current_status(0x0006, [0x0E]), timestamp=200.0)
+    history.flush()
+
+    # THEN
+    self.assertEqual(0, buffered_size)
+    self.assertEqual(16, os.path.getsize(timestamp_path))
+
+  def test_should_return_nothing_when_history_is_empty(self):
+    self.assertEqual(set(), self.history.nodes_with_faults())
+    self.assertEqual([], self.history.records())
+
+
+if __name__ == "__main__":
+  unittest.main()
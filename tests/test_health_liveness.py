@@ -0,0 +1,191 @@
+import time
+import unittest
+
+from silvair_health_client.health_liveness import LivenessTracker
+from silvair_health_client.health_status import CurrentStatus, PeriodStatus
+
+from tests.test_health_requests import ManualClock
+
+
+def current_status(src_addr, faults=()):
+  return CurrentStatus(0, 0x0136, bytes(faults), src_addr)
+
+
+class TestLivenessTracker(unittest.TestCase):
+
+  def setUp(self):
+    self.changes = []
+    self.clock = ManualClock()
+    self.tracker = LivenessTracker(missed_publications=3, smoothing=0.5, clock=self.clock)
+    self.tracker.add_listener(self.changes.append)
+
+  def publish(self, src_addr, at, faults=()):
+    self.clock.now = at
+    return self.tracker.on_status(current_status(src_addr, faults))
+
+  def test_should_report_missing_node_when_it_stops_publishing(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 10.0)
+
+    # WHEN
+    before_deadline = self.tracker.expire(now=39.0)
+    after_deadline = self.tracker.expire(now=40.0)
+    self.tracker.expire(now=100.0)
+
+    # THEN
+    self.assertEqual([], before_deadline)
+    self.assertEqual(1, len(after_deadline))
+    self.assertEqual((LivenessTracker.NODE_MISSING, 0x0005, 40.0, 10.0, 10.0), after_deadline[0])
+    self.assertEqual(after_deadline, self.changes)
+
+  def test_should_not_report_node_when_its_interval_is_not_learned_yet(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+
+    # WHEN
+    changes = self.tracker.expire(now=1000.0)
+
+    # THEN
+    self.assertEqual([], changes)
+    self.assertIsNone(self.tracker.expected_interval(0x0005))
+
+  def test_should_postpone_deadline_when_node_publishes_again(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 10.0)
+
+    # WHEN
+    self.publish(0x0005, 20.0)
+
+    # THEN
+    self.assertEqual([], self.tracker.expire(now=40.0))
+    self.assertEqual(1, len(self.tracker.expire(now=50.0)))
+
+  def test_should_report_node_back_when_missing_node_publishes(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 10.0)
+    self.tracker.expire(now=40.0)
+
+    # WHEN
+    change = self.publish(0x0005, 45.0)
+
+    # THEN
+    self.assertEqual(LivenessTracker.NODE_BACK, change.kind)
+    self.assertEqual([LivenessTracker.NODE_MISSING, LivenessTracker.NODE_BACK], [c.kind for c in self.changes])
+
+  def test_should_smooth_learned_interval_and_skip_single_lost_publication(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 10.0)
+
+    # WHEN
+    self.publish(0x0005, 22.0)
+    self.publish(0x0005, 44.0)
+
+    # THEN
+    self.assertEqual(11.0, self.tracker.expected_interval(0x0005))
+
+  def test_should_learn_new_interval_when_publish_period_is_changed(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 10.0)
+
+    # WHEN
+    self.publish(0x0005, 30.0)
+    self.publish(0x0005, 50.0)
+
+    # THEN
+    self.assertEqual(20.0, self.tracker.expected_interval(0x0005))
+
+  def test_should_keep_learned_interval_when_publications_are_received_through_two_modems(self):
+    # GIVEN
+    for at in (0.0, 10.0, 20.0):
+      self.publish(0x0005, at)
+      self.publish(0x0005, at + 0.02)
+
+    # WHEN
+    self.publish(0x0005, 30.0)
+    self.publish(0x0005, 30.02)
+    self.publish(0x0005, 40.0)
+
+    # THEN
+    self.assertEqual(10.0, self.tracker.expected_interval(0x0005))
+    self.assertEqual([], self.tracker.expire(now=69.0))
+    self.assertEqual(1, len(self.tracker.expire(now=70.0)))
+
+  def test_should_not_learn_interval_far_below_learned_one(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 10.0)
+
+    # WHEN
+    self.clock.now = 11.0
+    self.tracker.on_status(CurrentStatus(1, 0x0136, bytes(), 0x0005))
+    self.publish(0x0005, 20.0)
+
+    # THEN
+    self.assertEqual(10.0, self.tracker.expected_interval(0x0005))
+
+  def test_should_expect_fast_period_when_node_with_known_divisor_registers_faults(self):
+    # GIVEN
+    self.tracker.on_status(PeriodStatus(2, 0x0005))
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 40.0)
+
+    # WHEN
+    self.publish(0x0005, 50.0, faults=[0x0E])
+
+    # THEN
+    self.assertEqual(10.0, self.tracker.expected_interval(0x0005))
+    self.assertEqual(1, len(self.tracker.expire(now=80.0)))
+
+  def test_should_wait_regular_period_when_node_with_unknown_divisor_registers_faults(self):
+    # GIVEN
+    self.publish(0x0005, 0.0)
+    self.publish(0x0005, 40.0)
+
+    # WHEN
+    self.publish(0x0005, 50.0, faults=[0x0E])
+    self.publish(0x0005, 60.0, faults=[0x0E])
+
+    # THEN
+    self.assertEqual(10.0, self.tracker.expected_interval(0x0005))
+
+  def test_should_track_each_node_separately(self):
+    # GIVEN
+    for src_addr in range(1, 1001):
+      self.publish(src_addr, 0.0)
+      self.publish(src_addr, float(src_addr))
+
+    # WHEN
+    changes = self.tracker.expire(now=300.0)
+
+    # THEN
+    self.assertEqual(list(range(1, 76)), [change.src_addr for change in changes])
+    self.assertEqual(1000, len(self.tracker))
+
+  def test_should_report_missing_node_in_background_when_started(self):
+    # GIVEN
+    tracker = LivenessTracker(missed_publications=2)
+    tracker.add_listener(self.changes.append)
+    tracker.start()
+    self.addCleanup(tracker.stop)
+
+    now = time.time()
+    tracker.on_status(current_status(0x0005), timestamp=now - 0.02)
+    tracker.on_status(CurrentStatus(1, 0x0136, bytes(), 0x0005), timestamp=now)
+
+    # THEN
+    for _ in range(100):
+      if self.changes:
+        break
+
+      time.sleep(0.01)
+
+    self.assertEqual([LivenessTracker.NODE_MISSING], [change.kind for change in self.changes])
+
+
+if __name__ == "__main__":
+  unittest.main()
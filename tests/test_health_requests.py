@@ -0,0 +1,341 @@
+import random
+import unittest
+
+from silvair_health_client.health_client import HealthClient
+from silvair_health_client.health_client_pacing import PacedSender, PRIORITY_BULK, send_priority
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_requests import HealthRequestTracker, HealthRequestTimeout, RetryPolicy, \
+  RetryBudget
+from silvair_health_client.health_status import status_src_addr
+
+from tests.test_health_client import BufferedSender, any_company_id, any_instance_index
+
+
+def any_addr():
+  return random.randrange(0x0001, 0x8000)
+
+
+def any_addr_different_than(addr):
+  other = any_addr()
+
+  while other == addr:
+    other = any_addr()
+
+  return other
+
+
+def fault_status(src_addr, faults=bytes()):
+  return bytes(3) + faults + src_addr.to_bytes(2, byteorder="little")
+
+
+class ManualClock:
+
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+class TestHealthRequestTracker(unittest.TestCase):
+
+  def test_should_resolve_request_when_status_from_destination_is_received(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    addr = any_addr()
+    request = tracker.track(HealthClientOpcodes.FAULT_GET, addr)
+    command = fault_status(addr, bytes([0x01]))
+
+    # WHEN
+    res = tracker.on_mesh_status(HealthClientOpcodes.FAULT_STATUS, command)
+
+    # THEN
+    self.assertTrue(res)
+    self.assertEqual(command, request.future.result(0))
+    self.assertEqual(0, tracker.pending_count)
+
+  def test_should_not_resolve_request_when_status_from_other_address_is_received(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    addr = any_addr()
+    request = tracker.track(HealthClientOpcodes.FAULT_GET, addr)
+
+    # WHEN
+    res = tracker.on_mesh_status(HealthClientOpcodes.FAULT_STATUS, fault_status(any_addr_different_than(addr)))
+
+    # THEN
+    self.assertFalse(res)
+    self.assertFalse(request.future.done())
+    self.assertEqual(1, tracker.stats["unmatched"])
+
+  def test_should_resolve_publication_request_when_status_from_any_address_is_received(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    request = tracker.track(HealthClientOpcodes.PERIOD_SET)
+
+    # WHEN
+    res = tracker.on_mesh_status(HealthClientOpcodes.PERIOD_STATUS, bytes([0x02]) + any_addr().to_bytes(2, "little"))
+
+    # THEN
+    self.assertTrue(res)
+    self.assertTrue(request.future.done())
+
+  def test_should_resolve_requests_in_order_when_statuses_with_same_key_are_received(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    first = tracker.track(HealthClientOpcodes.ATTENTION_GET)
+    second = tracker.track(HealthClientOpcodes.ATTENTION_SET)
+
+    # WHEN
+    tracker.on_mesh_status(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x01]))
+
+    # THEN
+    self.assertTrue(first.future.done())
+    self.assertFalse(second.future.done())
+
+  def test_should_fail_request_with_timeout_when_deadline_passes(self):
+    # GIVEN
+    clock = ManualClock()
+    tracker = HealthRequestTracker(timeout=1.0, clock=clock)
+    request = tracker.track(HealthClientOpcodes.FAULT_GET, any_addr())
+
+    # WHEN
+    clock.now = 1.0
+    expired = tracker.expire()
+
+    # THEN
+    self.assertEqual([request], expired)
+    self.assertIsInstance(request.future.exception(0), HealthRequestTimeout)
+    self.assertEqual(1, tracker.stats["timed_out"])
+
+  def test_should_start_timeout_of_queued_request_when_it_is_sent(self):
+    # GIVEN
+    clock = ManualClock()
+    tracker = HealthRequestTracker(timeout=1.0, clock=clock)
+    request = tracker.track(HealthClientOpcodes.FAULT_GET, any_addr(), queued=True)
+
+    # WHEN
+    clock.now = 5.0
+    expired_in_queue = tracker.expire()
+    tracker.sent(request)
+
+    # THEN
+    self.assertEqual([], expired_in_queue)
+    self.assertEqual([], tracker.expire(5.5))
+    self.assertEqual([request], tracker.expire(6.0))
+
+  def test_should_keep_expiring_requests_when_tracked_future_is_cancelled(self):
+    # GIVEN
+    clock = ManualClock()
+    tracker = HealthRequestTracker(timeout=1.0, clock=clock)
+    cancelled = tracker.track(HealthClientOpcodes.FAULT_GET, any_addr())
+    cancelled.future.cancel()
+    clock.now = 0.5
+    request = tracker.track(HealthClientOpcodes.FAULT_GET, any_addr())
+
+    # WHEN
+    clock.now = 1.0
+    first = tracker.expire()
+    clock.now = 1.5
+    second = tracker.expire()
+
+    # THEN
+    self.assertEqual([], first)
+    self.assertEqual([request], second)
+    self.assertIsInstance(request.future.exception(0), HealthRequestTimeout)
+    self.assertEqual(1, tracker.stats["timed_out"])
+    self.assertEqual(0, tracker.pending_count)
+
+  def test_should_skip_cancelled_request_when_matching_status_is_received(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    addr = any_addr()
+    cancelled = tracker.track(HealthClientOpcodes.FAULT_GET, addr)
+    request = tracker.track(HealthClientOpcodes.FAULT_GET, addr)
+    cancelled.future.cancel()
+
+    # WHEN
+    res = tracker.on_mesh_status(HealthClientOpcodes.FAULT_STATUS, fault_status(addr))
+
+    # THEN
+    self.assertTrue(res)
+    self.assertTrue(request.future.done())
+    self.assertTrue(cancelled.future.cancelled())
+
+  def test_should_return_none_when_status_src_addr_is_called_with_payload_without_address(self):
+    self.assertIsNone(status_src_addr(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x01])))
+
+
+class TestTrackedHealthClient(unittest.TestCase):
+
+  def test_should_return_future_when_acknowledged_message_is_sent_with_tracker(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    hc = HealthClient(BufferedSender(), any_instance_index(), tracker)
+
+    # WHEN
+    future = hc.send_fault_get(any_company_id())
+
+    # THEN
+    self.assertIsNotNone(future)
+    self.assertEqual(1, tracker.pending_count)
+
+  def test_should_return_none_when_unacknowledged_message_is_sent_with_tracker(self):
+    # GIVEN
+    tracker = HealthRequestTracker()
+    hc = HealthClient(BufferedSender(), any_instance_index(), tracker)
+
+    # WHEN
+    future = hc.send_fault_clear(any_company_id(), unack=True)
+
+    # THEN
+    self.assertIsNone(future)
+    self.assertEqual(0, tracker.pending_count)
+
+
+class TestHealthRequestRetries(unittest.TestCase):
+
+  def setUp(self):
+    self.clock = ManualClock()
+    self.sender = BufferedSender()
+    self.tracker = HealthRequestTracker(timeout=1.0, clock=self.clock,
+                                        retry_policy=RetryPolicy(max_attempts=3, backoff=2.0, rng=lambda: 0.5))
+    self.hc = HealthClient(self.sender, any_instance_index(), self.tracker)
+
+  def test_should_resend_request_with_backoff_when_status_is_not_received_in_time(self):
+    # GIVEN
+    future = self.hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+
+    # WHEN
+    self.tracker.expire(1.0)
+    self.tracker.expire(2.9)
+    resent_after_backoff = len(self.sender.sent_messages)
+    self.tracker.expire(3.0)
+
+    # THEN
+    self.assertEqual(2, resent_after_backoff)
+    self.assertEqual(3, len(self.sender.sent_messages))
+    self.assertFalse(future.done())
+    self.assertEqual(2, self.tracker.stats["retried"])
+
+  def test_should_fail_request_when_attempts_are_exhausted(self):
+    # GIVEN
+    future = self.hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+
+    # WHEN
+    for now in (1.0, 3.0, 7.0):
+      self.tracker.expire(now)
+
+    # THEN
+    self.assertEqual(3, len(self.sender.sent_messages))
+    self.assertEqual(3, future.exception(0).request.attempts)
+
+  def test_should_not_resend_unacknowledged_request(self):
+    # WHEN
+    self.hc.send_fault_clear(any_company_id(), unack=True, dst_addr=0x0005)
+    self.tracker.expire(10.0)
+
+    # THEN
+    self.assertEqual(1, len(self.sender.sent_messages))
+
+  def test_should_stop_resending_requests_when_retry_budget_is_exhausted(self):
+    # GIVEN
+    hc = self.hc.with_retry_budget(RetryBudget(1))
+    first = hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+    second = hc.send_fault_get(any_company_id(), dst_addr=0x0006)
+
+    # WHEN
+    self.tracker.expire(1.0)
+
+    # THEN
+    self.assertEqual(3, len(self.sender.sent_messages))
+    self.assertEqual(1, [first.done(), second.done()].count(True))
+
+  def test_should_reject_late_duplicate_status_when_retried_request_is_completed(self):
+    # GIVEN
+    future = self.hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+    self.tracker.expire(1.0)
+
+    # WHEN
+    first = self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+    duplicate = self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+
+    # THEN
+    self.assertTrue(future.done())
+    self.assertTrue(first)
+    self.assertFalse(duplicate)
+    self.assertEqual(1, self.tracker.stats["duplicates"])
+    self.assertNotIn("unmatched", self.tracker.stats)
+
+  def test_should_accept_status_with_other_payload_when_retried_request_is_completed(self):
+    # GIVEN
+    self.hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+    self.tracker.expire(1.0)
+    self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+
+    # WHEN
+    res = self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005, bytes([0x0E])))
+
+    # THEN
+    self.assertTrue(res)
+    self.assertNotIn("duplicates", self.tracker.stats)
+
+  def test_should_complete_newer_request_with_status_identical_to_late_duplicate(self):
+    # GIVEN
+    self.hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+    self.tracker.expire(1.0)
+    self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+    future = self.hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+
+    # WHEN
+    reply = self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+    other = self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005))
+
+    # THEN
+    self.assertTrue(reply)
+    self.assertTrue(other)
+    self.assertTrue(future.done())
+    self.assertNotIn("duplicates", self.tracker.stats)
+
+  def test_should_fail_request_on_deadline_when_resend_cannot_be_queued(self):
+    # GIVEN
+    sender = PacedSender(BufferedSender(), rate=1.0, burst=1, max_queued=1, clock=self.clock)
+    sender.start()
+    self.addCleanup(sender.stop)
+    hc = HealthClient(sender, any_instance_index(), self.tracker)
+    future = hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+    hc.send_fault_get(any_company_id(), dst_addr=0x0006)
+
+    # WHEN
+    self.tracker.expire(1.0)
+    self.tracker.expire(10.0)
+
+    # THEN
+    self.assertIsInstance(future.exception(0), HealthRequestTimeout)
+
+  def test_should_resend_bulk_request_behind_interactive_ones_when_it_is_retried(self):
+    # GIVEN
+    sender = PacedSender(self.sender, rate=1.0, burst=1, clock=self.clock)
+    hc = HealthClient(sender, any_instance_index(), self.tracker)
+
+    with send_priority(PRIORITY_BULK):
+      hc.send_fault_get(any_company_id(), dst_addr=0x0005)
+
+    sender.send_pending()
+
+    # WHEN
+    self.tracker.expire(1.0)
+    hc.send_fault_get(any_company_id(), dst_addr=0x0006)
+    self.clock.now = 10.0
+    sender.send_pending()
+
+    # THEN
+    self.assertEqual([0x0005, 0x0006], [msg.dst_addr for msg in self.sender.sent_messages])
+    self.assertEqual(1, sender.queued_count)
+
+  def test_should_accept_status_when_it_is_not_a_duplicate(self):
+    self.assertTrue(self.tracker.accept_status(HealthClientOpcodes.FAULT_STATUS, fault_status(0x0005)))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,190 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from silvair_health_client.health_faults import HealthFaults, FaultSet, ERROR_FAULTS
+from silvair_health_client.health_state_store import FaultStateStore
+from silvair_health_client.health_status import CurrentStatus, FaultStatus
+
+
+def current_status(src_addr, faults):
+  return CurrentStatus(0, 0x0136, bytes(faults), src_addr)
+
+
+class ManualClock:
+
+  def __init__(self):
+    self.now = 1000.0
+
+  def __call__(self):
+    return self.now
+
+
+class TestFaultStateStore(unittest.TestCase):
+
+  def setUp(self):
+    self.changes = []
+    self.clock = ManualClock()
+    self.store = FaultStateStore(silence_timeout=60, clock=self.clock)
+    self.store.add_listener(self.changes.append)
+
+  def tearDown(self):
+    self.store.close()
+
+  def test_should_emit_change_when_fault_is_raised(self):
+    # WHEN
+    self.store.on_status(current_status(0x0005, [0x0E]))
+
+    # THEN
+    self.assertEqual(1, len(self.changes))
+    self.assertEqual(FaultStateStore.FAULTS_CHANGED, self.changes[0].kind)
+    self.assertEqual(frozenset([0x0E]), self.changes[0].raised)
+
+  def test_should_not_emit_change_when_same_faults_are_published_again(self):
+    # GIVEN
+    self.store.on_status(current_status(0x0005, [0x0E]))
+
+    # WHEN
+    self.store.on_status(current_status(0x0005, [0x0E]))
+
+    # THEN
+    self.assertEqual(1, len(self.changes))
+
+  def test_should_not_emit_change_when_node_without_faults_is_seen(self):
+    # WHEN
+    self.store.on_status(current_status(0x0005, [0x00]))
+
+    # THEN
+    self.assertEqual([], self.changes)
+    self.assertEqual(1, len(self.store))
+
+  def test_should_emit_cleared_faults_when_fault_is_cleared(self):
+    # GIVEN
+    self.store.on_status(current_status(0x0005, [0x0E, 0x01]))
+
+    # WHEN
+    self.store.on_status(current_status(0x0005, [0x01]))
+
+    # THEN
+    self.assertEqual(frozenset([0x0E]), self.changes[1].cleared)
+    self.assertEqual(frozenset(), self.changes[1].raised)
+
+  def test_should_report_silent_node_once_and_its_return(self):
+    # GIVEN
+    self.store.on_status(current_status(0x0005, []))
+
+    # WHEN
+    self.clock.now += 61
+    self.store.expire_silent()
+    self.store.expire_silent()
+    self.store.on_status(current_status(0x0005, []))
+
+    # THEN
+    self.assertEqual([FaultStateStore.NODE_SILENT, FaultStateStore.NODE_BACK], [c.kind for c in self.changes])
+
+  def test_should_ignore_fault_status_when_node_has_current_faults(self):
+    # GIVEN
+    self.store.on_status(current_status(0x0005, [HealthFaults.OVERHEAT_ERR]))
+
+    # WHEN
+    change = self.store.on_status(FaultStatus(0, 0x0136, bytes([HealthFaults.OVERHEAT_WARN]), 0x0005))
+
+    # THEN
+    self.assertIsNone(change)
+    self.assertEqual(1, len(self.changes))
+    self.assertEqual(frozenset([HealthFaults.OVERHEAT_ERR]), self.store[0x0005].faults)
+
+  def test_should_return_nodes_with_error_faults_when_nodes_are_queried_by_mask(self):
+    # GIVEN
+    self.store.on_status(current_status(0x0005, [HealthFaults.OVERHEAT_ERR]))
+    self.store.on_status(current_status(0x0006, [HealthFaults.OVERHEAT_WARN]))
+    self.store.on_status(current_status(0x0007, [HealthFaults.BATTERY_LOW_ERR, HealthFaults.OVERHEAT_WARN]))
+    self.store.on_status(current_status(0x0008, []))
+
+    # WHEN
+    nodes = self.store.nodes_with_faults(ERROR_FAULTS)
+
+    # THEN
+    self.assertEqual([0x0005, 0x0007], nodes)
+    self.assertEqual([0x0005, 0x0006, 0x0007], self.store.nodes_with_faults())
+
+
+  def test_should_not_return_node_when_its_fault_is_cleared(self):
+    # GIVEN
+    self.store.on_status(current_status(0x0005, [HealthFaults.OVERHEAT_ERR]))
+    self.store.on_status(current_status(0x0006, [HealthFaults.OVERHEAT_ERR]))
+
+    # WHEN
+    self.store.on_status(current_status(0x0005, [HealthFaults.DALI_LIMIT_ERROR]))
+    self.store.on_status(current_status(0x0006, []))
+
+    # THEN
+    self.assertEqual([0x0005], self.store.nodes_with_faults(ERROR_FAULTS))
+    self.assertEqual([], self.store.nodes_with_faults(FaultSet.from_codes([HealthFaults.OVERHEAT_ERR])))
+
+class TestFaultStateStorePersistence(unittest.TestCase):
+
+  def test_should_not_emit_known_faults_again_when_store_is_reopened(self):
+    # GIVEN
+    tmp_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, tmp_dir)
+    path = os.path.join(tmp_dir, "state.db")
+
+    store = FaultStateStore(path)
+    store.on_status(current_status(0x0005, [0x0E]))
+    store.close()
+
+    changes = []
+    store = FaultStateStore(path)
+    store.add_listener(changes.append)
+
+    # WHEN
+    store.on_status(current_status(0x0005, [0x0E]))
+    store.close()
+
+    # THEN
+    self.assertEqual([], changes)
+
+  def test_should_keep_node_without_faults_when_store_is_reopened(self):
+    # GIVEN
+    tmp_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, tmp_dir)
+    path = os.path.join(tmp_dir, "state.db")
+
+    store = FaultStateStore(path)
+    store.on_status(current_status(0x0005, []))
+    store.close()
+
+    # WHEN
+    store = FaultStateStore(path)
+    self.addCleanup(store.close)
+
+    # THEN
+    self.assertEqual(1, len(store))
+    self.assertEqual(frozenset(), store[0x0005].faults)
+
+  def test_should_not_store_uncommitted_changes_until_commit(self):
+    # GIVEN
+    tmp_dir = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, tmp_dir)
+    path = os.path.join(tmp_dir, "state.db")
+
+    store = FaultStateStore(path)
+    self.addCleanup(store.close)
+    store.on_status(current_status(0x0005, [0x0E]))
+
+    # WHEN
+    uncommitted = FaultStateStore(path)
+    store.commit()
+    committed = FaultStateStore(path)
+    uncommitted.close()
+    committed.close()
+
+    # THEN
+    self.assertEqual(0, len(uncommitted))
+    self.assertEqual(1, len(committed))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,106 @@
+import random
+import unittest
+
+from silvair_health_client.health_faults import FaultSet
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_status import decode_status, decode_fault_status, decode_attention_status, \
+  FaultStatus, CurrentStatus, AttentionStatus, PeriodStatus
+
+
+def any_test_id():
+  return random.getrandbits(8)
+
+
+def any_company_id():
+  return random.getrandbits(16)
+
+
+def any_src_addr():
+  return random.randrange(0x0001, 0x8000)
+
+
+def any_faults():
+  return bytes(random.getrandbits(8) for _ in range(random.randrange(0, 64)))
+
+
+def generic_status(test_id, company_id, faults, src_addr):
+  return bytes([test_id]) + company_id.to_bytes(2, byteorder="little") + faults + \
+    src_addr.to_bytes(2, byteorder="little")
+
+
+class TestHealthStatusDecoder(unittest.TestCase):
+
+  def test_should_decode_fault_status_when_decode_status_is_called_with_fault_status(self):
+    # GIVEN
+    test_id, company_id, faults, src_addr = any_test_id(), any_company_id(), any_faults(), any_src_addr()
+
+    # WHEN
+    status = decode_status(HealthClientOpcodes.FAULT_STATUS, generic_status(test_id, company_id, faults, src_addr))
+
+    # THEN
+    self.assertIsInstance(status, FaultStatus)
+    self.assertEqual((test_id, company_id, faults, src_addr), status)
+
+  def test_should_decode_current_status_when_decode_status_is_called_with_current_status(self):
+    # GIVEN
+    test_id, company_id, faults, src_addr = any_test_id(), any_company_id(), any_faults(), any_src_addr()
+
+    # WHEN
+    status = decode_status(HealthClientOpcodes.CURRENT_STATUS, generic_status(test_id, company_id, faults, src_addr))
+
+    # THEN
+    self.assertIsInstance(status, CurrentStatus)
+    self.assertEqual(faults, bytes(status.faults))
+
+  def test_should_return_fault_set_without_no_fault_when_fault_status_is_decoded(self):
+    # WHEN
+    status = decode_fault_status(generic_status(0x00, 0x0136, bytes([0x00, 0x0E, 0x81]), 0x0005))
+
+    # THEN
+    self.assertEqual(FaultSet.from_codes([0x0E, 0x81]), status.fault_set)
+
+  def test_should_return_no_src_addr_when_fault_status_has_no_address_appended(self):
+    # WHEN
+    status = decode_fault_status(bytes([0x01, 0x36, 0x01]))
+
+    # THEN
+    self.assertEqual((0x01, 0x0136, bytes(), None), status)
+
+  def test_should_decode_attention_status_when_decode_status_is_called_with_attention_status(self):
+    # GIVEN
+    src_addr = any_src_addr()
+
+    # WHEN
+    status = decode_status(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x05]) + src_addr.to_bytes(2, "little"))
+
+    # THEN
+    self.assertEqual(AttentionStatus(0x05, src_addr), status)
+
+  def test_should_decode_period_status_when_decode_status_is_called_with_period_status(self):
+    # WHEN
+    status = decode_status(HealthClientOpcodes.PERIOD_STATUS, bytes([0x03]))
+
+    # THEN
+    self.assertEqual(PeriodStatus(0x03, None), status)
+
+  def test_should_return_none_when_decode_status_is_called_with_not_status_opcode(self):
+    self.assertIsNone(decode_status(HealthClientOpcodes.FAULT_GET, bytes(2)))
+
+  def test_should_accept_memoryview_when_decode_attention_status_is_called(self):
+    self.assertEqual(AttentionStatus(0x07, None), decode_attention_status(memoryview(bytes([0x07]))))
+
+
+  def test_should_raise_value_error_when_attention_status_is_empty(self):
+    with self.assertRaises(ValueError):
+      decode_attention_status(bytes())
+
+  def test_should_raise_value_error_when_period_status_has_partial_address(self):
+    with self.assertRaises(ValueError):
+      decode_status(HealthClientOpcodes.PERIOD_STATUS, bytes([0x03, 0x05]))
+
+  def test_should_raise_value_error_when_fault_status_is_shorter_than_header(self):
+    with self.assertRaises(ValueError):
+      decode_fault_status(bytes([0x01, 0x36]))
+
+if __name__ == "__main__":
+  unittest.main()
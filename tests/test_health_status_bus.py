@@ -0,0 +1,106 @@
+import unittest
+
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.health_status import FaultStatus, AttentionStatus
+from silvair_health_client.health_status_bus import HealthStatusBus, StatusFilter
+from silvair_health_client.utils import HealthClientOpcodesDispatcher
+
+from tests.test_health_status import generic_status
+
+
+class TestHealthStatusBus(unittest.TestCase):
+
+  def test_should_deliver_decoded_record_to_every_subscriber_when_status_is_published(self):
+    # GIVEN
+    bus = HealthStatusBus()
+    first, second = [], []
+    bus.subscribe(first.append)
+    bus.subscribe(second.append, (HealthClientOpcodes.FAULT_STATUS,))
+
+    # WHEN
+    res = bus.publish(HealthClientOpcodes.FAULT_STATUS, generic_status(0x00, 0x0136, bytes([0x0E]), 0x0005))
+
+    # THEN
+    self.assertTrue(res)
+    self.assertEqual(1, len(first))
+    self.assertIsInstance(first[0], FaultStatus)
+    self.assertIs(first[0], second[0])
+
+  def test_should_return_false_when_status_has_no_subscriber(self):
+    # GIVEN
+    bus = HealthStatusBus()
+    bus.subscribe(lambda record: None, (HealthClientOpcodes.FAULT_STATUS,))
+
+    # WHEN
+    res = bus.publish(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x05, 0x05, 0x00]))
+
+    # THEN
+    self.assertFalse(res)
+
+  def test_should_deliver_only_matching_records_when_subscribed_with_filter(self):
+    # GIVEN
+    bus = HealthStatusBus()
+    records = []
+    bus.subscribe(records.append, status_filter=StatusFilter([range(0x0001, 0x0011)], 0x0136, faults_only=True))
+
+    # WHEN
+    bus.publish(HealthClientOpcodes.FAULT_STATUS, generic_status(0x00, 0x0136, bytes([0x0E]), 0x0005))
+    bus.publish(HealthClientOpcodes.FAULT_STATUS, generic_status(0x00, 0x0136, bytes([0x00]), 0x0006))
+    bus.publish(HealthClientOpcodes.FAULT_STATUS, generic_status(0x00, 0x0136, bytes([0x0E]), 0x0020))
+    bus.publish(HealthClientOpcodes.FAULT_STATUS, generic_status(0x00, 0x0137, bytes([0x0E]), 0x0007))
+    bus.publish(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x05, 0x05, 0x00]))
+
+    # THEN
+    self.assertEqual([0x0005], [record.src_addr for record in records])
+
+  def test_should_not_deliver_records_when_unsubscribed(self):
+    # GIVEN
+    bus = HealthStatusBus()
+    records = []
+    subscription = bus.subscribe(records.append)
+
+    # WHEN
+    bus.unsubscribe(subscription)
+    bus.publish(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x05, 0x05, 0x00]))
+
+    # THEN
+    self.assertEqual([], records)
+
+  def test_should_call_every_subscriber_and_reraise_when_subscriber_raises(self):
+    # GIVEN
+    bus = HealthStatusBus()
+    records = []
+
+    def failing(record):
+      raise KeyError("missing")
+
+    bus.subscribe(failing)
+    bus.subscribe(records.append)
+
+    # WHEN
+    with self.assertRaises(KeyError):
+      bus.publish(HealthClientOpcodes.ATTENTION_STATUS, bytes([0x05, 0x05, 0x00]))
+
+    # THEN
+    self.assertEqual([AttentionStatus(0x05, 0x0005)], records)
+
+  def test_should_publish_statuses_when_used_with_opcodes_dispatcher(self):
+    # GIVEN
+    bus = HealthStatusBus()
+    records = []
+    bus.subscribe(records.append)
+    dispatcher = HealthClientOpcodesDispatcher(bus.opcode_to_func_map())
+
+    # WHEN
+    dispatcher.dispatch(HealthClientOpcodes.PERIOD_STATUS, bytes([0x02]))
+
+    # THEN
+    self.assertEqual(1, len(records))
+
+  def test_should_raise_value_error_when_subscribed_to_not_status_opcode(self):
+    with self.assertRaises(ValueError):
+      HealthStatusBus().subscribe(lambda record: None, (HealthClientOpcodes.FAULT_GET,))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -1,8 +1,11 @@
+import threading
 import unittest
 import random
 
 from silvair_otau_demo.console_out import ConsoleOut
-from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher
+from silvair_health_client.health_opcodes import HealthClientOpcodes
+from silvair_health_client.utils import ModelIdToInstanceIndexMapper, HealthClientOpcodesDispatcher, \
+  QueuedOpcodesDispatcher
 
 
 def any_model_id():
@@ -26,6 +29,10 @@ def any_opcode():
   return random.getrandbits(16)
 
 
+def current_status(src_addr, fault):
+  return bytes([0x00, 0x36, 0x01, fault]) + src_addr.to_bytes(2, byteorder="little")
+
+
 class TestModelIdToInstanceIndexMapper(unittest.TestCase):
 
   def test_should_map_models_ids_on_instance_indexes_when_map_models_ids_method_is_called(self):
@@ -69,6 +76,41 @@ class TestModelIdToInstanceIndexMapper(unittest.TestCase):
     # THEN
     self.assertFalse(mapper.contains_model_id(any_model_id()))
 
+  def test_should_replace_previous_mapping_when_map_models_ids_method_is_called_again(self):
+    # GIVEN
+    mapper = ModelIdToInstanceIndexMapper(ConsoleOut())
+    model_id = any_model_id()
+    other_model_id = any_model_id_different_than(model_id)
+    mapper.map_models_ids([model_id, model_id])
+
+    # WHEN
+    mapper.map_models_ids([other_model_id, model_id])
+
+    # THEN
+    self.assertEqual((2,), mapper[model_id])
+    self.assertEqual((1,), mapper[other_model_id])
+
+  def test_should_return_model_id_when_model_id_method_is_called_with_mapped_instance_index(self):
+    # GIVEN
+    mapper = ModelIdToInstanceIndexMapper(ConsoleOut())
+    models_ids = any_models_ids()
+
+    # WHEN
+    mapper.map_models_ids(models_ids)
+
+    # THEN
+    for i, model_id in enumerate(models_ids):
+      self.assertEqual(model_id, mapper.model_id(i+1))
+
+    self.assertIsNone(mapper.model_id(len(models_ids) + 1))
+
+  def test_should_return_empty_tuple_when_model_id_is_not_mapped(self):
+    # GIVEN
+    mapper = ModelIdToInstanceIndexMapper(ConsoleOut())
+
+    # THEN
+    self.assertEqual((), mapper[any_model_id()])
+
 
 class TestHealthClientOpcodesDispatcher(unittest.TestCase):
 
@@ -119,5 +161,194 @@ class TestHealthClientOpcodesDispatcher(unittest.TestCase):
     self.assertFalse(res)
 
 
+class TestQueuedOpcodesDispatcher(unittest.TestCase):
+
+  def test_should_handle_messages_in_order_when_dispatched_with_the_same_opcode(self):
+    # GIVEN
+    handled = []
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: handled.append}, workers=4)
+
+    # WHEN
+    dispatcher.start()
+
+    for idx in range(100):
+      dispatcher.dispatch(opcode, bytes([idx]))
+
+    dispatcher.stop()
+
+    # THEN
+    self.assertEqual([bytes([idx]) for idx in range(100)], handled)
+
+  def test_should_pass_timestamp_to_handler_when_message_is_dispatched_with_it(self):
+    # GIVEN
+    handled = []
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: lambda command, *timestamp: handled.append(timestamp)})
+
+    # WHEN
+    dispatcher.start()
+    dispatcher.dispatch(opcode, bytes([0x01]), 100.0)
+    dispatcher.dispatch(opcode, bytes([0x02]))
+    dispatcher.stop()
+
+    # THEN
+    self.assertEqual([(100.0,), ()], handled)
+
+  def test_should_return_without_waiting_for_handler_when_dispatch_method_is_called(self):
+    # GIVEN
+    release = threading.Event()
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: lambda command: release.wait()})
+    dispatcher.start()
+    self.addCleanup(dispatcher.stop)
+    self.addCleanup(release.set)
+
+    # WHEN
+    res = [dispatcher.dispatch(opcode, bytes()) for _ in range(10)]
+
+    # THEN
+    self.assertEqual([True] * 10, res)
+
+  def test_should_drop_oldest_messages_when_queue_is_full(self):
+    # GIVEN
+    handled = []
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: handled.append}, max_queued=2)
+
+    # WHEN
+    for idx in range(5):
+      dispatcher.dispatch(opcode, bytes([idx]))
+
+    dispatcher.start()
+    dispatcher.stop()
+
+    # THEN
+    self.assertEqual(3, dispatcher.dropped)
+    self.assertEqual([bytes([3]), bytes([4])], handled)
+
+  def test_should_block_caller_until_queue_has_space_when_overflow_is_block(self):
+    # GIVEN
+    handled = []
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: handled.append}, max_queued=1, overflow=QueuedOpcodesDispatcher.BLOCK)
+    dispatcher.start()
+
+    # WHEN
+    for idx in range(20):
+      dispatcher.dispatch(opcode, bytes([idx]))
+
+    dispatcher.stop()
+
+    # THEN
+    self.assertEqual(0, dispatcher.dropped)
+    self.assertEqual(20, len(handled))
+
+  def test_should_handle_statuses_of_other_nodes_while_handler_of_one_node_is_blocked(self):
+    # GIVEN
+    release = threading.Event()
+    handled = threading.Event()
+
+    def handler(command):
+      if command[-2:] == bytes([0x01, 0x00]):
+        release.wait()
+      else:
+        handled.set()
+
+    dispatcher = QueuedOpcodesDispatcher({HealthClientOpcodes.CURRENT_STATUS: handler}, workers=2)
+    dispatcher.start()
+    self.addCleanup(dispatcher.stop)
+    self.addCleanup(release.set)
+
+    # WHEN
+    dispatcher.dispatch(HealthClientOpcodes.CURRENT_STATUS, current_status(0x0001, 0x00))
+    dispatcher.dispatch(HealthClientOpcodes.CURRENT_STATUS, current_status(0x0002, 0x00))
+
+    # THEN
+    self.assertTrue(handled.wait(5))
+
+  def test_should_handle_statuses_of_a_node_in_order_when_opcodes_differ(self):
+    # GIVEN
+    handled = []
+    dispatcher = QueuedOpcodesDispatcher({HealthClientOpcodes.CURRENT_STATUS: handled.append,
+                                          HealthClientOpcodes.FAULT_STATUS: handled.append}, workers=4)
+    commands = [current_status(0x0005, fault) for fault in range(50)]
+
+    # WHEN
+    dispatcher.start()
+
+    for idx, command in enumerate(commands):
+      dispatcher.dispatch(HealthClientOpcodes.FAULT_STATUS if idx % 2 else HealthClientOpcodes.CURRENT_STATUS,
+                          command)
+
+    dispatcher.stop()
+
+    # THEN
+    self.assertEqual(commands, handled)
+
+  def test_should_keep_queue_bounded_when_overflow_is_block_and_workers_are_not_started(self):
+    # GIVEN
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: lambda command: None}, max_queued=2,
+                                         overflow=QueuedOpcodesDispatcher.BLOCK)
+
+    # WHEN
+    for idx in range(5):
+      dispatcher.dispatch(opcode, bytes([idx]))
+
+    # THEN
+    self.assertEqual(2, dispatcher.queued_count)
+    self.assertEqual(3, dispatcher.dropped)
+
+  def test_should_drop_messages_when_they_are_dispatched_after_stop(self):
+    # GIVEN
+    handled = []
+    opcode = any_opcode()
+    dispatcher = QueuedOpcodesDispatcher({opcode: handled.append})
+    dispatcher.start()
+    dispatcher.stop()
+
+    # WHEN
+    res = dispatcher.dispatch(opcode, bytes())
+
+    # THEN
+    self.assertTrue(res)
+    self.assertEqual(0, dispatcher.queued_count)
+    self.assertEqual(1, dispatcher.dropped)
+    self.assertEqual([], handled)
+
+  def test_should_report_handler_exception_when_handler_raises_key_error(self):
+    # GIVEN
+    errors = []
+    opcode = any_opcode()
+
+    def handler(command):
+      raise KeyError("missing")
+
+    dispatcher = QueuedOpcodesDispatcher({opcode: handler},
+                                         error_handler=lambda op, command, err: errors.append((op, err)))
+
+    # WHEN
+    res = dispatcher.dispatch(opcode, bytes())
+    dispatcher.start()
+    dispatcher.stop()
+
+    # THEN
+    self.assertTrue(res)
+    self.assertEqual(1, len(errors))
+    self.assertEqual(opcode, errors[0][0])
+    self.assertIsInstance(errors[0][1], KeyError)
+
+  def test_should_return_false_when_dispatch_method_is_called_with_opcode_not_mapped_during_initialization(self):
+    # GIVEN
+    dispatcher = QueuedOpcodesDispatcher({})
+
+    # WHEN
+    res = dispatcher.dispatch(any_opcode(), bytes())
+
+    # THEN
+    self.assertFalse(res)
+
+
 if __name__ == "__main__":
   unittest.main()